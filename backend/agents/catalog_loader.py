@@ -0,0 +1,544 @@
+"""
+Control Catalog Loader — streams NIST OSCAL catalogs and DISA XCCDF benchmarks
+into ControlCatalog / ControlMapping and the RAG index in one pass.
+
+Parsers are generators over bounded memory:
+
+  - OSCAL JSON is read one control family (group) at a time with ijson
+    (falls back to json.load if ijson is not installed)
+  - OSCAL XML, XCCDF and the DISA CCI list are read with iterparse; each
+    element is cleared and detached from its parent once consumed
+  - OSCAL profiles (baselines) are small and parsed whole
+
+Records are written with bulk upserts in batches (CatalogWriter) while the
+same stream feeds ComplianceIndexer, which embeds in bounded windows.
+STIG rules are stored as ControlCatalog rows (framework="stig", keyed by
+vuln ID) with a stig -> nist_800_53_r5 ControlMapping per mapped control,
+carrying the CCI and SRG IDs.
+
+Used by the `load_catalog` management command.
+"""
+
+import json
+import logging
+import os
+import re
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+OSCAL_FRAMEWORK = "nist_800_53_r5"
+STIG_FRAMEWORK = "stig"
+
+DEFAULT_BATCH_SIZE = 1000
+
+CONTROL_UPDATE_FIELDS = [
+    "title", "description", "family", "baseline_impact", "parameters",
+    "assessment_objective", "implementation_guidance", "updated_at",
+]
+MAPPING_UPDATE_FIELDS = ["cci_id", "srg_id", "mapping_confidence", "updated_at"]
+
+_PARAM_INSERT_RE = re.compile(r"\{\{\s*insert:\s*param,\s*([^}\s]+)\s*\}\}")
+_NIST_INDEX_RE = re.compile(r"^([A-Z]{2}-\d+)(?:\s*\((\d+)\))?")
+_VULN_DISCUSSION_RE = re.compile(r"<VulnDiscussion>(.*?)</VulnDiscussion>", re.DOTALL)
+
+
+def _local(tag: str) -> str:
+    """Element tag without its namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _iterparse(source: str, release: Set[str]) -> Iterator[Tuple[Any, List[Any]]]:
+    """
+    Yield (element, ancestors) for every end event. Elements whose tag is in
+    `release` are cleared and detached after the consumer has seen them, so
+    memory stays bounded by the largest such element.
+    """
+    from defusedxml.ElementTree import iterparse
+
+    stack: List[Any] = []
+    for event, elem in iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        yield elem, stack
+        if _local(elem.tag) in release:
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+# ---------------------------------------------------------------------------
+# OSCAL catalogs and profiles
+# ---------------------------------------------------------------------------
+
+def oscal_control_label(control_id: str) -> str:
+    """OSCAL control id to catalog label: "ac-2" -> "AC-2", "ac-2.1" -> "AC-2(1)"."""
+    base, _, enhancement = control_id.partition(".")
+    return f"{base.upper()}({enhancement})" if enhancement else base.upper()
+
+
+def iter_oscal_controls(
+    path: str,
+    framework: str = OSCAL_FRAMEWORK,
+    baselines: Optional[Dict[str, Set[str]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream controls (and enhancements) of an OSCAL catalog as ControlCatalog
+    records. `baselines` maps a baseline name to the control labels it
+    includes (see load_oscal_baseline). Withdrawn controls are skipped.
+    """
+    baselines = baselines or {}
+    groups = _iter_oscal_json_groups(path) if path.endswith(".json") else _iter_oscal_xml_controls(path)
+    for family, control in groups:
+        for record in _walk_oscal_control(control, family, framework, baselines):
+            yield record
+
+
+def _iter_oscal_json_groups(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    with open(path, "rb") as f:
+        try:
+            import ijson
+
+            groups = ijson.items(f, "catalog.groups.item")
+        except ImportError:
+            logger.info("ijson not installed — loading the OSCAL catalog in one piece")
+            groups = json.load(f)["catalog"].get("groups", [])
+        for group in groups:
+            family = group.get("id", "").upper()
+            for control in group.get("controls", []):
+                yield family, control
+
+
+def _iter_oscal_xml_controls(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    # Enhancements end before their parent control; they are emitted as they
+    # end and their (cleared) elements are skipped when the parent is converted.
+    for elem, ancestors in _iterparse(path, release={"control", "group"}):
+        if _local(elem.tag) != "control":
+            continue
+        group = next((a for a in reversed(ancestors) if _local(a.tag) == "group"), None)
+        family = group.get("id", "").upper() if group is not None else elem.get("id", "").split("-")[0].upper()
+        yield family, _oscal_xml_control(elem)
+
+
+def _oscal_xml_control(elem) -> Dict[str, Any]:
+    control: Dict[str, Any] = {"id": elem.get("id", ""), "params": [], "props": [], "parts": []}
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == "title":
+            control["title"] = _xml_text(child)
+        elif tag == "param":
+            control["params"].append(_oscal_xml_param(child))
+        elif tag == "prop":
+            control["props"].append({"name": child.get("name"), "value": child.get("value")})
+        elif tag == "part":
+            control["parts"].append(_oscal_xml_part(child))
+    return control
+
+
+def _oscal_xml_param(elem) -> Dict[str, Any]:
+    param: Dict[str, Any] = {"id": elem.get("id", "")}
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == "label":
+            param["label"] = _xml_text(child)
+        elif tag == "select":
+            param["select"] = {"choice": [_xml_text(c) for c in child if _local(c.tag) == "choice"]}
+    return param
+
+
+def _oscal_xml_part(elem) -> Dict[str, Any]:
+    part: Dict[str, Any] = {"name": elem.get("name", ""), "props": [], "parts": []}
+    prose = []
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == "part":
+            part["parts"].append(_oscal_xml_part(child))
+        elif tag == "prop":
+            part["props"].append({"name": child.get("name"), "value": child.get("value")})
+        elif tag != "title":
+            prose.append(_xml_text(child))
+    part["prose"] = "\n".join(p for p in prose if p)
+    return part
+
+
+def _xml_text(elem) -> str:
+    """Flatten OSCAL markup; <insert type="param"> becomes a JSON-style insert."""
+    parts = [elem.text or ""]
+    for child in elem:
+        if _local(child.tag) == "insert":
+            parts.append(f"{{{{ insert: param, {child.get('id-ref', '')} }}}}")
+        else:
+            parts.append(_xml_text(child))
+        parts.append(child.tail or "")
+    return " ".join("".join(parts).split())
+
+
+def _walk_oscal_control(
+    control: Dict[str, Any],
+    family: str,
+    framework: str,
+    baselines: Dict[str, Set[str]],
+) -> Iterator[Dict[str, Any]]:
+    record = _oscal_control_record(control, family, framework, baselines)
+    if record is not None:
+        yield record
+    for enhancement in control.get("controls", []):
+        yield from _walk_oscal_control(enhancement, family, framework, baselines)
+
+
+def _oscal_control_record(
+    control: Dict[str, Any],
+    family: str,
+    framework: str,
+    baselines: Dict[str, Set[str]],
+) -> Optional[Dict[str, Any]]:
+    if _prop(control, "status") == "withdrawn":
+        return None
+
+    params = {p.get("id", ""): _param_text(p) for p in control.get("params", [])}
+    label = oscal_control_label(control.get("id", ""))
+    sections = {"statement": [], "guidance": [], "assessment-objective": []}
+    for part in control.get("parts", []):
+        name = "assessment-objective" if part.get("name") == "objective" else part.get("name")
+        if name in sections:
+            sections[name].extend(_render_part(part, params, depth=-1))
+
+    return {
+        "framework": framework,
+        "control_id": label,
+        "title": (control.get("title") or "")[:500],
+        "family": family,
+        "baseline_impact": [name for name, labels in baselines.items() if label in labels],
+        "parameters": params,
+        "description": "\n".join(sections["statement"]),
+        "assessment_objective": "\n".join(sections["assessment-objective"]),
+        "implementation_guidance": "\n".join(sections["guidance"]),
+    }
+
+
+def _render_part(part: Dict[str, Any], params: Dict[str, str], depth: int = 0) -> List[str]:
+    """Prose of a part and its sub-parts, one labelled line each, indented by depth."""
+    text = _PARAM_INSERT_RE.sub(
+        lambda m: params.get(m.group(1), "[Assignment: organization-defined parameter]"),
+        part.get("prose", "") or "",
+    )
+    line = " ".join(x for x in (_prop(part, "label"), text) if x)
+    lines = ["  " * max(depth, 0) + line] if line else []
+    for sub in part.get("parts", []):
+        lines.extend(_render_part(sub, params, depth + 1))
+    return lines
+
+
+def _param_text(param: Dict[str, Any]) -> str:
+    choices = (param.get("select") or {}).get("choice")
+    if choices:
+        return "[Selection: " + "; ".join(str(c) for c in choices) + "]"
+    return f"[Assignment: {param.get('label') or 'organization-defined parameter'}]"
+
+
+def _prop(item: Dict[str, Any], name: str) -> str:
+    for prop in item.get("props", []) or []:
+        if prop.get("name") == name:
+            return prop.get("value") or ""
+    return ""
+
+
+def load_oscal_baseline(path: str) -> Set[str]:
+    """Control labels included by an OSCAL profile (e.g., the Rev 5 LOW baseline)."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)["profile"]
+        ids = [
+            control_id
+            for imported in profile.get("imports", [])
+            for include in imported.get("include-controls", [])
+            for control_id in include.get("with-ids", [])
+        ]
+    else:
+        ids = [
+            (elem.text or "").strip()
+            for elem, _ in _iterparse(path, release=set())
+            if _local(elem.tag) == "with-id"
+        ]
+    return {oscal_control_label(control_id) for control_id in ids if control_id}
+
+
+# ---------------------------------------------------------------------------
+# DISA CCI list and XCCDF benchmarks
+# ---------------------------------------------------------------------------
+
+def normalize_nist_reference(index: str) -> str:
+    """CCI reference index to a control label: "AC-2 (1) (a)" -> "AC-2(1)", "AC-1 a 1" -> "AC-1"."""
+    match = _NIST_INDEX_RE.match(index.strip())
+    if not match:
+        return ""
+    base, enhancement = match.groups()
+    return f"{base}({enhancement})" if enhancement else base
+
+
+def iter_cci_list(path: str, nist_revision: str = "5") -> Iterator[Tuple[str, List[str]]]:
+    """Stream (CCI ID, [NIST controls]) from the DISA CCI list (U_CCI_List.xml)."""
+    for elem, _ in _iterparse(path, release={"cci_item"}):
+        if _local(elem.tag) != "cci_item":
+            continue
+        controls = []
+        for ref in elem.iter():
+            if _local(ref.tag) == "reference" and ref.get("version") == nist_revision:
+                control = normalize_nist_reference(ref.get("index", ""))
+                if control and control not in controls:
+                    controls.append(control)
+        yield elem.get("id", ""), controls
+
+
+def load_cci_list(path: str, nist_revision: str = "5") -> Dict[str, List[str]]:
+    return {cci: controls for cci, controls in iter_cci_list(path, nist_revision) if controls}
+
+
+def _strip_xccdf_prefix(identifier: str, kind: str) -> str:
+    """XCCDF 1.2 ids carry a namespace prefix: xccdf_mil.disa.stig_group_V-1 -> V-1."""
+    marker = f"_{kind}_"
+    return identifier.split(marker, 1)[1] if identifier.startswith("xccdf_") and marker in identifier else identifier
+
+
+def iter_xccdf_rules(path: str, cci_map: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the rules of a DISA XCCDF benchmark as index_stig_benchmarks
+    records (plus stig_id, srg_id, version). NIST controls are resolved from
+    the rule's CCIs via `cci_map`.
+    """
+    cci_map = cci_map if cci_map is not None else _default_cci_map()
+    benchmark = {"title": "", "version": "", "release": ""}
+
+    for elem, ancestors in _iterparse(path, release={"Rule", "Group", "Profile", "Value"}):
+        tag = _local(elem.tag)
+        parent = _local(ancestors[-1].tag) if ancestors else ""
+
+        if parent == "Benchmark" and tag in ("title", "version"):
+            benchmark[tag] = (elem.text or "").strip()
+        elif parent == "Benchmark" and tag == "plain-text" and elem.get("id") == "release-info":
+            benchmark["release"] = (elem.text or "").strip()
+        elif tag == "Rule":
+            group = ancestors[-1] if parent == "Group" else None
+            yield _xccdf_rule_record(elem, group, benchmark, cci_map)
+
+
+def _xccdf_rule_record(rule, group, benchmark: Dict[str, str], cci_map: Dict[str, List[str]]) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {"cci_ids": []}
+    for child in rule:
+        tag = _local(child.tag)
+        if tag in ("title", "version", "description", "fixtext"):
+            fields[tag] = (child.text or "").strip()
+        elif tag == "ident" and (child.get("system") or "").lower().endswith("cci"):
+            fields["cci_ids"].append((child.text or "").strip())
+        elif tag == "check":
+            for content in child:
+                if _local(content.tag) == "check-content":
+                    fields["check_content"] = (content.text or "").strip()
+
+    description = fields.get("description", "")
+    discussion = _VULN_DISCUSSION_RE.search(description)
+    # NIST control -> first CCI that maps the rule to it
+    cci_by_control: Dict[str, str] = {}
+    for cci in fields["cci_ids"]:
+        for control in cci_map.get(cci, []):
+            cci_by_control.setdefault(control, cci)
+
+    group_title = ""
+    if group is not None:
+        group_title = next(((c.text or "").strip() for c in group if _local(c.tag) == "title"), "")
+
+    return {
+        "stig_name": benchmark["title"],
+        "stig_version": benchmark["version"],
+        "stig_release": benchmark["release"],
+        "vuln_id": _strip_xccdf_prefix(group.get("id", ""), "group") if group is not None else "",
+        "rule_id": _strip_xccdf_prefix(rule.get("id", ""), "rule"),
+        "stig_id": fields.get("version", ""),
+        "srg_id": group_title if group_title.startswith("SRG-") else "",
+        "severity": rule.get("severity", "medium"),
+        "title": fields.get("title", ""),
+        "discussion": (discussion.group(1) if discussion else description).strip(),
+        "check_content": fields.get("check_content", ""),
+        "fix_text": fields.get("fixtext", ""),
+        "cci_ids": fields["cci_ids"],
+        "nist_controls": list(cci_by_control),
+        "cci_by_control": cci_by_control,
+    }
+
+
+def _default_cci_map():
+    """CCI -> NIST lookup from the current crosswalk (supports .get like a dict)."""
+    from mcp_tools.cci_crosswalk import get_cci_crosswalk
+
+    return get_cci_crosswalk()
+
+
+# ---------------------------------------------------------------------------
+# Bulk upserts
+# ---------------------------------------------------------------------------
+
+class CatalogWriter:
+    """Buffers catalog rows and writes them with batched bulk upserts."""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.stats = {"controls": 0, "mappings": 0, "mappings_removed": 0}
+        self._controls: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._mappings: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        self._mapped_sources: Set[Tuple[str, str]] = set()
+
+    def add_control(self, record: Dict[str, Any]) -> None:
+        self._controls[(record["framework"], record["control_id"])] = record
+        if len(self._controls) >= self.batch_size:
+            self.flush()
+
+    def add_stig_rule(self, rule: Dict[str, Any]) -> None:
+        """One ControlCatalog row per rule, one mapping per NIST control it maps to."""
+        vuln_id = rule["vuln_id"] or rule["rule_id"]
+        nist_controls = rule["nist_controls"]
+        self._mapped_sources.add((STIG_FRAMEWORK, vuln_id))
+        for control in nist_controls:
+            self._mappings[(STIG_FRAMEWORK, vuln_id, OSCAL_FRAMEWORK, control)] = {
+                "source_framework": STIG_FRAMEWORK,
+                "source_control_id": vuln_id,
+                "target_framework": OSCAL_FRAMEWORK,
+                "target_control_id": control,
+                "cci_id": rule["cci_by_control"].get(control, ""),
+                "srg_id": rule["srg_id"][:50],
+                "mapping_confidence": 1.0,
+            }
+        self.add_control({
+            "framework": STIG_FRAMEWORK,
+            "control_id": vuln_id,
+            "title": rule["title"][:500],
+            "family": nist_controls[0].split("-")[0] if nist_controls else "",
+            "baseline_impact": [],
+            "parameters": {
+                key: rule[key]
+                for key in (
+                    "stig_name", "stig_version", "stig_release", "rule_id", "stig_id", "srg_id", "severity", "cci_ids",
+                )
+            },
+            "description": rule["discussion"],
+            "assessment_objective": rule["check_content"],
+            "implementation_guidance": rule["fix_text"],
+        })
+
+    def flush(self) -> None:
+        from django.db import transaction
+
+        from core.models import ControlCatalog, ControlMapping
+
+        with transaction.atomic():
+            if self._controls:
+                ControlCatalog.objects.bulk_create(
+                    [ControlCatalog(**record) for record in self._controls.values()],
+                    update_conflicts=True,
+                    unique_fields=["framework", "control_id"],
+                    update_fields=CONTROL_UPDATE_FIELDS,
+                )
+                self.stats["controls"] += len(self._controls)
+
+            if self._mapped_sources:
+                # Replace the mappings of the sources in this batch
+                keep = set(self._mappings)
+                stale = [
+                    pk for pk, *key in ControlMapping.objects.filter(
+                        source_framework=STIG_FRAMEWORK,
+                        source_control_id__in=[source_id for _, source_id in self._mapped_sources],
+                    ).values_list("pk", "source_framework", "source_control_id", "target_framework", "target_control_id")
+                    if tuple(key) not in keep
+                ]
+                if stale:
+                    ControlMapping.objects.filter(pk__in=stale).delete()
+                    self.stats["mappings_removed"] += len(stale)
+
+            if self._mappings:
+                ControlMapping.objects.bulk_create(
+                    [ControlMapping(**record) for record in self._mappings.values()],
+                    update_conflicts=True,
+                    unique_fields=["source_framework", "source_control_id", "target_framework", "target_control_id"],
+                    update_fields=MAPPING_UPDATE_FIELDS,
+                )
+                self.stats["mappings"] += len(self._mappings)
+
+        self._controls, self._mappings, self._mapped_sources = {}, {}, set()
+
+
+# ---------------------------------------------------------------------------
+# Loaders: parse -> bulk upsert -> index, in one pass
+# ---------------------------------------------------------------------------
+
+def load_oscal_catalog(
+    path: str,
+    framework: str = OSCAL_FRAMEWORK,
+    baselines: Optional[Dict[str, Set[str]]] = None,
+    indexer=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prune: bool = False,
+) -> Dict[str, int]:
+    """Load an OSCAL catalog into ControlCatalog and (optionally) the RAG index."""
+    writer = CatalogWriter(batch_size)
+    records = _persisting(iter_oscal_controls(path, framework, baselines), writer.add_control, writer)
+    indexed = _consume(records, indexer.index_nist_controls if indexer else None, prune)
+    return _finish(writer, indexed)
+
+
+def load_xccdf_benchmarks(
+    paths: Iterable[str],
+    cci_map: Optional[Dict[str, List[str]]] = None,
+    indexer=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prune: bool = False,
+) -> Dict[str, int]:
+    """
+    Load XCCDF benchmarks into ControlCatalog / ControlMapping and (optionally)
+    the RAG index. With prune, checks dropped from a loaded benchmark are
+    removed from the index.
+    """
+    cci_map = cci_map if cci_map is not None else _default_cci_map()
+    writer = CatalogWriter(batch_size)
+    rules = chain.from_iterable(iter_xccdf_rules(path, cci_map) for path in paths)
+    records = _persisting(rules, writer.add_stig_rule, writer)
+    indexed = _consume(records, indexer.index_stig_benchmarks if indexer else None, prune)
+    return _finish(writer, indexed)
+
+
+def find_catalog_files(paths: Iterable[str], suffixes: Tuple[str, ...], name_hint: str = "") -> List[str]:
+    """Expand directories into the matching files they contain (recursively, sorted)."""
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for directory, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.lower().endswith(suffixes) and name_hint in name.lower():
+                    found.append(os.path.join(directory, name))
+    return found
+
+
+def _persisting(records: Iterator[Dict[str, Any]], add, writer: CatalogWriter) -> Iterator[Dict[str, Any]]:
+    for record in records:
+        add(record)
+        yield record
+    writer.flush()
+
+
+def _consume(records: Iterator[Dict[str, Any]], index, prune: bool) -> int:
+    if index is None:
+        for _ in records:
+            pass
+        return 0
+    return index(records, prune=prune)
+
+
+def _finish(writer: CatalogWriter, indexed: int) -> Dict[str, int]:
+    # bulk_create sends no post_save signals; re-check the catalog snapshot explicitly
+    from agents.catalog_snapshot import invalidate_catalog_snapshot
+
+    invalidate_catalog_snapshot()
+    return {**writer.stats, "chunks_indexed": indexed}
@@ -0,0 +1,300 @@
+"""
+Control Catalog Snapshot — process-wide, versioned, immutable catalog view.
+
+The control catalog (ControlCatalog + ControlMapping) only changes when a
+new NIST/FedRAMP/STIG release is loaded, yet every run used to rebuild
+control_map from the database. This module compiles the whole catalog
+once into a compact snapshot:
+
+  - one JSON record per control (catalog fields + cross_mappings), stored
+    back-to-back in a single buffer with an in-memory offset index
+  - lookups by key and selections by (frameworks, families) are O(1)/cached
+    and always return fresh dicts, so the snapshot itself is immutable
+  - optionally persisted to CONTROL_CATALOG.SNAPSHOT_DIR and memory-mapped,
+    so Celery prefork children share the same page-cache pages
+
+The snapshot version is a fingerprint of both tables (row counts + latest
+updated_at). Saving or deleting a catalog row bumps it; post_save /
+post_delete signals (core.signals) force this process to re-check at once,
+other processes notice within VERSION_CHECK_SECONDS.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"ATOCATALOG1\n"
+
+# Mapping fields copied into each control's cross_mappings
+MAPPING_FIELDS = ("target_framework", "target_control_id", "cci_id", "srg_id")
+
+# Text fields are truncated to this many characters in the snapshot
+MAX_TEXT_CHARS = 500
+
+
+class CatalogSnapshot:
+    """
+    Immutable compiled catalog.
+
+    `buffer` holds the concatenated JSON records (bytes or an mmap);
+    `index` maps "framework:control_id" to (offset, length, family).
+    """
+
+    def __init__(
+        self,
+        version: str,
+        buffer: Union[bytes, mmap.mmap],
+        index: Dict[str, Tuple[int, int, str]],
+        body_offset: int = 0,
+    ):
+        self.version = version
+        self._buffer = buffer
+        self._index = index
+        self._body_offset = body_offset
+        self._selections: Dict[Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]], Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh copy of one control record, or None."""
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        start = self._body_offset + offset
+        return json.loads(self._buffer[start:start + length])
+
+    def select(
+        self,
+        frameworks: Iterable[str],
+        families: Optional[Iterable[str]] = None,
+    ) -> Tuple[str, ...]:
+        """
+        Keys of controls in `frameworks` (and `families`, unless None), in
+        catalog order. Selections are memoized per (frameworks, families).
+        """
+        cache_key = (tuple(frameworks), tuple(families) if families is not None else None)
+        with self._lock:
+            keys = self._selections.get(cache_key)
+        if keys is not None:
+            return keys
+
+        framework_set = set(cache_key[0])
+        family_set = set(cache_key[1]) if cache_key[1] is not None else None
+        keys = tuple(
+            key for key, (_, _, family) in self._index.items()
+            if key.split(":", 1)[0] in framework_set
+            and (family_set is None or family in family_set)
+        )
+        with self._lock:
+            self._selections[cache_key] = keys
+        return keys
+
+    def iter_controls(
+        self,
+        frameworks: Iterable[str],
+        families: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (key, record copy) for the selected controls."""
+        for key in self.select(frameworks, families):
+            yield key, self.get(key)
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+# ---------------------------------------------------------------------------
+# Build / persist / load
+# ---------------------------------------------------------------------------
+
+def build_catalog_snapshot(version: Optional[str] = None) -> CatalogSnapshot:
+    """Compile the full catalog from the database in two queries."""
+    from django.db.models.functions import Substr
+
+    from core.models import ControlCatalog, ControlMapping
+
+    version = version or catalog_version()
+
+    records: Dict[str, Dict[str, Any]] = {}
+    rows = ControlCatalog.objects.annotate(
+        description_excerpt=Substr("description", 1, MAX_TEXT_CHARS),
+        assessment_objective_excerpt=Substr("assessment_objective", 1, MAX_TEXT_CHARS),
+    ).values(
+        "control_id", "framework", "title", "family", "baseline_impact",
+        "description_excerpt", "assessment_objective_excerpt",
+    )
+    for row in rows:
+        records[f"{row['framework']}:{row['control_id']}"] = {
+            "control_id": row["control_id"],
+            "framework": row["framework"],
+            "title": row["title"],
+            "family": row["family"],
+            "baseline_impact": row["baseline_impact"],
+            "description": row["description_excerpt"] or "",
+            "assessment_objective": row["assessment_objective_excerpt"] or "",
+            "cross_mappings": [],
+        }
+
+    for m in ControlMapping.objects.values("source_framework", "source_control_id", *MAPPING_FIELDS):
+        record = records.get(f"{m['source_framework']}:{m['source_control_id']}")
+        if record is not None:
+            record["cross_mappings"].append({f: m[f] for f in MAPPING_FIELDS})
+
+    body, index = _encode_records(records)
+    return CatalogSnapshot(version, body, index)
+
+
+def write_catalog_snapshot(snapshot: CatalogSnapshot, directory: str) -> str:
+    """Persist a snapshot as catalog-<version>.snap (atomic rename); returns the path."""
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, snapshot.version)
+    header = json.dumps(
+        {
+            "version": snapshot.version,
+            "index": [[key, offset, length, family] for key, (offset, length, family) in snapshot._index.items()],
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(header + b"\n")
+        start = snapshot._body_offset
+        end = start + sum(length for _, length, _ in snapshot._index.values())
+        f.write(snapshot._buffer[start:end])
+    os.replace(tmp_path, path)
+
+    # Drop superseded snapshots; processes that still map them keep their pages
+    for name in os.listdir(directory):
+        if name.startswith("catalog-") and name.endswith(".snap") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    return path
+
+
+def load_catalog_snapshot(path: str) -> CatalogSnapshot:
+    """Memory-map a persisted snapshot; only the offset index is parsed."""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        buffer.close()
+        raise ValueError(f"Not a control catalog snapshot: {path}")
+    header_end = buffer.find(b"\n", len(SNAPSHOT_MAGIC))
+    header = json.loads(buffer[len(SNAPSHOT_MAGIC):header_end])
+    index = {key: (offset, length, family) for key, offset, length, family in header["index"]}
+    return CatalogSnapshot(header["version"], buffer, index, body_offset=header_end + 1)
+
+
+def catalog_version() -> str:
+    """Fingerprint of the catalog tables; changes on any save/insert/delete."""
+    from django.db.models import Count, Max
+
+    from core.models import ControlCatalog, ControlMapping
+
+    parts = []
+    for model in (ControlCatalog, ControlMapping):
+        stats = model.objects.aggregate(count=Count("id"), updated=Max("updated_at"))
+        parts.append(f"{model.__name__}:{stats['count']}:{stats['updated']}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_records(records: Dict[str, Dict[str, Any]]) -> Tuple[bytes, Dict[str, Tuple[int, int, str]]]:
+    chunks: List[bytes] = []
+    index: Dict[str, Tuple[int, int, str]] = {}
+    offset = 0
+    for key in sorted(records):
+        data = json.dumps(records[key], separators=(",", ":"), default=str).encode("utf-8")
+        index[key] = (offset, len(data), records[key]["family"])
+        chunks.append(data)
+        offset += len(data)
+    return b"".join(chunks), index
+
+
+def _snapshot_path(directory: str, version: str) -> str:
+    return os.path.join(directory, f"catalog-{version}.snap")
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry
+# ---------------------------------------------------------------------------
+
+_snapshot: Optional[CatalogSnapshot] = None
+_checked_at = 0.0
+_stale = True
+_registry_lock = threading.Lock()
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Return the current catalog snapshot, rebuilding or re-mapping it only
+    when the catalog version has changed.
+    """
+    global _snapshot, _checked_at, _stale
+
+    config = _get_catalog_config()
+    check_interval = config.get("VERSION_CHECK_SECONDS", 30)
+
+    with _registry_lock:
+        now = time.monotonic()
+        if _snapshot is not None and not _stale and now - _checked_at < check_interval:
+            return _snapshot
+
+        version = catalog_version()
+        _checked_at, _stale = now, False
+        if _snapshot is not None and _snapshot.version == version:
+            return _snapshot
+
+        # Readers may still hold the previous snapshot; its mmap closes on GC
+        _snapshot = _load_or_build(version, config.get("SNAPSHOT_DIR", ""))
+        logger.info(f"Control catalog snapshot {version}: {len(_snapshot)} controls")
+        return _snapshot
+
+
+def invalidate_catalog_snapshot(**kwargs) -> None:
+    """Force the next get_catalog_snapshot() to re-check the catalog version."""
+    global _stale
+    _stale = True
+
+
+def _load_or_build(version: str, snapshot_dir: str) -> CatalogSnapshot:
+    if snapshot_dir:
+        path = _snapshot_path(snapshot_dir, version)
+        if os.path.exists(path):
+            try:
+                return load_catalog_snapshot(path)
+            except Exception as e:
+                logger.warning(f"Control catalog snapshot {path} unreadable: {e} — rebuilding")
+
+    snapshot = build_catalog_snapshot(version)
+    if snapshot_dir:
+        try:
+            return load_catalog_snapshot(write_catalog_snapshot(snapshot, snapshot_dir))
+        except OSError as e:
+            logger.warning(f"Control catalog snapshot not persisted: {e}")
+    return snapshot
+
+
+def _get_catalog_config() -> Dict[str, Any]:
+    """Read CONTROL_CATALOG settings, tolerating use outside Django."""
+    try:
+        from django.conf import settings
+        return dict(getattr(settings, "CONTROL_CATALOG", {}))
+    except Exception:
+        return {}
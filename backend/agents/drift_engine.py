@@ -0,0 +1,198 @@
+"""
+Drift Engine — incremental, hash-based config snapshot comparison.
+
+Compares a current config snapshot against its baseline without diffing
+every resource:
+
+  1. Each resource's `config` is hashed (SHA-256 over canonical JSON).
+  2. Resource hashes are folded into a Merkle-style root per snapshot.
+  3. Equal roots -> no drift; otherwise unchanged resources are skipped by
+     an O(1) hash comparison and only changed resources are walked to
+     produce field_path-level diffs.
+
+Drift cost therefore scales with the amount of change, not with the size
+of the inventory.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp_tools.encoding import canonical_json
+
+# Cap on field-level diffs reported for a single resource
+MAX_FIELD_DIFFS_PER_RESOURCE = 50
+
+
+@dataclass
+class SnapshotIndex:
+    """Per-resource content hashes and Merkle root for a config snapshot."""
+    root_hash: str
+    resource_hashes: Dict[str, str] = field(default_factory=dict)
+    resources: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class SnapshotDiff:
+    """Result of comparing a current snapshot against its baseline."""
+    drift_events: List[Dict[str, Any]] = field(default_factory=list)
+    resources_compared: int = 0
+    resources_unchanged: int = 0
+    resources_changed: int = 0
+    resources_added: int = 0
+    resources_removed: int = 0
+
+
+def hash_config(config: Any) -> str:
+    """SHA-256 over the canonical JSON form of a resource config."""
+    return hashlib.sha256(canonical_json(config)).hexdigest()
+
+
+def build_snapshot_index(snapshot: Dict[str, Any]) -> SnapshotIndex:
+    """Hash every resource in a snapshot and compute the snapshot root hash."""
+    resource_hashes: Dict[str, str] = {}
+    resources: Dict[str, Dict[str, Any]] = {}
+
+    for resource in snapshot.get("resources", []):
+        resource_id = _unique_resource_id(resource, resources)
+        resource_hashes[resource_id] = hash_config(resource.get("config", {}))
+        resources[resource_id] = resource
+
+    root = hashlib.sha256()
+    for resource_id in sorted(resource_hashes):
+        root.update(f"{resource_id}:{resource_hashes[resource_id]}\n".encode("utf-8"))
+
+    return SnapshotIndex(
+        root_hash=root.hexdigest(),
+        resource_hashes=resource_hashes,
+        resources=resources,
+    )
+
+
+def diff_snapshots(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    baseline_index: Optional[SnapshotIndex] = None,
+    current_index: Optional[SnapshotIndex] = None,
+) -> SnapshotDiff:
+    """
+    Compare two config snapshots and return field-level drift events.
+
+    Pre-built indexes may be passed to avoid re-hashing a snapshot that is
+    compared more than once (e.g., a shared baseline).
+    """
+    baseline_index = baseline_index or build_snapshot_index(baseline)
+    current_index = current_index or build_snapshot_index(current)
+    resource_type = current.get("resource_type") or baseline.get("resource_type", "")
+
+    result = SnapshotDiff(resources_compared=len(current_index.resource_hashes))
+    if baseline_index.root_hash == current_index.root_hash:
+        result.resources_unchanged = result.resources_compared
+        return result
+
+    baseline_hashes = baseline_index.resource_hashes
+    for resource_id, current_hash in current_index.resource_hashes.items():
+        current_resource = current_index.resources[resource_id]
+        baseline_hash = baseline_hashes.get(resource_id)
+
+        if baseline_hash == current_hash:
+            result.resources_unchanged += 1
+            continue
+
+        if baseline_hash is None:
+            result.resources_added += 1
+            result.drift_events.append(_drift_event(
+                resource_id, resource_type, "resource_added",
+                None, current_resource.get("config", {}), current_resource,
+            ))
+            continue
+
+        result.resources_changed += 1
+        baseline_config = baseline_index.resources[resource_id].get("config", {})
+        for field_path, old, new in diff_values(baseline_config, current_resource.get("config", {})):
+            result.drift_events.append(_drift_event(
+                resource_id, resource_type, field_path, old, new, current_resource,
+            ))
+
+    for resource_id in baseline_hashes.keys() - current_index.resource_hashes.keys():
+        result.resources_removed += 1
+        baseline_resource = baseline_index.resources[resource_id]
+        result.drift_events.append(_drift_event(
+            resource_id, resource_type, "resource_removed",
+            baseline_resource.get("config", {}), None, baseline_resource,
+        ))
+
+    return result
+
+
+def diff_values(
+    baseline: Any,
+    current: Any,
+    path: str = "",
+    limit: int = MAX_FIELD_DIFFS_PER_RESOURCE,
+) -> List[Tuple[str, Any, Any]]:
+    """
+    Walk two JSON values and return (field_path, baseline_value, current_value)
+    for each differing leaf. Lists of equal length are compared per index;
+    otherwise the list is reported as a whole.
+    """
+    diffs: List[Tuple[str, Any, Any]] = []
+    _diff_into(baseline, current, path, diffs, limit)
+    return diffs
+
+
+def _diff_into(
+    baseline: Any,
+    current: Any,
+    path: str,
+    diffs: List[Tuple[str, Any, Any]],
+    limit: int,
+) -> None:
+    if len(diffs) >= limit or baseline == current:
+        return
+
+    if isinstance(baseline, dict) and isinstance(current, dict):
+        for key in sorted(baseline.keys() | current.keys(), key=str):
+            child = f"{path}.{key}" if path else str(key)
+            _diff_into(baseline.get(key), current.get(key), child, diffs, limit)
+        return
+
+    if isinstance(baseline, list) and isinstance(current, list) and len(baseline) == len(current):
+        for i, (old, new) in enumerate(zip(baseline, current)):
+            _diff_into(old, new, f"{path}[{i}]", diffs, limit)
+        return
+
+    diffs.append((path or "$", baseline, current))
+
+
+def _unique_resource_id(resource: Dict[str, Any], seen: Dict[str, Any]) -> str:
+    """Resource identity within a snapshot; duplicates are suffixed by occurrence."""
+    resource_id = str(resource.get("resource_id") or resource.get("provider_native_id") or "")
+    if resource_id not in seen:
+        return resource_id
+    n = 2
+    while f"{resource_id}#{n}" in seen:
+        n += 1
+    return f"{resource_id}#{n}"
+
+
+def _drift_event(
+    resource_id: str,
+    resource_type: str,
+    field_path: str,
+    baseline_value: Any,
+    current_value: Any,
+    resource: Dict[str, Any],
+) -> Dict[str, Any]:
+    return {
+        "resource_id": resource_id,
+        "resource_type": resource_type,
+        "field": field_path,
+        "field_path": field_path,
+        "baseline_value": baseline_value,
+        "current_value": current_value,
+        "changed_by": "",
+        "changed_at": resource.get("last_modified", ""),
+        "severity": "",
+        "affected_controls": [],
+    }
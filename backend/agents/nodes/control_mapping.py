@@ -8,7 +8,7 @@ with cross-framework mappings, owners, and required evidence types.
 
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from agents.state import ComplianceState
 
@@ -63,41 +63,10 @@ def control_mapping_agent(state: ComplianceState) -> ComplianceState:
 
     # Step 2: Query control catalog from DB
     try:
-        from core.models import ControlCatalog, ControlMapping
-
-        for framework in state.scope.frameworks:
-            controls = ControlCatalog.objects.filter(framework=framework)
-            if state.scope.baseline != "custom":
-                controls = controls.filter(family__in=families)
-
-            for ctrl in controls:
-                key = f"{ctrl.framework}:{ctrl.control_id}"
-                control_map[key] = {
-                    "control_id": ctrl.control_id,
-                    "framework": ctrl.framework,
-                    "title": ctrl.title,
-                    "family": ctrl.family,
-                    "description": ctrl.description[:500],
-                    "baseline_impact": ctrl.baseline_impact,
-                    "assessment_objective": ctrl.assessment_objective[:500],
-                    "cross_mappings": [],
-                    "required_evidence_types": _get_required_evidence(ctrl.family),
-                    "monitoring_frequency": _get_monitoring_frequency(ctrl.family),
-                }
-
-                # Add cross-framework mappings
-                mappings = ControlMapping.objects.filter(
-                    source_framework=ctrl.framework,
-                    source_control_id=ctrl.control_id,
-                )
-                for m in mappings:
-                    control_map[key]["cross_mappings"].append({
-                        "target_framework": m.target_framework,
-                        "target_control_id": m.target_control_id,
-                        "cci_id": m.cci_id,
-                        "srg_id": m.srg_id,
-                    })
-
+        control_map = _load_control_map(
+            frameworks=state.scope.frameworks,
+            families=families if state.scope.baseline != "custom" else None,
+        )
     except Exception as e:
         logger.warning(f"[ControlMapping] DB query failed: {e} — using RAG fallback")
         # RAG fallback: retrieve from vector store
@@ -118,6 +87,24 @@ def control_mapping_agent(state: ComplianceState) -> ComplianceState:
     return state
 
 
+def _load_control_map(frameworks: List[str], families: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    Build control_map from the process-wide catalog snapshot.
+
+    Lookups are served from memory; the database is only consulted when the
+    catalog version changes. `families=None` applies no family filter
+    (custom baselines).
+    """
+    from agents.catalog_snapshot import get_catalog_snapshot
+
+    control_map: Dict[str, Any] = {}
+    for key, ctrl in get_catalog_snapshot().iter_controls(frameworks, families):
+        ctrl["required_evidence_types"] = _get_required_evidence(ctrl["family"])
+        ctrl["monitoring_frequency"] = _get_monitoring_frequency(ctrl["family"])
+        control_map[key] = ctrl
+    return control_map
+
+
 def _get_required_evidence(family: str) -> List[str]:
     """Get required evidence types for a control family."""
     evidence_map = {
@@ -149,9 +136,9 @@ def _get_monitoring_frequency(family: str) -> str:
 def _rag_fallback_control_mapping(baseline: str, families: List[str]) -> Dict[str, Any]:
     """Fallback control mapping using RAG when DB is unavailable."""
     try:
-        from agents.rag.vector_store import VectorStoreManager
+        from agents.rag.vector_store import get_vector_store_manager
 
-        vs = VectorStoreManager()
+        vs = get_vector_store_manager()
         results = vs.similarity_search(
             query=f"NIST 800-53 controls for {baseline} baseline",
             k=50,
@@ -180,19 +167,30 @@ def _rag_fallback_control_mapping(baseline: str, families: List[str]) -> Dict[st
 
 
 def _enrich_with_rag(control_map: Dict[str, Any], system_id: str) -> Dict[str, Any]:
-    """Enrich control map with SSP statements and implementation details via RAG."""
+    """
+    Enrich control map with SSP statements and implementation details via RAG.
+
+    SSP statements are identified by metadata alone (system + control), so
+    all controls are resolved with one exact-match metadata lookup against
+    the shared store.
+    """
     try:
-        from agents.rag.vector_store import VectorStoreManager
-
-        vs = VectorStoreManager()
-        for key, ctrl in control_map.items():
-            results = vs.similarity_search(
-                query=f"SSP implementation for {ctrl['control_id']}",
-                k=2,
-                filter={"doc_type": "ssp_statement", "control_id": ctrl["control_id"]},
-            )
-            if results:
-                ctrl["ssp_narrative"] = results[0].page_content[:500]
+        from agents.rag.vector_store import get_vector_store_manager
+
+        control_ids = list(dict.fromkeys(ctrl["control_id"] for ctrl in control_map.values()))
+        if not control_ids:
+            return control_map
+
+        statements = get_vector_store_manager().get_by_metadata_many(
+            key="control_id",
+            values=control_ids,
+            filter={"doc_type": "ssp_statement", "system_id": system_id},
+            k=1,
+        )
+        for ctrl in control_map.values():
+            docs = statements.get(ctrl["control_id"])
+            if docs:
+                ctrl["ssp_narrative"] = docs[0].page_content[:500]
     except Exception as e:
         logger.debug(f"RAG enrichment skipped: {e}")
 
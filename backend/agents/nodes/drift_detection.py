@@ -10,8 +10,9 @@ baselines. Uses audit logs to attribute changes (who/when). Detects:
 
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from agents.drift_engine import SnapshotDiff, diff_snapshots
 from agents.state import ComplianceState
 
 logger = logging.getLogger(__name__)
@@ -36,6 +37,11 @@ def drift_detection_agent(state: ComplianceState, mcp_router=None) -> Compliance
     3. Diff baseline vs current
     4. Use audit logs to attribute changes
     5. Classify severity and map to affected controls
+
+    Diffing runs locally through agents.drift_engine (per-resource content
+    hashes, field-level diffs only for changed resources) whenever both
+    snapshots can be loaded from the evidence vault; otherwise the
+    compliance_core.detect_drift MCP tool is used.
     """
     logger.info(f"[DriftDetection] Starting drift analysis for {len(state.scope.providers)} providers")
 
@@ -52,6 +58,7 @@ def drift_detection_agent(state: ComplianceState, mcp_router=None) -> Compliance
     }
 
     drift_events: List[Dict[str, Any]] = []
+    diff_stats = {"local_comparisons": 0, "resources_compared": 0, "resources_changed": 0}
 
     for provider in state.scope.providers:
         provider_artifacts = [
@@ -65,16 +72,30 @@ def drift_detection_agent(state: ComplianceState, mcp_router=None) -> Compliance
 
         # In production: compare current vs baseline via MCP detect_drift tool
         if mcp_router:
+            vault = mcp_router.get_provider("compliance_core")
             try:
                 for artifact in provider_artifacts:
+                    diff = _detect_drift_locally(state.scope.system_id, provider, artifact, vault, state.run_id)
+                    if diff is not None:
+                        diff_stats["local_comparisons"] += 1
+                        diff_stats["resources_compared"] += diff.resources_compared
+                        diff_stats["resources_changed"] += (
+                            diff.resources_changed + diff.resources_added + diff.resources_removed
+                        )
+                        for event in diff.drift_events:
+                            event["provider"] = provider
+                            drift_events.append(event)
+                        continue
+
+                    # Snapshot content unavailable locally — defer to the MCP tool
                     result = mcp_router.call(
                         tool_name="compliance_core.detect_drift",
                         params={
                             "provider": provider,
                             "system_id": state.scope.system_id,
-                            "resource_type": _infer_resource_type(artifact),
+                            "resource_type": _artifact_resource_type(artifact),
                             "baseline_artifact_id": _get_baseline_artifact(
-                                state.scope.system_id, provider, artifact.get("artifact_type", "")
+                                state.scope.system_id, provider, artifact, state.run_id
                             ),
                             "current_artifact_id": artifact.get("artifact_id", ""),
                         },
@@ -109,6 +130,7 @@ def drift_detection_agent(state: ComplianceState, mcp_router=None) -> Compliance
     trace_entry["output_summary"] = {
         "total_drift_events": len(drift_events),
         "by_severity": _count_by_severity(drift_events),
+        **diff_stats,
     }
     state.agent_trace.append(trace_entry)
 
@@ -126,18 +148,87 @@ def _infer_resource_type(artifact: Dict[str, Any]) -> str:
     return "compute"
 
 
-def _get_baseline_artifact(system_id: str, provider: str, artifact_type: str) -> str:
-    """Get the last attested baseline artifact ID."""
+def _artifact_resource_type(artifact: Dict[str, Any]) -> str:
+    """Resource type the snapshot was collected for (recorded by the collector), else inferred."""
+    return artifact.get("resource_type") or _infer_resource_type(artifact)
+
+
+def _detect_drift_locally(
+    system_id: str,
+    provider: str,
+    artifact: Dict[str, Any],
+    vault,
+    run_id: str = "",
+) -> Optional[SnapshotDiff]:
+    """
+    Diff the current snapshot against its baseline with the local drift engine.
+
+    Returns None when the baseline or either snapshot cannot be loaded, so
+    the caller can fall back to the MCP detect_drift tool.
+    """
+    baseline = _get_baseline_record(system_id, provider, artifact, run_id)
+    if baseline is None:
+        return None
+
+    # Byte-identical artifacts cannot have drifted — skip loading entirely
+    if baseline["hash_sha256"] and baseline["hash_sha256"] == artifact.get("hash"):
+        return SnapshotDiff()
+
+    if vault is None or not hasattr(vault, "retrieve_json_artifact"):
+        return None
+
+    current_snapshot = vault.retrieve_json_artifact(artifact.get("storage_uri", ""))
+    baseline_snapshot = vault.retrieve_json_artifact(baseline["storage_uri"])
+    if not isinstance(current_snapshot, dict) or not isinstance(baseline_snapshot, dict):
+        return None
+
+    return diff_snapshots(baseline_snapshot, current_snapshot)
+
+
+def _get_baseline_record(
+    system_id: str,
+    provider: str,
+    artifact: Dict[str, Any],
+    run_id: str = "",
+) -> Optional[Dict[str, Any]]:
+    """
+    Get the baseline artifact (id, storage_uri, hash) for a snapshot.
+
+    Baselines are matched on resource type as well as provider and artifact
+    type, since each run stores one config snapshot per resource type. The
+    last attested baseline (tags.attested) is preferred; without one, the
+    newest snapshot from an earlier run is used. Artifacts collected in the
+    current run are never a baseline.
+    """
     try:
         from core.models import EvidenceArtifact
-        baseline = EvidenceArtifact.objects.filter(
+
+        candidates = EvidenceArtifact.objects.filter(
             system_id=system_id,
             provider=provider,
-            artifact_type=artifact_type,
-        ).order_by("-collected_at").first()
-        return str(baseline.id) if baseline else ""
+            artifact_type=artifact.get("artifact_type", ""),
+            tags__resource_type=_artifact_resource_type(artifact),
+        )
+        if run_id:
+            # has_key keeps rows without a run_id tag (a NULL comparison would drop them)
+            candidates = candidates.exclude(tags__has_key="run_id", tags__run_id=run_id)
+        candidates = candidates.order_by("-collected_at").only("id", "storage_uri", "hash_sha256")
+        baseline = candidates.filter(tags__attested=True).first() or candidates.first()
     except Exception:
-        return ""
+        return None
+    if baseline is None:
+        return None
+    return {
+        "artifact_id": str(baseline.id),
+        "storage_uri": baseline.storage_uri,
+        "hash_sha256": baseline.hash_sha256,
+    }
+
+
+def _get_baseline_artifact(system_id: str, provider: str, artifact: Dict[str, Any], run_id: str = "") -> str:
+    """Get the baseline artifact ID for a snapshot (see _get_baseline_record)."""
+    baseline = _get_baseline_record(system_id, provider, artifact, run_id)
+    return baseline["artifact_id"] if baseline else ""
 
 
 def _classify_severity(event: Dict[str, Any]) -> str:
@@ -8,13 +8,21 @@ hashes and metadata. Multi-cloud aware.
 
 import json
 import logging
-from datetime import datetime, timezone
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 from agents.state import ComplianceState
+from mcp_tools.router import MCPCallResult
 
 logger = logging.getLogger(__name__)
 
+# Fallback when settings.MCP_ROUTER is unavailable (e.g., outside Django)
+DEFAULT_MAX_CONCURRENT_CALLS = 10
+
+# Artifacts per store_evidence_artifacts_batch call
+STORE_BATCH_SIZE = 50
+
 
 def evidence_collector(state: ComplianceState, mcp_router=None) -> ComplianceState:
     """
@@ -24,6 +32,16 @@ def evidence_collector(state: ComplianceState, mcp_router=None) -> ComplianceSta
     1. Call the appropriate MCP tool via the router
     2. Store the result as an evidence artifact in the vault
     3. Record artifact metadata in state
+
+    Identical calls (same tool + canonicalized params) requested by several
+    controls are coalesced so each runs once; the resulting artifact carries
+    the union of the requesting controls' IDs.
+
+    MCP calls are fanned out over a thread pool capped by
+    MCP_ROUTER.MAX_CONCURRENT_CALLS; results are applied to state in
+    plan order regardless of completion order. Once the wave completes,
+    results are written to the vault through batched
+    store_evidence_artifacts_batch calls.
     """
     logger.info(f"[EvidenceCollector] Starting evidence collection for run {state.run_id}")
 
@@ -39,78 +57,63 @@ def evidence_collector(state: ComplianceState, mcp_router=None) -> ComplianceSta
     collected_count = 0
     error_count = 0
 
-    for plan_key, plan_entry in state.evidence_plan.items():
-        for source in plan_entry.get("sources", []):
-            if source.get("evidence_type") in plan_entry.get("existing_fresh", []):
-                continue  # Skip — fresh evidence already exists
+    planned_tasks = _build_collection_tasks(state)
+    tasks = _coalesce_tasks(planned_tasks)
 
-            tool_name = source.get("mcp_tool", "")
-            provider = source.get("provider", "")
-            evidence_type = source.get("evidence_type", "")
-            control_id = plan_entry.get("control_id", "")
+    if mcp_router:
+        # Fan the MCP calls out across a bounded pool, then fold the outcomes
+        # back into state in plan order so artifact ordering stays deterministic.
+        outcomes = _run_collection_tasks(tasks, state, mcp_router)
 
-            if not tool_name:
-                continue
-
-            # Build MCP tool parameters
-            params = _build_tool_params(
-                tool_name=tool_name,
-                provider=provider,
-                system_id=state.scope.system_id,
-                scope=state.scope.boundary,
-                control_id=control_id,
-            )
+        # Store all successful results in batched vault writes at the end of the wave
+        artifact_records = iter(_store_evidence_batch(
+            mcp_router=mcp_router,
+            run_id=state.run_id,
+            system_id=state.scope.system_id,
+            collected=[
+                (task, result)
+                for task, (result, error) in zip(tasks, outcomes)
+                if error is None
+            ],
+        ))
 
-            if mcp_router:
-                try:
-                    result = mcp_router.call(
-                        tool_name=tool_name,
-                        params=params,
-                        run_id=state.run_id,
-                        agent_id="evidence_collector_agent",
-                    )
-
-                    # Store result as evidence artifact
-                    artifact_record = _store_evidence(
-                        mcp_router=mcp_router,
-                        system_id=state.scope.system_id,
-                        evidence_type=evidence_type,
-                        provider=provider,
-                        control_id=control_id,
-                        result=result,
-                    )
-
-                    if artifact_record:
-                        state.evidence_artifacts.append(artifact_record)
-                        collected_count += 1
-
-                except Exception as e:
-                    logger.error(
-                        f"[EvidenceCollector] MCP call failed: {tool_name} "
-                        f"provider={provider}: {e}"
-                    )
-                    error_count += 1
-                    state.errors.append({
-                        "agent": "evidence_collector_agent",
-                        "error": f"MCP call {tool_name} failed for {provider}: {str(e)[:200]}",
-                    })
-            else:
-                # Stub mode: record what would have been collected
-                state.evidence_artifacts.append({
-                    "artifact_id": f"stub-{plan_key}-{provider}",
-                    "artifact_type": evidence_type,
-                    "provider": provider,
-                    "hash": "",
-                    "storage_uri": "",
-                    "control_ids": [control_id] if control_id != "__asset_inventory" else [],
-                    "collected_at": datetime.now(timezone.utc).isoformat(),
-                    "stub": True,
+        for task, (_, error) in zip(tasks, outcomes):
+            if error is not None:
+                logger.error(
+                    f"[EvidenceCollector] MCP call failed: {task['tool_name']} "
+                    f"provider={task['provider']}: {error}"
+                )
+                error_count += 1
+                state.errors.append({
+                    "agent": "evidence_collector_agent",
+                    "error": (
+                        f"MCP call {task['tool_name']} failed for {task['provider']}: "
+                        f"{str(error)[:200]}"
+                    ),
                 })
+            else:
+                state.evidence_artifacts.append(next(artifact_records))
                 collected_count += 1
+    else:
+        for task in tasks:
+            # Stub mode: record what would have been collected
+            state.evidence_artifacts.append({
+                "artifact_id": f"stub-{task['plan_keys'][0]}-{task['provider']}",
+                "artifact_type": task["evidence_type"],
+                "provider": task["provider"],
+                "hash": "",
+                "storage_uri": "",
+                "control_ids": list(task["control_ids"]),
+                "collected_at": datetime.now(timezone.utc).isoformat(),
+                "stub": True,
+            })
+            collected_count += 1
 
     trace_entry["output_summary"] = {
         "collected": collected_count,
         "errors": error_count,
+        "planned_calls": len(planned_tasks),
+        "deduplicated_calls": len(planned_tasks) - len(tasks),
         "total_artifacts": len(state.evidence_artifacts),
     }
     state.agent_trace.append(trace_entry)
@@ -122,14 +125,140 @@ def evidence_collector(state: ComplianceState, mcp_router=None) -> ComplianceSta
     return state
 
 
+def _build_collection_tasks(state: ComplianceState) -> List[Dict[str, Any]]:
+    """Flatten the evidence plan into an ordered list of MCP collection tasks."""
+    tasks: List[Dict[str, Any]] = []
+    # One timestamp per run so time-windowed params coalesce across controls
+    as_of = datetime.now(timezone.utc)
+    for plan_key, plan_entry in state.evidence_plan.items():
+        for source in plan_entry.get("sources", []):
+            if source.get("evidence_type") in plan_entry.get("existing_fresh", []):
+                continue  # Skip — fresh evidence already exists
+
+            tool_name = source.get("mcp_tool", "")
+            if not tool_name:
+                continue
+
+            provider = source.get("provider", "")
+            control_id = plan_entry.get("control_id", "")
+            tasks.append({
+                "plan_key": plan_key,
+                "tool_name": tool_name,
+                "provider": provider,
+                "evidence_type": source.get("evidence_type", ""),
+                "control_id": control_id,
+                "params": _build_tool_params(
+                    tool_name=tool_name,
+                    provider=provider,
+                    system_id=state.scope.system_id,
+                    scope=state.scope.boundary,
+                    control_id=control_id,
+                    as_of=as_of,
+                ),
+            })
+    return tasks
+
+
+def _coalesce_tasks(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Merge tasks that would issue the same MCP call.
+
+    Tasks are keyed on (tool_name, canonicalized params). Each distinct call
+    keeps the position of its first occurrence and accumulates the plan keys
+    and control IDs of every task folded into it.
+    """
+    coalesced: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for task in tasks:
+        key = (task["tool_name"], _canonical_params(task["params"]))
+        merged = coalesced.get(key)
+        if merged is None:
+            merged = {
+                "plan_keys": [],
+                "tool_name": task["tool_name"],
+                "provider": task["provider"],
+                "evidence_type": task["evidence_type"],
+                "control_ids": [],
+                "params": task["params"],
+            }
+            coalesced[key] = merged
+
+        merged["plan_keys"].append(task["plan_key"])
+        control_id = task["control_id"]
+        if control_id != "__asset_inventory" and control_id not in merged["control_ids"]:
+            merged["control_ids"].append(control_id)
+
+    return list(coalesced.values())
+
+
+def _canonical_params(params: Dict[str, Any]) -> str:
+    """Stable string form of tool params for call coalescing."""
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _run_collection_tasks(
+    tasks: List[Dict[str, Any]],
+    state: ComplianceState,
+    mcp_router,
+) -> List[Tuple[Optional[MCPCallResult], Optional[Exception]]]:
+    """
+    Execute collection tasks concurrently, bounded by MCP_ROUTER.MAX_CONCURRENT_CALLS.
+
+    Returns one (result, error) tuple per task, in task order.
+    """
+    if not tasks:
+        return []
+
+    max_workers = min(_get_max_concurrent_calls(), len(tasks))
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="evidence-collector"
+    ) as pool:
+        futures = [
+            pool.submit(_collect_one, task, state.run_id, state.scope.system_id, mcp_router)
+            for task in tasks
+        ]
+        return [f.result() for f in futures]
+
+
+def _collect_one(
+    task: Dict[str, Any],
+    run_id: str,
+    system_id: str,
+    mcp_router,
+) -> Tuple[Optional[MCPCallResult], Optional[Exception]]:
+    """Run a single MCP collection call; the result keeps the output's encoding for storage."""
+    try:
+        result = mcp_router.call_encoded(
+            tool_name=task["tool_name"],
+            params=task["params"],
+            run_id=run_id,
+            agent_id="evidence_collector_agent",
+        )
+    except Exception as e:
+        return None, e
+    return result, None
+
+
+def _get_max_concurrent_calls() -> int:
+    """Read the MCP fan-out limit from settings, falling back to the default."""
+    try:
+        from django.conf import settings
+
+        limit = int(settings.MCP_ROUTER.get("MAX_CONCURRENT_CALLS", DEFAULT_MAX_CONCURRENT_CALLS))
+    except Exception:
+        limit = DEFAULT_MAX_CONCURRENT_CALLS
+    return max(1, limit)
+
+
 def _build_tool_params(
     tool_name: str,
     provider: str,
     system_id: str,
     scope: Dict[str, Any],
     control_id: str,
+    as_of: Optional[datetime] = None,
 ) -> Dict[str, Any]:
     """Build MCP tool parameters based on tool name and context."""
+    now = as_of or datetime.now(timezone.utc)
     base_params = {
         "provider": provider,
         "system_id": system_id,
@@ -137,7 +266,7 @@ def _build_tool_params(
     }
 
     if "get_asset_inventory" in tool_name:
-        base_params["time"] = {"as_of": datetime.now(timezone.utc).isoformat()}
+        base_params["time"] = {"as_of": now.isoformat()}
 
     elif "get_config_snapshot" in tool_name:
         # Determine resource type from control family
@@ -153,8 +282,6 @@ def _build_tool_params(
         base_params["resource_type"] = resource_type_map.get(family, "compute")
 
     elif "query_audit_logs" in tool_name:
-        from datetime import timedelta
-        now = datetime.now(timezone.utc)
         base_params["query"] = {"event_types": []}
         base_params["time_range"] = {
             "start": (now - timedelta(days=7)).isoformat(),
@@ -164,50 +291,77 @@ def _build_tool_params(
     return base_params
 
 
-def _store_evidence(
+def _store_evidence_batch(
     mcp_router,
+    run_id: str,
     system_id: str,
-    evidence_type: str,
-    provider: str,
-    control_id: str,
-    result: Dict[str, Any],
-) -> Dict[str, Any]:
-    """Store MCP tool result as an evidence artifact via the vault."""
-    try:
-        store_result = mcp_router.call(
-            tool_name="compliance_core.store_evidence_artifact",
-            params={
-                "system_id": system_id,
-                "artifact_type": evidence_type,
-                "content_uri": "inline",  # In production: upload to object storage first
-                "tags": {
-                    "control_ids": [control_id] if control_id != "__asset_inventory" else [],
-                    "provider": provider,
-                    "environment": "production",
+    collected: List[Tuple[Dict[str, Any], MCPCallResult]],
+) -> List[Dict[str, Any]]:
+    """
+    Store collected MCP results as evidence artifacts via the vault's batch tool.
+
+    Returns one artifact record per (task, result) pair, in order. Items
+    that fail to store still get a record carrying the error.
+    """
+    records: List[Dict[str, Any]] = []
+    for start in range(0, len(collected), STORE_BATCH_SIZE):
+        chunk = collected[start:start + STORE_BATCH_SIZE]
+        try:
+            store_result = mcp_router.call(
+                tool_name="compliance_core.store_evidence_artifacts_batch",
+                params={
+                    "system_id": system_id,
+                    "items": [
+                        {
+                            "system_id": system_id,
+                            "artifact_type": task["evidence_type"],
+                            "content_uri": "inline",
+                            "content": result.output,
+                            "encoded": result.encoded,
+                            "tags": {
+                                "control_ids": list(task["control_ids"]),
+                                "provider": task["provider"],
+                                "environment": "production",
+                                "run_id": run_id,
+                                **_resource_type_tag(task),
+                            },
+                        }
+                        for task, result in chunk
+                    ],
                 },
-            },
-            run_id="",
-            agent_id="evidence_collector_agent",
-        )
+                run_id=run_id,
+                agent_id="evidence_collector_agent",
+            )
+            item_results = {r.get("index"): r for r in store_result.get("results", [])}
+        except Exception as e:
+            logger.error(f"Evidence batch storage failed: {e}")
+            item_results = {i: {"success": False, "error": str(e)} for i in range(len(chunk))}
 
-        return {
-            "artifact_id": store_result.get("artifact_id", ""),
-            "artifact_type": evidence_type,
-            "provider": provider,
-            "hash": store_result.get("hash_sha256", ""),
-            "storage_uri": store_result.get("storage_uri", ""),
-            "control_ids": [control_id] if control_id != "__asset_inventory" else [],
-            "collected_at": datetime.now(timezone.utc).isoformat(),
-        }
-    except Exception as e:
-        logger.error(f"Evidence storage failed: {e}")
-        return {
-            "artifact_id": "",
-            "artifact_type": evidence_type,
-            "provider": provider,
-            "hash": "",
-            "storage_uri": "",
-            "control_ids": [control_id] if control_id != "__asset_inventory" else [],
-            "collected_at": datetime.now(timezone.utc).isoformat(),
-            "error": str(e),
-        }
+        for i, (task, _) in enumerate(chunk):
+            item = item_results.get(i) or {"success": False, "error": "No result returned for item"}
+            records.append(_artifact_record(task, item))
+    return records
+
+
+def _resource_type_tag(task: Dict[str, Any]) -> Dict[str, str]:
+    """Config snapshots are per resource type; drift detection keys baselines on it."""
+    resource_type = task["params"].get("resource_type", "")
+    return {"resource_type": resource_type} if resource_type else {}
+
+
+def _artifact_record(task: Dict[str, Any], store_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the state artifact record for a stored (or failed) collection task."""
+    record = {
+        "artifact_id": store_result.get("artifact_id", ""),
+        "artifact_type": task["evidence_type"],
+        "provider": task["provider"],
+        "hash": store_result.get("hash_sha256", ""),
+        "storage_uri": store_result.get("storage_uri", ""),
+        "control_ids": list(task["control_ids"]),
+        "collected_at": datetime.now(timezone.utc).isoformat(),
+        **_resource_type_tag(task),
+    }
+    if not store_result.get("success", False):
+        logger.error(f"Evidence storage failed: {store_result.get('error', '')}")
+        record["error"] = store_result.get("error", "")
+    return record
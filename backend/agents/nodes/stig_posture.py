@@ -70,8 +70,9 @@ def stig_posture_agent(state: ComplianceState, mcp_router=None) -> ComplianceSta
 
                 for finding in result.get("findings", []):
                     finding["asset_id"] = artifact.get("asset_id", "unknown")
-                    finding["stig_name"] = result.get("stig_name", "")
-                    finding["stig_version"] = result.get("stig_version", "")
+                    # Multi-STIG checklists tag each finding with its own STIG
+                    finding["stig_name"] = finding.get("stig_name") or result.get("stig_name", "")
+                    finding["stig_version"] = finding.get("stig_version") or result.get("stig_version", "")
                     stig_findings.append(finding)
 
             except Exception as e:
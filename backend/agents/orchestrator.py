@@ -37,27 +37,32 @@ from agents.nodes.remediation import remediation_agent
 from agents.nodes.reporting import reporting_agent
 
 # MCP Router
+from mcp_tools.audit import build_audit_sink
+from mcp_tools.cache import DEFAULT_CACHE_TTLS, get_result_cache
+from mcp_tools.rate_limit import get_rate_limiter
 from mcp_tools.router import MCPRouter, MCPPolicy
 
 logger = logging.getLogger(__name__)
 
 
-def build_compliance_graph():
+def build_compliance_graph(mcp_router: Optional[MCPRouter] = None):
     """
     Build the LangGraph state graph for the compliance workflow.
 
     Returns a compiled LangGraph application that can be invoked with
-    ComplianceState or streamed for real-time updates.
+    ComplianceState or streamed for real-time updates. The caller owns
+    `mcp_router` and should close() it when done (see run_compliance_check);
+    one is created if not given.
     """
+    # MCP router shared across nodes
+    mcp_router = mcp_router or _create_mcp_router()
+
     try:
         from langgraph.graph import StateGraph, END
 
         # Create the state graph
         graph = StateGraph(ComplianceState)
 
-        # Initialize MCP router (shared across nodes)
-        mcp_router = _create_mcp_router()
-
         # Add nodes
         graph.add_node("scope_resolver", scope_resolver)
         graph.add_node("control_mapping", control_mapping_agent)
@@ -106,16 +111,32 @@ def build_compliance_graph():
         logger.warning(
             "langgraph not installed — returning sequential executor fallback"
         )
-        return SequentialExecutor(mcp_router=_create_mcp_router())
+        return SequentialExecutor(mcp_router=mcp_router)
 
 
 def _create_mcp_router() -> MCPRouter:
     """Create and configure the MCP router with default policy."""
+    router_config = _get_router_config()
+    # Shared by every run in this process; the router itself is per run
+    result_cache = get_result_cache(router_config)
+
     policy = MCPPolicy(
         tenant_id="default",
         audit_all_calls=True,
+        cache_ttls=dict(DEFAULT_CACHE_TTLS) if result_cache else {},
+    )
+    # Shared by every run in this process so buckets stay per tenant/provider/agent
+    rate_limiter = get_rate_limiter(
+        router_config,
+        calls_per_minute=policy.max_calls_per_minute,
+        burst=policy.rate_limit_burst,
+    )
+    router = MCPRouter(
+        policy=policy,
+        result_cache=result_cache,
+        rate_limiter=rate_limiter,
+        audit_sink=build_audit_sink(router_config),
     )
-    router = MCPRouter(policy=policy)
 
     # Register provider implementations
     try:
@@ -126,7 +147,7 @@ def _create_mcp_router() -> MCPRouter:
         from mcp_tools.ticketing import TicketingTools
         from mcp_tools.evidence_vault import EvidenceVault
 
-        vault = EvidenceVault()
+        vault = EvidenceVault(**_get_vault_kwargs())
         router.register_provider("aws", AWSProvider("aws"))
         router.register_provider("aws_gov", AWSProvider("aws_gov"))
         router.register_provider("azure", AzureProvider("azure"))
@@ -143,6 +164,33 @@ def _create_mcp_router() -> MCPRouter:
     return router
 
 
+def _get_router_config() -> Dict[str, Any]:
+    """Read MCP_ROUTER settings, tolerating use outside Django."""
+    try:
+        from django.conf import settings
+        return dict(getattr(settings, "MCP_ROUTER", {}))
+    except Exception:
+        return {}
+
+
+def _get_vault_kwargs() -> Dict[str, Any]:
+    """Map EVIDENCE_VAULT settings to EvidenceVault arguments (defaults outside Django)."""
+    try:
+        from django.conf import settings
+        config = dict(getattr(settings, "EVIDENCE_VAULT", {}))
+    except Exception:
+        return {}
+    keys = {
+        "ENDPOINT": "endpoint",
+        "ACCESS_KEY": "access_key",
+        "SECRET_KEY": "secret_key",
+        "BUCKET": "bucket",
+        "SECURE": "secure",
+        "COMPRESSION": "compression",
+    }
+    return {arg: config[key] for key, arg in keys.items() if key in config}
+
+
 def persist_and_notify(state: ComplianceState) -> ComplianceState:
     """
     Node 11: Persist results to DB and send notifications.
@@ -268,9 +316,14 @@ def run_compliance_check(
         status="pending",
     )
 
-    # Try LangGraph first, fall back to sequential
-    graph = build_compliance_graph()
-    result = graph.invoke(initial_state)
+    # Try LangGraph first, fall back to sequential. Closing the router
+    # flushes the run's audit records and stops the sink's writer thread.
+    mcp_router = _create_mcp_router()
+    try:
+        graph = build_compliance_graph(mcp_router)
+        result = graph.invoke(initial_state)
+    finally:
+        mcp_router.close()
 
     logger.info(
         f"Compliance check complete: run_id={run_id}, "
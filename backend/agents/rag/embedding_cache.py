@@ -0,0 +1,257 @@
+"""
+Query Embedding Cache — persistent cache for query-string embeddings.
+
+Retriever queries are templated ("What does control AC-2 require?") and
+repeat across runs and systems, so their embeddings are cached persistently
+keyed on (model, dimensions, normalized text):
+
+  - SQLiteEmbeddingCache: local disk (stdlib sqlite3), shared by the
+    processes on one host
+  - DjangoEmbeddingCache: Postgres via core.models.QueryEmbedding, shared
+    by every worker
+
+Both evict least-recently-used entries beyond `max_entries` and keep
+hit/miss counters. Only query embeddings are cached; document embeddings
+produced during indexing pass straight through.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Evict after this many writes rather than on every write
+EVICTION_CHECK_INTERVAL = 100
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace so trivially different query strings share an entry."""
+    return " ".join(text.split())
+
+
+def make_embedding_key(model: str, dimensions: int, text: str) -> str:
+    return hashlib.sha256(f"{model}|{dimensions}|{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """Base interface for query embedding caches."""
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._stats_lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the keys that are present."""
+        found = self._get_many(keys)
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, entries: Dict[str, List[float]]) -> None:
+        if not entries:
+            return
+        self._set_many(entries)
+        with self._stats_lock:
+            self._writes += len(entries)
+            evict = self._writes >= EVICTION_CHECK_INTERVAL
+            if evict:
+                self._writes = 0
+        if evict:
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        raise NotImplementedError
+
+    def _set_many(self, entries: Dict[str, List[float]]) -> None:
+        raise NotImplementedError
+
+    def _evict(self) -> None:
+        raise NotImplementedError
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    """Embedding cache in a local SQLite file (WAL mode, safe across processes)."""
+
+    def __init__(self, path: str = "embedding_cache.sqlite3", max_entries: int = 100_000):
+        super().__init__(max_entries=max_entries)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embedding ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS query_embedding_last_used ON query_embedding (last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: opened lazily after fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        conn = self._connect()
+        placeholders = ",".join("?" * len(keys))
+        rows = conn.execute(
+            f"SELECT key, vector FROM query_embedding WHERE key IN ({placeholders})", keys
+        ).fetchall()
+        if rows:
+            with conn:
+                conn.executemany(
+                    "UPDATE query_embedding SET last_used = ? WHERE key = ?",
+                    [(time.time(), key) for key, _ in rows],
+                )
+        return {key: _unpack(blob) for key, blob in rows}
+
+    def _set_many(self, entries: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO query_embedding (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, _pack(vector), now) for key, vector in entries.items()],
+            )
+
+    def _evict(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM query_embedding WHERE key IN ("
+                " SELECT key FROM query_embedding ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class DjangoEmbeddingCache(EmbeddingCache):
+    """Embedding cache in Postgres via core.models.QueryEmbedding."""
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        from django.utils import timezone
+
+        from core.models import QueryEmbedding
+
+        rows = list(QueryEmbedding.objects.filter(key__in=keys).values_list("key", "vector"))
+        if rows:
+            QueryEmbedding.objects.filter(key__in=[key for key, _ in rows]).update(
+                last_used_at=timezone.now()
+            )
+        return {key: _unpack(bytes(blob)) for key, blob in rows}
+
+    def _set_many(self, entries: Dict[str, List[float]]) -> None:
+        from django.utils import timezone
+
+        from core.models import QueryEmbedding
+
+        now = timezone.now()
+        QueryEmbedding.objects.bulk_create(
+            [QueryEmbedding(key=key, vector=_pack(vector), last_used_at=now) for key, vector in entries.items()],
+            ignore_conflicts=True,
+        )
+
+    def _evict(self) -> None:
+        from core.models import QueryEmbedding
+
+        cutoff = (
+            QueryEmbedding.objects.order_by("-last_used_at")
+            .values_list("last_used_at", flat=True)[self.max_entries:self.max_entries + 1]
+        )
+        cutoff = list(cutoff)
+        if cutoff:
+            QueryEmbedding.objects.filter(last_used_at__lte=cutoff[0]).delete()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves query embeddings from an EmbeddingCache.
+
+    embed_query / embed_queries consult the cache; embed_documents (used when
+    indexing) always goes to the underlying model.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str, dimensions: int):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed query strings, calling the model once for all cache misses."""
+        keys = [make_embedding_key(self.model, self.dimensions, text) for text in texts]
+        try:
+            cached = self.cache.get_many(list(dict.fromkeys(keys)))
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            cached = {}
+
+        missing = {key: normalize_query(text) for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            try:
+                self.cache.set_many(fresh)
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+
+def build_embedding_cache(config: Dict[str, Any]) -> Optional[EmbeddingCache]:
+    """
+    Build a query embedding cache from VECTOR_DB settings.
+
+    EMBEDDING_CACHE: none | sqlite | django
+    """
+    backend = config.get("EMBEDDING_CACHE", "none")
+    max_entries = config.get("EMBEDDING_CACHE_MAX_ENTRIES", 100_000)
+    if backend == "sqlite":
+        return SQLiteEmbeddingCache(
+            path=config.get("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3"),
+            max_entries=max_entries,
+        )
+    if backend == "django":
+        return DjangoEmbeddingCache(max_entries=max_entries)
+    return None
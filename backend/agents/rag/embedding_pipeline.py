@@ -0,0 +1,226 @@
+"""
+Embedding Pipeline — batched, concurrent embed-and-write stage for indexing.
+
+ComplianceIndexer hands its new/changed chunks (with stable IDs) to this
+pipeline instead of a single add_documents call:
+
+  - chunks are grouped into batches bounded by count (EMBED_BATCH_SIZE)
+    and text size (EMBED_BATCH_MAX_CHARS)
+  - up to EMBED_CONCURRENCY batches are embedded in flight at once; failed
+    calls are retried with exponential backoff and jitter
+  - each embedded batch is written as one bulk upsert (COPY into a staging
+    table on pgvector), in the calling thread
+  - for backends that cannot list indexed IDs, written chunk IDs are
+    appended to a checkpoint file, so an interrupted ingest resumes with
+    the remaining batches instead of starting over. Checkpoints left by
+    jobs that never finished are removed after CHECKPOINT_MAX_AGE_SECONDS.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IndexCheckpoint:
+    """
+    Append-only record of the chunk IDs one ingest job has written.
+
+    Writes are flushed but not fsynced: losing the tail on a crash only
+    re-embeds those batches, and the upsert by stable ID is idempotent.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+            logger.info(f"Resuming ingest from checkpoint {path}: {len(self.done)} chunks already written")
+
+    def record(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{chunk_id}\n" for chunk_id in ids))
+        self.done.update(ids)
+
+    def complete(self) -> None:
+        """The job finished; a rerun of the same input starts clean."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def build_checkpoint(
+    directory: str,
+    doc_type: str,
+    ids: List[str],
+    max_age_seconds: float = 7 * 24 * 3600,
+) -> Optional[IndexCheckpoint]:
+    """
+    Checkpoint keyed by the job's input (doc_type + the full chunk ID set of
+    the window, so a rerun after a partial ingest finds it); None if disabled.
+    """
+    if not directory or not ids:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    prune_checkpoints(directory, max_age_seconds)
+    digest = hashlib.sha256("\n".join([doc_type, *sorted(ids)]).encode("utf-8")).hexdigest()[:16]
+    return IndexCheckpoint(os.path.join(directory, f"{doc_type}-{digest}.ckpt"))
+
+
+def prune_checkpoints(directory: str, max_age_seconds: float) -> int:
+    """Delete checkpoint files not written to for `max_age_seconds`; returns the count."""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(".ckpt"):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    if removed:
+        logger.info(f"Removed {removed} stale index checkpoints from {directory}")
+    return removed
+
+
+class EmbeddingPipeline:
+    """Embeds documents in bounded concurrent batches and bulk-writes them."""
+
+    def __init__(
+        self,
+        vector_store,
+        batch_size: int = 256,
+        max_batch_chars: int = 400_000,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+    ):
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def write(
+        self,
+        documents: List[Any],
+        ids: List[str],
+        checkpoint: Optional[IndexCheckpoint] = None,
+    ) -> int:
+        """
+        Embed and upsert `documents` under `ids`. Batches already recorded in
+        `checkpoint` are skipped. Returns the number of chunks written.
+        """
+        pending = [
+            (chunk_id, doc) for chunk_id, doc in zip(ids, documents)
+            if checkpoint is None or chunk_id not in checkpoint.done
+        ]
+        if not pending:
+            return 0
+
+        batches = self._batches(pending)
+        written = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embed") as pool:
+            in_flight = {}
+            for batch in _take(batches, self.concurrency):
+                in_flight[pool.submit(self._embed, [doc.page_content for _, doc in batch])] = batch
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = in_flight.pop(future)
+                    vectors = future.result()
+                    # Refill before writing so embedding overlaps the database write
+                    for next_batch in _take(batches, 1):
+                        in_flight[pool.submit(self._embed, [doc.page_content for _, doc in next_batch])] = next_batch
+                    self.vector_store.upsert_embeddings(
+                        texts=[doc.page_content for _, doc in batch],
+                        embeddings=vectors,
+                        metadatas=[doc.metadata for _, doc in batch],
+                        ids=[chunk_id for chunk_id, _ in batch],
+                    )
+                    if checkpoint is not None:
+                        checkpoint.record(chunk_id for chunk_id, _ in batch)
+                    written += len(batch)
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"[EmbeddingPipeline] {written} chunks embedded and written in {elapsed:.1f}s "
+            f"({written / elapsed if elapsed else 0:.0f} chunks/s)"
+        )
+        return written
+
+    def _batches(self, items: List[Tuple[str, Any]]) -> Iterator[List[Tuple[str, Any]]]:
+        batch: List[Tuple[str, Any]] = []
+        chars = 0
+        for item in items:
+            size = len(item[1].page_content)
+            if batch and (len(batch) >= self.batch_size or chars + size > self.max_batch_chars):
+                yield batch
+                batch, chars = [], 0
+            batch.append(item)
+            chars += size
+        if batch:
+            yield batch
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.vector_store.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(
+                    f"Embedding batch of {len(texts)} failed ({e}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+        return []
+
+
+def _take(iterator: Iterator[Any], n: int) -> List[Any]:
+    items = []
+    for item in iterator:
+        items.append(item)
+        if len(items) >= n:
+            break
+    return items
+
+
+def build_embedding_pipeline(vector_store, config: Optional[Dict[str, Any]] = None) -> EmbeddingPipeline:
+    """Build an EmbeddingPipeline from INDEXING settings."""
+    config = config if config is not None else get_indexing_config()
+    return EmbeddingPipeline(
+        vector_store,
+        batch_size=config.get("EMBED_BATCH_SIZE", 256),
+        max_batch_chars=config.get("EMBED_BATCH_MAX_CHARS", 400_000),
+        concurrency=config.get("EMBED_CONCURRENCY", 4),
+        max_retries=config.get("EMBED_MAX_RETRIES", 5),
+        backoff_seconds=config.get("EMBED_BACKOFF_SECONDS", 1.0),
+    )
+
+
+def get_indexing_config() -> Dict[str, Any]:
+    """Read INDEXING settings, tolerating use outside Django."""
+    try:
+        from django.conf import settings
+        return dict(getattr(settings, "INDEXING", {}))
+    except Exception:
+        return {}
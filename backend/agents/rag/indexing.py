@@ -8,13 +8,32 @@ Processes and indexes:
   - STIG benchmarks (check content, fix text, CCI mappings)
   - Organizational policies and procedures
   - Evidence artifact metadata and summaries
+
+Indexing is incremental and idempotent. Every chunk gets a stable ID
+derived from (doc_type, source_id, section, chunk hash); on re-index,
+unchanged chunks are skipped, new or changed chunks are added and chunks
+no longer produced for a source are deleted. With prune=True the input is
+treated as the complete set for its scope (e.g., one STIG benchmark or one
+system's SSP), so sources missing from it are deleted as well.
+
+Inputs may be any iterable (e.g. a lazy XCCDF/OSCAL parser) and are
+processed in bounded windows. Large windows are chunked in a process pool;
+new chunks go through the EmbeddingPipeline (batched concurrent embedding,
+bulk upsert, checkpoint).
 """
 
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from langchain.schema import Document
 
+from agents.rag.embedding_pipeline import build_checkpoint, build_embedding_pipeline, get_indexing_config
+from mcp_tools.encoding import canonical_json
+
 logger = logging.getLogger(__name__)
 
 # Chunking configuration per document type
@@ -28,6 +47,44 @@ CHUNK_CONFIGS = {
 }
 
 
+def chunk_hash(document: Document) -> str:
+    """Hash of a chunk's text and metadata; changes whenever either does."""
+    digest = hashlib.sha256(document.page_content.encode("utf-8"))
+    digest.update(canonical_json(document.metadata))
+    return digest.hexdigest()
+
+
+def make_chunk_id(document: Document) -> str:
+    """Stable chunk ID from (doc_type, source_id, section, chunk hash)."""
+    metadata = document.metadata
+    key = "|".join([
+        metadata.get("doc_type", ""),
+        metadata.get("source_id", ""),
+        metadata.get("section", ""),
+        chunk_hash(document),
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _split_documents(args: Tuple[Dict[str, Any], List[Document]]) -> List[Document]:
+    """Chunk documents with one chunk config (module-level so process pools can pickle it)."""
+    config, documents = args
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        logger.warning("langchain text splitter not available — returning unchunked documents")
+        return documents
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=config["chunk_size"],
+        chunk_overlap=config["chunk_overlap"],
+        separators=[config["separator"], "\n", " "],
+        # Chunk offset in metadata: exact-match lookups return a source's chunks in order
+        add_start_index=True,
+    )
+    return splitter.split_documents(documents)
+
+
 class ComplianceIndexer:
     """
     Indexing pipeline for compliance knowledge base.
@@ -37,196 +94,343 @@ class ComplianceIndexer:
     generates embeddings, and stores in the vector database.
     """
 
-    def __init__(self, vector_store_manager):
+    def __init__(self, vector_store_manager, config: Optional[Dict[str, Any]] = None):
         self.vector_store = vector_store_manager
+        self.config = config if config is not None else get_indexing_config()
+        self.pipeline = build_embedding_pipeline(vector_store_manager, self.config)
 
-    def index_nist_controls(self, controls: List[Dict[str, Any]]) -> int:
+    def index_nist_controls(self, controls: Iterable[Dict[str, Any]], prune: bool = False) -> int:
         """
         Index NIST 800-53 Rev 5 controls into the vector store.
 
         Each control becomes one or more documents with metadata:
           - framework, control_id, family, baseline_impact
           - Separate chunks for description, assessment_objective, implementation_guidance
-        """
-        documents = []
-        for ctrl in controls:
-            base_metadata = {
-                "doc_type": "nist_control",
-                "framework": ctrl.get("framework", "nist_800_53_r5"),
-                "control_id": ctrl.get("control_id", ""),
-                "family": ctrl.get("family", ""),
-                "baseline_impact": ",".join(ctrl.get("baseline_impact", [])),
-            }
-
-            # Description chunk
-            if ctrl.get("description"):
-                documents.append(Document(
-                    page_content=f"Control {ctrl['control_id']}: {ctrl.get('title', '')}\n\n{ctrl['description']}",
-                    metadata={**base_metadata, "section": "description"},
-                ))
-
-            # Assessment objective chunk
-            if ctrl.get("assessment_objective"):
-                documents.append(Document(
-                    page_content=f"Assessment Objective for {ctrl['control_id']}:\n\n{ctrl['assessment_objective']}",
-                    metadata={**base_metadata, "section": "assessment_objective"},
-                ))
-
-            # Implementation guidance chunk
-            if ctrl.get("implementation_guidance"):
-                documents.append(Document(
-                    page_content=f"Implementation Guidance for {ctrl['control_id']}:\n\n{ctrl['implementation_guidance']}",
-                    metadata={**base_metadata, "section": "implementation_guidance"},
-                ))
-
-        if documents:
-            chunks = self._chunk_documents(documents, "nist_control")
-            ids = self.vector_store.add_documents(chunks)
-            logger.info(f"Indexed {len(ids)} NIST control chunks from {len(controls)} controls")
-            return len(ids)
-        return 0
-
-    def index_stig_benchmarks(self, benchmarks: List[Dict[str, Any]]) -> int:
-        """
-        Index STIG benchmark checks into the vector store.
 
-        Each STIG check becomes a document with metadata:
-          - stig_name, vuln_id, rule_id, severity, mapped CCI/NIST controls
+        With prune=True, controls of the same framework(s) that are absent
+        from `controls` are removed from the index.
         """
+        written, count = self._index_stream(
+            controls, self._nist_control_documents, "nist_control", scope_key="framework", prune=prune
+        )
+        logger.info(f"Indexed {written} NIST control chunks from {count} controls")
+        return written
+
+    @staticmethod
+    def _nist_control_documents(ctrl: Dict[str, Any]) -> List[Document]:
         documents = []
-        for check in benchmarks:
-            metadata = {
-                "doc_type": "stig_check",
-                "stig_name": check.get("stig_name", ""),
-                "vuln_id": check.get("vuln_id", ""),
-                "rule_id": check.get("rule_id", ""),
-                "severity": check.get("severity", ""),
-                "cci_ids": ",".join(check.get("cci_ids", [])),
-                "nist_controls": ",".join(check.get("nist_controls", [])),
-            }
-
-            content_parts = [f"STIG Check {check.get('vuln_id', '')} ({check.get('severity', '')})"]
-            if check.get("title"):
-                content_parts.append(f"Title: {check['title']}")
-            if check.get("check_content"):
-                content_parts.append(f"Check: {check['check_content']}")
-            if check.get("fix_text"):
-                content_parts.append(f"Fix: {check['fix_text']}")
+        framework = ctrl.get("framework", "nist_800_53_r5")
+        base_metadata = {
+            "doc_type": "nist_control",
+            "source_id": f"{framework}:{ctrl.get('control_id', '')}",
+            "framework": framework,
+            "control_id": ctrl.get("control_id", ""),
+            "family": ctrl.get("family", ""),
+            "baseline_impact": ",".join(ctrl.get("baseline_impact", [])),
+        }
+
+        # Description chunk
+        if ctrl.get("description"):
+            documents.append(Document(
+                page_content=f"Control {ctrl['control_id']}: {ctrl.get('title', '')}\n\n{ctrl['description']}",
+                metadata={**base_metadata, "section": "description"},
+            ))
 
+        # Assessment objective chunk
+        if ctrl.get("assessment_objective"):
             documents.append(Document(
-                page_content="\n\n".join(content_parts),
-                metadata=metadata,
+                page_content=f"Assessment Objective for {ctrl['control_id']}:\n\n{ctrl['assessment_objective']}",
+                metadata={**base_metadata, "section": "assessment_objective"},
             ))
 
-        if documents:
-            chunks = self._chunk_documents(documents, "stig_check")
-            ids = self.vector_store.add_documents(chunks)
-            logger.info(f"Indexed {len(ids)} STIG check chunks from {len(benchmarks)} checks")
-            return len(ids)
-        return 0
+        # Implementation guidance chunk
+        if ctrl.get("implementation_guidance"):
+            documents.append(Document(
+                page_content=f"Implementation Guidance for {ctrl['control_id']}:\n\n{ctrl['implementation_guidance']}",
+                metadata={**base_metadata, "section": "implementation_guidance"},
+            ))
+        return documents
+
+    def index_stig_benchmarks(self, benchmarks: Iterable[Dict[str, Any]], prune: bool = False) -> int:
+        """
+        Index STIG benchmark checks into the vector store.
+
+        Each STIG check becomes a document with metadata:
+          - stig_name, vuln_id, rule_id, severity, mapped CCI/NIST controls
 
-    def index_ssp_statements(self, statements: List[Dict[str, Any]]) -> int:
+        Checks are keyed by (stig_name, vuln_id), which is stable across
+        benchmark releases. With prune=True, checks dropped from a benchmark
+        present in `benchmarks` are removed.
+        """
+        written, count = self._index_stream(
+            benchmarks, self._stig_check_documents, "stig_check", scope_key="stig_name", prune=prune
+        )
+        logger.info(f"Indexed {written} STIG check chunks from {count} checks")
+        return written
+
+    @staticmethod
+    def _stig_check_documents(check: Dict[str, Any]) -> List[Document]:
+        metadata = {
+            "doc_type": "stig_check",
+            "source_id": f"{check.get('stig_name', '')}:{check.get('vuln_id') or check.get('rule_id', '')}",
+            "section": "check",
+            "stig_name": check.get("stig_name", ""),
+            "vuln_id": check.get("vuln_id", ""),
+            "rule_id": check.get("rule_id", ""),
+            "severity": check.get("severity", ""),
+            "cci_ids": ",".join(check.get("cci_ids", [])),
+            "nist_controls": ",".join(check.get("nist_controls", [])),
+        }
+
+        content_parts = [f"STIG Check {check.get('vuln_id', '')} ({check.get('severity', '')})"]
+        if check.get("title"):
+            content_parts.append(f"Title: {check['title']}")
+        if check.get("check_content"):
+            content_parts.append(f"Check: {check['check_content']}")
+        if check.get("fix_text"):
+            content_parts.append(f"Fix: {check['fix_text']}")
+
+        return [Document(
+            page_content="\n\n".join(content_parts),
+            metadata=metadata,
+        )]
+
+    def index_ssp_statements(self, statements: Iterable[Dict[str, Any]], prune: bool = False) -> int:
         """
         Index SSP implementation statements.
 
         Each statement links a control to an implementation narrative,
         enabling RAG to compare "what we say" vs "what cloud config shows."
+        With prune=True, statements of the same system(s) that are absent
+        from `statements` are removed.
         """
-        documents = []
-        for stmt in statements:
-            metadata = {
-                "doc_type": "ssp_statement",
-                "system_id": stmt.get("system_id", ""),
-                "control_id": stmt.get("control_id", ""),
-                "framework": stmt.get("framework", ""),
-                "responsibility": stmt.get("responsibility", ""),  # provider | customer | shared
-                "last_updated": stmt.get("last_updated", ""),
-            }
-            documents.append(Document(
-                page_content=f"SSP Implementation for {stmt.get('control_id', '')}:\n\n{stmt.get('narrative', '')}",
-                metadata=metadata,
-            ))
-
-        if documents:
-            chunks = self._chunk_documents(documents, "ssp_statement")
-            ids = self.vector_store.add_documents(chunks)
-            logger.info(f"Indexed {len(ids)} SSP statement chunks")
-            return len(ids)
-        return 0
-
-    def index_evidence_metadata(self, artifacts: List[Dict[str, Any]]) -> int:
+        written, _ = self._index_stream(
+            statements, self._ssp_statement_documents, "ssp_statement", scope_key="system_id", prune=prune
+        )
+        logger.info(f"Indexed {written} SSP statement chunks")
+        return written
+
+    @staticmethod
+    def _ssp_statement_documents(stmt: Dict[str, Any]) -> List[Document]:
+        metadata = {
+            "doc_type": "ssp_statement",
+            "source_id": f"{stmt.get('system_id', '')}:{stmt.get('framework', '')}:{stmt.get('control_id', '')}",
+            "section": "narrative",
+            "system_id": stmt.get("system_id", ""),
+            "control_id": stmt.get("control_id", ""),
+            "framework": stmt.get("framework", ""),
+            "responsibility": stmt.get("responsibility", ""),  # provider | customer | shared
+            "last_updated": stmt.get("last_updated", ""),
+        }
+        return [Document(
+            page_content=f"SSP Implementation for {stmt.get('control_id', '')}:\n\n{stmt.get('narrative', '')}",
+            metadata=metadata,
+        )]
+
+    def index_evidence_metadata(self, artifacts: Iterable[Dict[str, Any]], prune: bool = False) -> int:
         """
         Index evidence artifact metadata for retrieval during assessments.
 
         Enables RAG to find relevant evidence by control, provider, date, type.
         """
-        documents = []
-        for artifact in artifacts:
-            metadata = {
-                "doc_type": "evidence_summary",
-                "artifact_id": artifact.get("artifact_id", ""),
-                "artifact_type": artifact.get("artifact_type", ""),
-                "system_id": artifact.get("system_id", ""),
-                "provider": artifact.get("provider", ""),
-                "collected_at": artifact.get("collected_at", ""),
-                "control_ids": ",".join(artifact.get("control_ids", [])),
-            }
-
-            content = (
-                f"Evidence: {artifact.get('artifact_type', '')} "
-                f"from {artifact.get('provider', '')} "
-                f"collected {artifact.get('collected_at', '')}. "
-                f"Controls: {', '.join(artifact.get('control_ids', []))}. "
-                f"Tags: {artifact.get('tags', {})}"
-            )
-
-            documents.append(Document(
-                page_content=content,
-                metadata=metadata,
-            ))
+        written, _ = self._index_stream(
+            artifacts, self._evidence_documents, "evidence_summary",
+            scope_key="system_id", prune=prune, chunk=False,
+        )
+        logger.info(f"Indexed {written} evidence metadata entries")
+        return written
+
+    @staticmethod
+    def _evidence_documents(artifact: Dict[str, Any]) -> List[Document]:
+        metadata = {
+            "doc_type": "evidence_summary",
+            "source_id": artifact.get("artifact_id", ""),
+            "section": "summary",
+            "artifact_id": artifact.get("artifact_id", ""),
+            "artifact_type": artifact.get("artifact_type", ""),
+            "system_id": artifact.get("system_id", ""),
+            "provider": artifact.get("provider", ""),
+            "collected_at": artifact.get("collected_at", ""),
+            "control_ids": ",".join(artifact.get("control_ids", [])),
+        }
+
+        content = (
+            f"Evidence: {artifact.get('artifact_type', '')} "
+            f"from {artifact.get('provider', '')} "
+            f"collected {artifact.get('collected_at', '')}. "
+            f"Controls: {', '.join(artifact.get('control_ids', []))}. "
+            f"Tags: {artifact.get('tags', {})}"
+        )
+
+        return [Document(
+            page_content=content,
+            metadata=metadata,
+        )]
+
+    def index_policy_documents(self, policies: Iterable[Dict[str, Any]], prune: bool = False) -> int:
+        """
+        Index organizational policy and procedure documents.
 
-        if documents:
-            ids = self.vector_store.add_documents(documents)
-            logger.info(f"Indexed {len(ids)} evidence metadata entries")
-            return len(ids)
-        return 0
+        With prune=True, `policies` is the complete policy set and any other
+        indexed policy is removed.
+        """
+        written, _ = self._index_stream(policies, self._policy_documents, "policy_doc", prune=prune)
+        logger.info(f"Indexed {written} policy document chunks")
+        return written
+
+    @staticmethod
+    def _policy_documents(policy: Dict[str, Any]) -> List[Document]:
+        metadata = {
+            "doc_type": "policy_doc",
+            "source_id": policy.get("policy_id", ""),
+            "section": "content",
+            "policy_id": policy.get("policy_id", ""),
+            "title": policy.get("title", ""),
+            "effective_date": policy.get("effective_date", ""),
+            "mapped_controls": ",".join(policy.get("mapped_controls", [])),
+        }
+        return [Document(
+            page_content=f"Policy: {policy.get('title', '')}\n\n{policy.get('content', '')}",
+            metadata=metadata,
+        )]
+
+    def _index_stream(
+        self,
+        items: Iterable[Dict[str, Any]],
+        build: Callable[[Dict[str, Any]], List[Document]],
+        doc_type: str,
+        scope_key: Optional[str] = None,
+        prune: bool = False,
+        chunk: bool = True,
+    ) -> Tuple[int, int]:
+        """
+        Index `items` (any iterable, e.g. a lazy XCCDF/OSCAL parser) in windows
+        of STREAM_WINDOW items: each window is built, chunked, embedded and
+        written before the next is read, so memory stays bounded by the window.
 
-    def index_policy_documents(self, policies: List[Dict[str, Any]]) -> int:
-        """Index organizational policy and procedure documents."""
-        documents = []
-        for policy in policies:
-            metadata = {
-                "doc_type": "policy_doc",
-                "policy_id": policy.get("policy_id", ""),
-                "title": policy.get("title", ""),
-                "effective_date": policy.get("effective_date", ""),
-                "mapped_controls": ",".join(policy.get("mapped_controls", [])),
-            }
-            documents.append(Document(
-                page_content=f"Policy: {policy.get('title', '')}\n\n{policy.get('content', '')}",
-                metadata=metadata,
-            ))
+        With prune, the chunk IDs seen across all windows are kept (IDs only)
+        and indexed chunks in scope that were not seen are deleted at the end.
+        Returns (chunks written, items read).
+        """
+        window = self.config.get("STREAM_WINDOW", 5000)
+        written = count = 0
+        seen_ids: Set[str] = set()
+        scope_values: Set[str] = set()
+
+        items = iter(items)
+        while True:
+            batch = list(islice(items, window))
+            if not batch:
+                break
+            count += len(batch)
+            documents = [doc for item in batch for doc in build(item)]
+            window_written, chunk_ids = self._sync_documents(documents, doc_type, chunk=chunk)
+            written += window_written
+            if prune:
+                seen_ids.update(chunk_ids)
+                if scope_key:
+                    scope_values.update(doc.metadata.get(scope_key, "") for doc in documents)
+
+        if prune:
+            self._prune(doc_type, scope_key, scope_values, seen_ids)
+        return written, count
+
+    def _sync_documents(
+        self,
+        documents: List[Document],
+        doc_type: str,
+        chunk: bool = True,
+    ) -> Tuple[int, Set[str]]:
+        """
+        Bring the index in line with `documents`: add chunks whose stable ID
+        is not indexed yet, delete indexed chunks of the same sources that
+        were not produced this time.
 
-        if documents:
-            chunks = self._chunk_documents(documents, "policy_doc")
-            ids = self.vector_store.add_documents(chunks)
-            logger.info(f"Indexed {len(ids)} policy document chunks")
-            return len(ids)
-        return 0
+        Returns (chunks written, chunk IDs of `documents`); unchanged chunks
+        are skipped.
+        """
+        if not documents:
+            return 0, set()
+
+        chunks = self._chunk_documents(documents, doc_type) if chunk else documents
+        current: Dict[str, Document] = {}
+        for doc in chunks:
+            current.setdefault(make_chunk_id(doc), doc)
+
+        existing = self.vector_store.get_ids_by_metadata(
+            "source_id", sorted({doc.metadata["source_id"] for doc in documents}), {"doc_type": doc_type}
+        )
+        if existing is None:
+            # Backend cannot list IDs: write everything under stable IDs (upsert by ID)
+            return self._write_chunks(doc_type, current), set(current)
+
+        new_ids = [chunk_id for chunk_id in current if chunk_id not in existing]
+        stale_ids = sorted(existing.difference(current))
+        # The index already records what was written: a rerun after a partial
+        # ingest lists those chunks as existing, so no checkpoint is needed
+        self._write_chunks(doc_type, {chunk_id: current[chunk_id] for chunk_id in new_ids}, resumable=False)
+        # Delete after adding so a source is never briefly missing from the index
+        self.vector_store.delete_documents(stale_ids)
+
+        logger.info(
+            f"[Indexer] {doc_type}: {len(new_ids)} added, "
+            f"{len(current) - len(new_ids)} unchanged, {len(stale_ids)} deleted"
+        )
+        return len(new_ids), set(current)
+
+    def _prune(self, doc_type: str, scope_key: Optional[str], scope_values: Set[str], seen_ids: Set[str]) -> None:
+        """Delete chunks in scope (scope_key values, or the whole doc_type) that were not seen."""
+        if scope_key:
+            if not scope_values:
+                return
+            existing = self.vector_store.get_ids_by_metadata(scope_key, sorted(scope_values), {"doc_type": doc_type})
+        else:
+            existing = self.vector_store.get_ids_by_metadata("doc_type", [doc_type])
+        if existing is None:
+            logger.warning(f"[Indexer] {doc_type}: backend cannot list IDs — prune skipped")
+            return
+        stale_ids = sorted(existing.difference(seen_ids))
+        self.vector_store.delete_documents(stale_ids)
+        if stale_ids:
+            logger.info(f"[Indexer] {doc_type}: pruned {len(stale_ids)} chunks of removed sources")
+
+    def _write_chunks(self, doc_type: str, chunks: Dict[str, Document], resumable: bool = True) -> int:
+        """
+        Embed and write chunks through the pipeline. When `resumable`,
+        progress is checkpointed under a key derived from all of `chunks`.
+        """
+        if not chunks:
+            return 0
+        ids = list(chunks)
+        checkpoint = None
+        if resumable:
+            checkpoint = build_checkpoint(
+                self.config.get("CHECKPOINT_DIR", ""),
+                doc_type,
+                ids,
+                max_age_seconds=self.config.get("CHECKPOINT_MAX_AGE_SECONDS", 7 * 24 * 3600),
+            )
+        written = self.pipeline.write(list(chunks.values()), ids, checkpoint)
+        if checkpoint is not None:
+            checkpoint.complete()
+        return written
 
     def _chunk_documents(self, documents: List[Document], doc_type: str) -> List[Document]:
-        """Chunk documents using type-specific configuration."""
+        """
+        Chunk documents using type-specific configuration. Inputs of at least
+        CHUNK_PARALLEL_MIN_DOCS documents are split across CHUNK_WORKERS processes.
+        """
         config = CHUNK_CONFIGS.get(doc_type, CHUNK_CONFIGS["default"])
+        workers = self.config.get("CHUNK_WORKERS", 1)
+        if workers <= 1 or len(documents) < self.config.get("CHUNK_PARALLEL_MIN_DOCS", 2000):
+            return _split_documents((config, documents))
 
+        slice_size = -(-len(documents) // (workers * 4))
+        slices = [(config, documents[i:i + slice_size]) for i in range(0, len(documents), slice_size)]
         try:
-            from langchain.text_splitter import RecursiveCharacterTextSplitter
-
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=config["chunk_size"],
-                chunk_overlap=config["chunk_overlap"],
-                separators=[config["separator"], "\n", " "],
-            )
-            return splitter.split_documents(documents)
-        except ImportError:
-            logger.warning("langchain text splitter not available — returning unchunked documents")
-            return documents
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return [chunk for chunks in pool.map(_split_documents, slices) for chunk in chunks]
+        except (AssertionError, BrokenProcessPool, OSError) as e:
+            # e.g. inside a daemonic Celery prefork child, which cannot spawn processes
+            logger.warning(f"Parallel chunking unavailable ({e}) — chunking in-process")
+            return _split_documents((config, documents))
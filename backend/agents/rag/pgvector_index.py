@@ -0,0 +1,245 @@
+"""
+pgvector Index Management — ANN and metadata indexes for the LangChain tables.
+
+LangChain's PGVector creates langchain_pg_embedding without any ANN index,
+so every similarity query is a sequential scan. This module manages:
+
+  - an HNSW (default) or IVFFlat index on the embedding column, with
+    tunable m / ef_construction (or lists), built CONCURRENTLY and rebuilt
+    by building a replacement and swapping it in
+  - expression indexes on the JSONB metadata keys the retriever filters on
+    (cmetadata->>'doc_type', cmetadata->>'control_id', ...)
+  - per-query search parameters (hnsw.ef_search / ivfflat.probes) applied
+    with SET LOCAL on the same transaction as the query
+
+Used by the `pgvector_indexes` management command and VectorStoreManager.
+"""
+
+import contextvars
+import logging
+import re
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+VECTOR_INDEX_NAME = "ix_langchain_pg_embedding_vector"
+
+# Metadata keys filtered on by the retriever and control mapping
+DEFAULT_METADATA_INDEX_KEYS = ["doc_type", "control_id", "framework", "source_id"]
+
+DISTANCE_OPS = {
+    "cosine": "vector_cosine_ops",
+    "euclidean": "vector_l2_ops",
+    "max_inner_product": "vector_ip_ops",
+}
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+# Per-query search parameters picked up by the engine hook below
+_search_params: "contextvars.ContextVar[Dict[str, int]]" = contextvars.ContextVar(
+    "pgvector_search_params", default={}
+)
+
+
+@contextmanager
+def search_params(ef_search: Optional[int] = None, probes: Optional[int] = None) -> Iterator[None]:
+    """Apply hnsw.ef_search / ivfflat.probes to vector queries issued in this block."""
+    params = {}
+    if ef_search:
+        params["hnsw.ef_search"] = int(ef_search)
+    if probes:
+        params["ivfflat.probes"] = int(probes)
+    token = _search_params.set(params)
+    try:
+        yield
+    finally:
+        _search_params.reset(token)
+
+
+def install_search_params_hook(engine, defaults: Optional[Dict[str, int]] = None) -> None:
+    """
+    Register SQLAlchemy events on the pgvector engine: connection-level
+    defaults on connect, and SET LOCAL overrides from search_params().
+    """
+    from sqlalchemy import event
+
+    defaults = {k: int(v) for k, v in (defaults or {}).items() if v}
+
+    @event.listens_for(engine, "connect")
+    def _set_defaults(dbapi_connection, connection_record):
+        if not defaults:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in defaults.items():
+                cursor.execute(f"SET {name} = {value}")
+        except Exception as e:
+            logger.warning(f"pgvector search defaults not applied: {e}")
+        finally:
+            cursor.close()
+        dbapi_connection.commit()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _set_local(conn, cursor, statement, parameters, context, executemany):
+        params = _search_params.get()
+        if params and EMBEDDING_TABLE in statement and "embedding" in statement:
+            for name, value in params.items():
+                cursor.execute(f"SET LOCAL {name} = {value}")
+
+
+class PgVectorIndexManager:
+    """Creates, rebuilds and inspects pgvector indexes (runs via Django's connection)."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, connection=None):
+        if config is None:
+            from django.conf import settings
+            config = getattr(settings, "VECTOR_DB", {})
+        self.config = config
+        self.dimensions = int(config.get("EMBEDDING_DIMENSIONS", 1536))
+        self.method = config.get("INDEX_METHOD", "hnsw")
+        self.distance = config.get("DISTANCE", "cosine")
+        self._connection = connection
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            from django.db import connection
+            self._connection = connection
+        return self._connection
+
+    # -------------------------------------------------------------------------
+    # Vector (ANN) index
+    # -------------------------------------------------------------------------
+
+    def ensure_vector_index(self, **params) -> bool:
+        """Create the ANN index if missing. Returns True if it was created."""
+        if self._index_exists(VECTOR_INDEX_NAME):
+            return False
+        self._ensure_typed_embedding_column()
+        self._create_vector_index(VECTOR_INDEX_NAME, **params)
+        return True
+
+    def rebuild_vector_index(self, **params) -> None:
+        """
+        Rebuild the ANN index with new parameters without blocking writes:
+        build a replacement concurrently, drop the old index, rename.
+        """
+        self._ensure_typed_embedding_column()
+        new_name = f"{VECTOR_INDEX_NAME}_new"
+        self._execute(f"DROP INDEX CONCURRENTLY IF EXISTS {new_name}")
+        self._create_vector_index(new_name, **params)
+        self._execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}")
+        self._execute(f"ALTER INDEX {new_name} RENAME TO {VECTOR_INDEX_NAME}")
+
+    def drop_vector_index(self) -> None:
+        self._execute(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}")
+
+    def _create_vector_index(
+        self,
+        name: str,
+        method: Optional[str] = None,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        lists: Optional[int] = None,
+        maintenance_work_mem: Optional[str] = None,
+    ) -> None:
+        method = method or self.method
+        ops = DISTANCE_OPS[self.distance]
+        if method == "hnsw":
+            m = int(m or self.config.get("HNSW_M", 16))
+            ef_construction = int(ef_construction or self.config.get("HNSW_EF_CONSTRUCTION", 64))
+            with_clause = f"m = {m}, ef_construction = {ef_construction}"
+        elif method == "ivfflat":
+            lists = int(lists or self.config.get("IVFFLAT_LISTS", 1000))
+            with_clause = f"lists = {lists}"
+        else:
+            raise ValueError(f"Unsupported vector index method: {method}")
+
+        maintenance_work_mem = maintenance_work_mem or self.config.get("INDEX_MAINTENANCE_WORK_MEM", "")
+        if maintenance_work_mem:
+            if not re.match(r"^\d+\s*[kKMG]B$", maintenance_work_mem):
+                raise ValueError(f"Invalid maintenance_work_mem: {maintenance_work_mem}")
+            self._execute(f"SET maintenance_work_mem = '{maintenance_work_mem}'")
+
+        logger.info(f"Building {method} index {name} ({with_clause}) on {EMBEDDING_TABLE}")
+        self._execute(
+            f"CREATE INDEX CONCURRENTLY {name} ON {EMBEDDING_TABLE} "
+            f"USING {method} (embedding {ops}) WITH ({with_clause})"
+        )
+
+    def _ensure_typed_embedding_column(self) -> None:
+        """ANN indexes need vector(n); LangChain may have created an untyped column."""
+        rows = self._query(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = 'embedding'",
+            [EMBEDDING_TABLE],
+        )
+        if rows and rows[0][0] == "vector":
+            logger.info(f"Typing {EMBEDDING_TABLE}.embedding as vector({self.dimensions})")
+            self._execute(
+                f"ALTER TABLE {EMBEDDING_TABLE} ALTER COLUMN embedding "
+                f"TYPE vector({self.dimensions})"
+            )
+
+    # -------------------------------------------------------------------------
+    # Metadata expression indexes
+    # -------------------------------------------------------------------------
+
+    def ensure_metadata_indexes(self, keys: Optional[List[str]] = None) -> List[str]:
+        """Create expression indexes on cmetadata->>'key'; returns the indexes created."""
+        keys = keys or self.config.get("METADATA_INDEX_KEYS", DEFAULT_METADATA_INDEX_KEYS)
+        created = []
+        for key in keys:
+            if not _IDENTIFIER_RE.match(key):
+                raise ValueError(f"Invalid metadata key: {key!r}")
+            name = f"ix_langchain_pg_embedding_meta_{key}"
+            if self._index_exists(name):
+                continue
+            self._execute(
+                f"CREATE INDEX CONCURRENTLY {name} ON {EMBEDDING_TABLE} "
+                f"(collection_id, (cmetadata->>'{key}'))"
+            )
+            created.append(name)
+        return created
+
+    # -------------------------------------------------------------------------
+    # Inspection
+    # -------------------------------------------------------------------------
+
+    def index_status(self) -> List[Dict[str, Any]]:
+        """Indexes on the embedding table with definition, size and validity."""
+        rows = self._query(
+            "SELECT c.relname, pg_get_indexdef(i.indexrelid), "
+            "pg_size_pretty(pg_relation_size(i.indexrelid)), i.indisvalid "
+            "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = %s::regclass ORDER BY c.relname",
+            [EMBEDDING_TABLE],
+        )
+        return [
+            {"name": name, "definition": definition, "size": size, "valid": valid}
+            for name, definition, size, valid in rows
+        ]
+
+    def _index_exists(self, name: str) -> bool:
+        # An invalid index (failed CONCURRENTLY build) is dropped so it can be recreated
+        rows = self._query(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = %s",
+            [name],
+        )
+        if rows and not rows[0][0]:
+            logger.warning(f"Dropping invalid index {name}")
+            self._execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            return False
+        return bool(rows)
+
+    def _execute(self, sql: str, params: Optional[List[Any]] = None) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _query(self, sql: str, params: Optional[List[Any]] = None) -> List[tuple]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
@@ -0,0 +1,303 @@
+"""
+Rerank Scheduler — batches cross-encoder scoring across concurrent retrievals.
+
+ComplianceRetriever reranks a handful of passages per control per hop. Run
+one at a time, the CrossEncoder sees tiny batches and CPU throughput is
+poor. The scheduler sits in front of a shared model:
+
+  - callers submit (query, passage) pairs and block for their scores
+  - a worker thread coalesces requests arriving within MAX_WAIT_MS into
+    batches of up to BATCH_SIZE pairs
+  - pairs already scored (same query + passage) are served from an LRU
+    score cache, and duplicates within a batch are scored once
+
+Models come from a process-wide registry (get_reranker): each model is
+loaded lazily once per process, optionally with the ONNX backend or int8
+dynamic quantization for CPU inference, and can be warmed at worker boot.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _RerankRequest:
+    __slots__ = ("pairs", "scores", "error", "done")
+
+    def __init__(self, pairs: Sequence[Tuple[str, str]]):
+        self.pairs = pairs
+        self.scores: List[float] = []
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class RerankScheduler:
+    """
+    Coalesces rerank requests from many threads into large model batches.
+
+    Holds only a weak reference to the model; get_rerank_scheduler stops the
+    worker thread once the model is garbage collected.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        batch_size: int = 256,
+        max_wait_ms: float = 5.0,
+        cache_size: int = 50_000,
+    ):
+        self._model_ref = weakref.ref(model)
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self._scores: "OrderedDict[bytes, float]" = OrderedDict()
+        self._queue: "queue.Queue[_RerankRequest]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "pairs_requested": 0,
+            "pairs_scored": 0,
+            "pairs_reused": 0,
+        }
+
+    @property
+    def model(self) -> Optional[Any]:
+        return self._model_ref()
+
+    def stop(self) -> None:
+        """Let the worker thread exit once queued requests are processed."""
+        with self._lock:
+            self._stopped = True
+            if self._worker is not None and self._worker_pid == os.getpid():
+                self._queue.put(None)
+
+    def score(self, pairs: Sequence[Tuple[str, str]]) -> List[float]:
+        """Score (query, passage) pairs; blocks until the batch containing them runs."""
+        if not pairs:
+            return []
+        self._ensure_worker()
+        request = _RerankRequest(pairs)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.scores
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_batch_pairs"] = stats["pairs_scored"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork; start a fresh worker in each child process
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("Rerank scheduler stopped: its model was released")
+            if self._worker is None or self._worker_pid != pid or not self._worker.is_alive():
+                if self._worker_pid != pid:
+                    self._queue = queue.Queue()
+                self._worker = threading.Thread(target=self._run, name="rerank-scheduler", daemon=True)
+                self._worker_pid = pid
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            batch = [request]
+            pending = len(request.pairs)
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+            while pending < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                pending += len(request.pairs)
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[_RerankRequest]) -> None:
+        try:
+            request_keys = [[_pair_key(q, p) for q, p in r.pairs] for r in batch]
+
+            # Unique pairs not yet scored, in first-seen order
+            to_score: "OrderedDict[bytes, Tuple[str, str]]" = OrderedDict()
+            known: Dict[bytes, float] = {}
+            with self._lock:
+                for request, keys in zip(batch, request_keys):
+                    for key, pair in zip(keys, request.pairs):
+                        if key in known or key in to_score:
+                            continue
+                        if key in self._scores:
+                            self._scores.move_to_end(key)
+                            known[key] = self._scores[key]
+                        else:
+                            to_score[key] = pair
+
+            if to_score:
+                model = self._model_ref()
+                if model is None:
+                    raise RuntimeError("Reranker model was released")
+                pairs = list(to_score.values())
+                scores = model.predict(pairs, batch_size=self.batch_size)
+                fresh = dict(zip(to_score.keys(), (float(s) for s in scores)))
+                known.update(fresh)
+                with self._lock:
+                    self._scores.update(fresh)
+                    while len(self._scores) > self.cache_size:
+                        self._scores.popitem(last=False)
+
+            requested = sum(len(keys) for keys in request_keys)
+            with self._lock:
+                self._stats["requests"] += len(batch)
+                self._stats["batches"] += 1 if to_score else 0
+                self._stats["pairs_requested"] += requested
+                self._stats["pairs_scored"] += len(to_score)
+                self._stats["pairs_reused"] += requested - len(to_score)
+
+            for request, keys in zip(batch, request_keys):
+                request.scores = [known[key] for key in keys]
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
+
+
+def _pair_key(query: str, passage: str) -> bytes:
+    return hashlib.blake2b(f"{query}\0{passage}".encode("utf-8"), digest_size=16).digest()
+
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def get_reranker(model_name: Optional[str] = None) -> Optional[Any]:
+    """
+    Return the shared CrossEncoder for `model_name` (RERANKER.MODEL by
+    default), loading it on first use. Returns None when reranking is
+    disabled or sentence-transformers is unavailable.
+    """
+    config = get_reranker_config()
+    if not config.get("ENABLED", True):
+        return None
+    model_name = model_name or config.get("MODEL", DEFAULT_RERANKER_MODEL)
+
+    if model_name in _models:
+        return _models[model_name]
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = _load_reranker(model_name, config)
+        return _models[model_name]
+
+
+def warm_up_reranker() -> None:
+    """Load the default reranker and run one prediction (e.g., on worker boot)."""
+    model = get_reranker()
+    if model is not None:
+        get_rerank_scheduler(model).score([("warm-up", "warm-up")])
+
+
+def _load_reranker(model_name: str, config: Dict[str, Any]) -> Optional[Any]:
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        logger.info("sentence-transformers not available — reranking disabled")
+        return None
+
+    backend = config.get("BACKEND", "torch")
+    started = time.monotonic()
+    if backend == "onnx":
+        try:
+            model = CrossEncoder(
+                model_name,
+                backend="onnx",
+                model_kwargs={"file_name": config.get("ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")},
+            )
+        except Exception as e:
+            logger.warning(f"ONNX reranker unavailable ({e}) — using torch backend")
+            backend = "torch"
+    if backend != "onnx":
+        model = CrossEncoder(model_name)
+        if config.get("QUANTIZE_INT8", False):
+            model = _quantize_int8(model)
+
+    logger.info(
+        f"Reranker loaded: {model_name} | backend={backend} | "
+        f"{(time.monotonic() - started) * 1000:.0f}ms"
+    )
+    return model
+
+
+def _quantize_int8(model: Any) -> Any:
+    """Apply dynamic int8 quantization to the model's Linear layers (CPU inference)."""
+    try:
+        import torch
+
+        model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    except Exception as e:
+        logger.warning(f"Reranker int8 quantization skipped: {e}")
+    return model
+
+
+_schedulers: "weakref.WeakKeyDictionary[Any, RerankScheduler]" = weakref.WeakKeyDictionary()
+_schedulers_lock = threading.Lock()
+
+
+def get_rerank_scheduler(model: Any) -> RerankScheduler:
+    """
+    Return the process-wide scheduler for a reranker model (one per model).
+
+    The entry and the scheduler's worker thread go away with the model.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(model)
+        if scheduler is None:
+            config = get_reranker_config()
+            scheduler = RerankScheduler(
+                model,
+                batch_size=config.get("BATCH_SIZE", 256),
+                max_wait_ms=config.get("MAX_WAIT_MS", 5.0),
+                cache_size=config.get("SCORE_CACHE_SIZE", 50_000),
+            )
+            _schedulers[model] = scheduler
+            weakref.finalize(model, scheduler.stop)
+        return scheduler
+
+
+def get_reranker_config() -> Dict[str, Any]:
+    """Read RERANKER settings, tolerating use outside Django."""
+    try:
+        from django.conf import settings
+        return dict(getattr(settings, "RERANKER", {}))
+    except Exception:
+        return {}
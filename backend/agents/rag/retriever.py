@@ -8,15 +8,22 @@ Features:
   4. Multi-hop retrieval chains (control -> evidence -> validation)
   5. Contradiction detection between SSP claims and cloud reality
   6. Evidence sufficiency scoring (freshness + completeness + authority + consistency)
+
+Reranking goes through a shared RerankScheduler (agents.rag.reranking), so
+concurrent retrievals (e.g., retrieve_for_controls) are scored in large
+cross-encoder batches.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from langchain.schema import Document
 
+from agents.rag.reranking import get_rerank_scheduler, get_reranker
+
 logger = logging.getLogger(__name__)
 
 
@@ -79,6 +86,13 @@ class ComplianceRetriever:
     def __init__(self, vector_store_manager, reranker=None):
         self.vector_store = vector_store_manager
         self.reranker = reranker or self._default_reranker()
+        self._rerank_scheduler = None
+        if self.reranker is not None:
+            try:
+                self._rerank_scheduler = get_rerank_scheduler(self.reranker)
+            except TypeError:
+                # Not weak-referenceable; score directly without batching
+                logger.debug("Reranker cannot be shared — reranking without scheduler")
 
     # -------------------------------------------------------------------------
     # Core retrieval methods
@@ -153,6 +167,24 @@ class ComplianceRetriever:
         all_results.sort(key=lambda r: r.combined_score, reverse=True)
         return all_results[:rerank_top_k]
 
+    def retrieve_for_controls(
+        self,
+        requests: List[Dict[str, Any]],
+        max_workers: int = 8,
+    ) -> List[List[RetrievalResult]]:
+        """
+        Run retrieve_for_control for many controls concurrently.
+
+        Each request holds retrieve_for_control keyword arguments. Running
+        them together lets the rerank scheduler batch their pairs; results
+        are returned in request order.
+        """
+        if not requests:
+            return []
+        workers = min(max_workers, len(requests))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retriever") as pool:
+            return list(pool.map(lambda kwargs: self.retrieve_for_control(**kwargs), requests))
+
     def multi_hop_retrieve(
         self,
         control_id: str,
@@ -179,11 +211,10 @@ class ComplianceRetriever:
             rerank_top_k=3,
         )
 
-        # Hop 2: Implementation guidance / SSP
-        results["guidance"] = self.vector_store.similarity_search(
-            query=f"How is {control_id} implemented? SSP implementation statement.",
+        # Hop 2: Implementation guidance / SSP (identified by metadata alone)
+        results["guidance"] = self.vector_store.get_by_metadata(
+            filter={"control_id": control_id, "doc_type": "ssp_statement"},
             k=5,
-            filter={"doc_type": "ssp_statement", "control_id": control_id},
         )
         results["guidance"] = [
             RetrievalResult(document=doc, similarity_score=1.0)
@@ -284,7 +315,10 @@ class ComplianceRetriever:
 
         try:
             pairs = [(query, r.document.page_content) for r in results]
-            scores = self.reranker.predict(pairs)
+            if self._rerank_scheduler is not None:
+                scores = self._rerank_scheduler.score(pairs)
+            else:
+                scores = self.reranker.predict(pairs)
             for r, score in zip(results, scores):
                 r.rerank_score = float(score)
         except Exception as e:
@@ -351,10 +385,5 @@ class ComplianceRetriever:
 
     @staticmethod
     def _default_reranker():
-        """Try to load a cross-encoder reranker, fall back to None."""
-        try:
-            from sentence_transformers import CrossEncoder
-            return CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
-        except ImportError:
-            logger.info("sentence-transformers not available — reranking disabled")
-            return None
+        """Shared process-wide cross-encoder reranker, or None if unavailable."""
+        return get_reranker()
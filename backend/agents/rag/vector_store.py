@@ -8,15 +8,33 @@ Stores embeddings for compliance knowledge:
   - STIG check content + fix text
   - Evidence artifact metadata
   - Organizational policies and procedures
+
+Agents share one VectorStoreManager per process (get_vector_store_manager).
+Its pgvector engine uses a bounded SQLAlchemy pool sized by VECTOR_DB
+POOL_* settings; after a fork (Celery prefork) the child drops the
+inherited pool without closing the parent's connections and builds its own.
 """
 
+import csv
+import io
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set
 
 from django.conf import settings
 
+from agents.rag.pgvector_index import install_search_params_hook, search_params
+
 logger = logging.getLogger(__name__)
 
+# Metadata keys are inlined into SQL (so expression indexes can match); restrict them
+_METADATA_KEY_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
 
 class VectorStoreManager:
     """
@@ -31,6 +49,31 @@ class VectorStoreManager:
         self.embedding_model = self.config.get("EMBEDDING_MODEL", "text-embedding-3-small")
         self.dimensions = self.config.get("EMBEDDING_DIMENSIONS", 1536)
         self._store = None
+        self._embeddings = None
+
+    def get_embeddings(self):
+        """
+        Get or create the embedding client shared by the store and indexing.
+
+        When VECTOR_DB.EMBEDDING_CACHE is configured, query embeddings are
+        served from a persistent cache (see agents.rag.embedding_cache).
+        """
+        if self._embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+
+            from agents.rag.embedding_cache import CachedEmbeddings, build_embedding_cache
+
+            embeddings = OpenAIEmbeddings(model=self.embedding_model)
+            cache = build_embedding_cache(self.config)
+            if cache is not None:
+                embeddings = CachedEmbeddings(embeddings, cache, self.embedding_model, self.dimensions)
+            self._embeddings = embeddings
+        return self._embeddings
+
+    def embedding_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the query embedding cache (empty if disabled)."""
+        cache = getattr(self._embeddings, "cache", None)
+        return cache.stats() if cache is not None else {}
 
     def get_store(self):
         """Get or create the vector store instance."""
@@ -52,9 +95,8 @@ class VectorStoreManager:
         """Initialize pgvector store via LangChain."""
         try:
             from langchain_community.vectorstores import PGVector
-            from langchain_openai import OpenAIEmbeddings
 
-            embeddings = OpenAIEmbeddings(model=self.embedding_model)
+            embeddings = self.get_embeddings()
             db_settings = settings.DATABASES["default"]
             connection_string = (
                 f"postgresql+psycopg2://{db_settings['USER']}:{db_settings['PASSWORD']}"
@@ -65,6 +107,21 @@ class VectorStoreManager:
                 collection_name=self.collection,
                 connection_string=connection_string,
                 embedding_function=embeddings,
+                embedding_length=self.dimensions,
+                engine_args={
+                    "pool_size": self.config.get("POOL_SIZE", 5),
+                    "max_overflow": self.config.get("POOL_MAX_OVERFLOW", 5),
+                    "pool_timeout": self.config.get("POOL_TIMEOUT_SECONDS", 30),
+                    "pool_recycle": self.config.get("POOL_RECYCLE_SECONDS", 1800),
+                    "pool_pre_ping": True,
+                },
+            )
+            install_search_params_hook(
+                store._bind,
+                defaults={
+                    "hnsw.ef_search": self.config.get("HNSW_EF_SEARCH"),
+                    "ivfflat.probes": self.config.get("IVFFLAT_PROBES"),
+                },
             )
             logger.info(f"pgvector store initialized: collection={self.collection}")
             return store
@@ -76,9 +133,8 @@ class VectorStoreManager:
         """Initialize Chroma vector store."""
         try:
             from langchain_chroma import Chroma
-            from langchain_openai import OpenAIEmbeddings
 
-            embeddings = OpenAIEmbeddings(model=self.embedding_model)
+            embeddings = self.get_embeddings()
             store = Chroma(
                 collection_name=self.collection,
                 embedding_function=embeddings,
@@ -94,9 +150,8 @@ class VectorStoreManager:
         """Initialize OpenSearch vector store."""
         try:
             from langchain_community.vectorstores import OpenSearchVectorSearch
-            from langchain_openai import OpenAIEmbeddings
 
-            embeddings = OpenAIEmbeddings(model=self.embedding_model)
+            embeddings = self.get_embeddings()
             opensearch_url = self.config.get("OPENSEARCH_URL", "http://localhost:9200")
 
             store = OpenSearchVectorSearch(
@@ -110,37 +165,407 @@ class VectorStoreManager:
             logger.error(f"OpenSearch dependencies missing: {e}")
             return None
 
+    def _engine(self):
+        """SQLAlchemy engine behind the pgvector store (None for other backends)."""
+        return getattr(self._store, "_bind", None) if self._store is not None else None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool usage for the pgvector engine."""
+        engine = self._engine()
+        pool = getattr(engine, "pool", None)
+        if pool is None:
+            return {"backend": self.backend, "pooled": False}
+        stats: Dict[str, Any] = {"backend": self.backend, "pooled": True, "status": pool.status()}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if callable(method):
+                stats[name] = method()
+        return stats
+
+    def health_check(self) -> Dict[str, Any]:
+        """Round-trip the vector store; returns status, latency and pool usage."""
+        started = time.monotonic()
+        try:
+            store = self.get_store()
+            if store is None:
+                raise RuntimeError("vector store not available")
+            engine = self._engine()
+            if engine is not None:
+                from sqlalchemy import text
+
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            elif hasattr(getattr(store, "_client", None), "heartbeat"):
+                store._client.heartbeat()
+            healthy, error = True, ""
+        except Exception as e:
+            healthy, error = False, str(e)
+        return {
+            "healthy": healthy,
+            "error": error,
+            "latency_ms": int((time.monotonic() - started) * 1000),
+            "pool": self.pool_stats(),
+        }
+
+    def ensure_indexes(self) -> Dict[str, Any]:
+        """Create missing pgvector ANN and metadata indexes (no-op on other backends)."""
+        if self.backend != "pgvector":
+            return {}
+        from agents.rag.pgvector_index import PgVectorIndexManager
+
+        indexes = PgVectorIndexManager(self.config)
+        return {
+            "vector_index_created": indexes.ensure_vector_index(),
+            "metadata_indexes_created": indexes.ensure_metadata_indexes(),
+        }
+
+    def dispose(self, close: bool = True) -> None:
+        """
+        Release pooled connections. `close=False` only forgets them, which is
+        what a forked child must do with connections owned by its parent.
+        """
+        engine = self._engine()
+        if engine is not None:
+            try:
+                engine.dispose(close=close)
+            except TypeError:  # SQLAlchemy < 1.4.33
+                engine.pool = engine.pool.recreate()
+        self._store = None
+
     def add_documents(self, documents: List[Any], **kwargs) -> List[str]:
-        """Add documents to the vector store."""
+        """Add documents to the vector store (pass `ids=` for stable document IDs)."""
         store = self.get_store()
         if store is None:
             logger.warning("Vector store not available — skipping document addition")
             return []
         return store.add_documents(documents, **kwargs)
 
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document texts (one model call; batching is up to the caller)."""
+        return self.get_embeddings().embed_documents(list(texts))
+
+    def upsert_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+    ) -> None:
+        """
+        Write pre-computed embeddings under the given IDs, replacing any
+        documents with the same IDs. On pgvector this is one COPY into a
+        staging table plus a delete/insert in a single transaction.
+        """
+        if not ids:
+            return
+        store = self.get_store()
+        if store is None:
+            logger.warning("Vector store not available — skipping embedding upsert")
+            return
+        if self.backend == "pgvector":
+            self._upsert_embeddings_pgvector(texts, embeddings, metadatas, ids)
+        elif self.backend == "chroma":
+            store._collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+        else:
+            store.add_embeddings(list(zip(texts, embeddings)), metadatas=metadatas, ids=ids)
+
+    def _upsert_embeddings_pgvector(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+    ) -> None:
+        from django.db import connection, transaction
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for text, vector, metadata, chunk_id in zip(texts, embeddings, metadatas, ids):
+            writer.writerow([
+                str(uuid.uuid4()),
+                chunk_id,
+                text.replace("\x00", ""),
+                json.dumps(metadata, default=str),
+                "[" + ",".join(str(float(v)) for v in vector) + "]",
+            ])
+        buffer.seek(0)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT uuid FROM langchain_pg_collection WHERE name = %s", [self.collection])
+            row = cursor.fetchone()
+            if row is None:
+                raise RuntimeError(f"pgvector collection {self.collection!r} does not exist")
+            collection_id = row[0]
+
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS embedding_stage ("
+                " uuid uuid, custom_id varchar, document varchar, cmetadata jsonb, embedding vector"
+                ") ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(
+                "COPY embedding_stage (uuid, custom_id, document, cmetadata, embedding) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                "DELETE FROM langchain_pg_embedding e USING embedding_stage s "
+                "WHERE e.collection_id = %s AND e.custom_id = s.custom_id",
+                [collection_id],
+            )
+            cursor.execute(
+                "INSERT INTO langchain_pg_embedding (uuid, collection_id, custom_id, document, cmetadata, embedding) "
+                "SELECT uuid, %s, custom_id, document, cmetadata, embedding FROM embedding_stage",
+                [collection_id],
+            )
+
+    def delete_documents(self, ids: List[str]) -> None:
+        """Delete documents by ID."""
+        if not ids:
+            return
+        store = self.get_store()
+        if store is None:
+            logger.warning("Vector store not available — skipping document deletion")
+            return
+        store.delete(ids=list(ids))
+
+    def get_ids_by_metadata(
+        self,
+        key: str,
+        values: List[Any],
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Set[str]]:
+        """
+        IDs of all documents whose metadata `key` is one of `values` (and
+        matching `filter`). Returns None if the backend cannot list IDs.
+        """
+        if not values:
+            return set()
+        filter = filter or {}
+        store = self.get_store()
+        if store is None:
+            return None
+
+        if self.backend == "pgvector":
+            from django.db import connection
+
+            sql = f"""
+                SELECT e.custom_id
+                FROM langchain_pg_embedding e
+                JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                WHERE c.name = %s
+                  AND e.cmetadata->>'{_checked_key(key)}' = ANY(%s)
+                  {_pgvector_filter_sql(filter)}
+            """
+            params = [self.collection, [str(v) for v in values], *[str(v) for v in filter.values()]]
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return {row[0] for row in cursor.fetchall() if row[0]}
+
+        if self.backend == "chroma":
+            response = store.get(where=_chroma_where(key, values, filter), include=[])
+            return set(response.get("ids", []))
+
+        return None
+
     def similarity_search(
         self,
         query: str,
         k: int = 5,
         filter: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
         **kwargs,
     ) -> List[Any]:
-        """Search for similar documents."""
+        """Search for similar documents (`ef_search` overrides hnsw.ef_search for this query)."""
         store = self.get_store()
         if store is None:
             logger.warning("Vector store not available — returning empty results")
             return []
-        return store.similarity_search(query, k=k, filter=filter, **kwargs)
+        with search_params(ef_search=ef_search):
+            return store.similarity_search(query, k=k, filter=filter, **kwargs)
 
     def similarity_search_with_score(
         self,
         query: str,
         k: int = 5,
         filter: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
         **kwargs,
     ) -> List[Any]:
         """Search for similar documents with relevance scores."""
         store = self.get_store()
         if store is None:
             return []
-        return store.similarity_search_with_score(query, k=k, filter=filter, **kwargs)
+        with search_params(ef_search=ef_search):
+            return store.similarity_search_with_score(query, k=k, filter=filter, **kwargs)
+
+    # -------------------------------------------------------------------------
+    # Exact-match metadata lookups (no embedding call, no ANN scan)
+    # -------------------------------------------------------------------------
+
+    def get_by_metadata(self, filter: Dict[str, Any], k: int = 10) -> List[Any]:
+        """
+        Fetch up to `k` documents whose metadata exactly matches `filter`.
+
+        For lookups that are fully identified by metadata (e.g., the SSP
+        statement for a control), this answers with an indexed SQL / Chroma
+        `where` query instead of a vector search.
+        """
+        key, value = next(iter(filter.items()))
+        base_filter = {f: v for f, v in filter.items() if f != key}
+        return self.get_by_metadata_many(key, [value], base_filter, k).get(str(value), [])
+
+    def get_by_metadata_many(
+        self,
+        key: str,
+        values: List[Any],
+        filter: Optional[Dict[str, Any]] = None,
+        k: int = 10,
+    ) -> Dict[str, List[Any]]:
+        """
+        Exact-match lookup for many values of one metadata key in one query.
+
+        Returns {str(value): [documents]} with at most `k` documents per value,
+        in a stable order (chunk offset within the source, then chunk ID);
+        values with no match are omitted.
+        """
+        if not values:
+            return {}
+        filter = filter or {}
+        store = self.get_store()
+        if store is None:
+            logger.warning("Vector store not available — returning empty results")
+            return {}
+
+        if self.backend == "pgvector":
+            return self._get_by_metadata_pgvector(key, values, filter, k)
+        if self.backend == "chroma":
+            return self._get_by_metadata_chroma(store, key, values, filter, k)
+
+        # No exact-match API on this backend: fall back to filtered vector search
+        grouped: Dict[str, List[Any]] = {}
+        for value in values:
+            docs = store.similarity_search(str(value), k=k, filter={**filter, key: value})
+            if docs:
+                grouped[str(value)] = docs
+        return grouped
+
+    def _get_by_metadata_pgvector(
+        self,
+        key: str,
+        values: List[Any],
+        filter: Dict[str, Any],
+        k: int,
+    ) -> Dict[str, List[Any]]:
+        from django.db import connection
+        from langchain.schema import Document
+
+        key = _checked_key(key)
+        sql = f"""
+            SELECT document, cmetadata FROM (
+                SELECT e.document, e.cmetadata,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY e.cmetadata->>'{key}'
+                           ORDER BY (e.cmetadata->>'start_index')::int NULLS LAST, e.custom_id
+                       ) AS rn
+                FROM langchain_pg_embedding e
+                JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+                WHERE c.name = %s
+                  AND e.cmetadata->>'{key}' = ANY(%s)
+                  {_pgvector_filter_sql(filter)}
+            ) ranked
+            WHERE rn <= %s
+            ORDER BY rn
+        """
+        params = [self.collection, [str(v) for v in values], *[str(v) for v in filter.values()], k]
+
+        grouped: Dict[str, List[Any]] = {}
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            for document, metadata in cursor.fetchall():
+                if isinstance(metadata, str):
+                    metadata = json.loads(metadata)
+                grouped.setdefault(str(metadata.get(key)), []).append(
+                    Document(page_content=document or "", metadata=metadata)
+                )
+        return grouped
+
+    @staticmethod
+    def _get_by_metadata_chroma(
+        store,
+        key: str,
+        values: List[Any],
+        filter: Dict[str, Any],
+        k: int,
+    ) -> Dict[str, List[Any]]:
+        from langchain.schema import Document
+
+        response = store.get(where=_chroma_where(key, values, filter), include=["documents", "metadatas"])
+        rows = sorted(
+            zip(response.get("ids", []), response.get("documents", []), response.get("metadatas", [])),
+            key=lambda row: (_chunk_order(row[2]), row[0]),
+        )
+        grouped: Dict[str, List[Any]] = {}
+        for _, document, metadata in rows:
+            docs = grouped.setdefault(str(metadata.get(key)), [])
+            if len(docs) < k:
+                docs.append(Document(page_content=document or "", metadata=metadata))
+        return grouped
+
+
+def _chunk_order(metadata: Dict[str, Any]) -> float:
+    """A chunk's offset in its source (set at indexing); unchunked documents sort last."""
+    start_index = metadata.get("start_index")
+    return float(start_index) if start_index is not None else float("inf")
+
+
+def _checked_key(name: str) -> str:
+    if not _METADATA_KEY_RE.match(name):
+        raise ValueError(f"Invalid metadata key: {name!r}")
+    return name
+
+
+def _pgvector_filter_sql(filter: Dict[str, Any]) -> str:
+    """AND clauses for exact-match metadata filters (one %s parameter per key)."""
+    return "".join(f" AND e.cmetadata->>'{_checked_key(name)}' = %s" for name in filter)
+
+
+def _chroma_where(key: str, values: List[Any], filter: Dict[str, Any]) -> Dict[str, Any]:
+    clauses = [{name: value} for name, value in filter.items()]
+    clauses.append({key: {"$in": list(values)}} if len(values) > 1 else {key: values[0]})
+    return {"$and": clauses} if len(clauses) > 1 else clauses[0]
+
+
+_shared_manager: Optional[VectorStoreManager] = None
+_shared_pid: Optional[int] = None
+_shared_lock = threading.Lock()
+
+
+def get_vector_store_manager() -> VectorStoreManager:
+    """
+    Process-wide VectorStoreManager, so all agents share one store, one
+    embedding client and one bounded connection pool.
+    """
+    global _shared_manager, _shared_pid
+    pid = os.getpid()
+    if _shared_manager is None or _shared_pid != pid:
+        with _shared_lock:
+            if _shared_manager is not None and _shared_pid != pid:
+                # Forked without the at-fork hook (e.g., os.fork before import)
+                _shared_manager.dispose(close=False)
+                _shared_manager = None
+            if _shared_manager is None:
+                _shared_manager = VectorStoreManager()
+                _shared_pid = pid
+    return _shared_manager
+
+
+def _reset_after_fork() -> None:
+    global _shared_manager, _shared_lock
+    _shared_lock = threading.Lock()
+    if _shared_manager is not None:
+        _shared_manager.dispose(close=False)
+        _shared_manager = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
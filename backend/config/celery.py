@@ -2,12 +2,38 @@
 Celery application for AI Continuous ATO platform.
 """
 
+import logging
 import os
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 app = Celery("config")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+logger = logging.getLogger(__name__)
+
+
+@worker_init.connect
+def warm_control_catalog(**kwargs):
+    """Build the catalog snapshot in the parent so prefork children map the same file."""
+    try:
+        from agents.catalog_snapshot import get_catalog_snapshot
+
+        get_catalog_snapshot()
+    except Exception as e:
+        logger.warning(f"Control catalog warm-up skipped: {e}")
+
+
+@worker_process_init.connect
+def warm_reranker(**kwargs):
+    """Load the shared reranker in each pool process before it takes tasks."""
+    try:
+        from agents.rag.reranking import warm_up_reranker
+
+        warm_up_reranker()
+    except Exception as e:
+        logger.warning(f"Reranker warm-up skipped: {e}")
@@ -129,6 +129,8 @@ EVIDENCE_VAULT = {
     "SECRET_KEY": os.getenv("EVIDENCE_VAULT_SECRET_KEY", "minioadmin"),
     "BUCKET": os.getenv("EVIDENCE_VAULT_BUCKET", "ato-evidence"),
     "SECURE": os.getenv("EVIDENCE_VAULT_SECURE", "false").lower() == "true",
+    # JSON evidence compression: none | gzip | zstd (zstd needs `zstandard`)
+    "COMPRESSION": os.getenv("EVIDENCE_VAULT_COMPRESSION", "gzip"),
 }
 
 # ---------------------------------------------------------------------------
@@ -139,6 +141,75 @@ VECTOR_DB = {
     "COLLECTION": os.getenv("VECTOR_DB_COLLECTION", "ato_compliance"),
     "EMBEDDING_MODEL": os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
     "EMBEDDING_DIMENSIONS": int(os.getenv("EMBEDDING_DIMENSIONS", "1536")),
+    # Persistent query embedding cache: none | sqlite | django
+    "EMBEDDING_CACHE": os.getenv("EMBEDDING_CACHE", "django"),
+    "EMBEDDING_CACHE_PATH": os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3"),
+    "EMBEDDING_CACHE_MAX_ENTRIES": int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000")),
+    # pgvector connection pool (one per process, shared by all agents)
+    "POOL_SIZE": int(os.getenv("VECTOR_DB_POOL_SIZE", "5")),
+    "POOL_MAX_OVERFLOW": int(os.getenv("VECTOR_DB_POOL_MAX_OVERFLOW", "5")),
+    "POOL_TIMEOUT_SECONDS": int(os.getenv("VECTOR_DB_POOL_TIMEOUT", "30")),
+    "POOL_RECYCLE_SECONDS": int(os.getenv("VECTOR_DB_POOL_RECYCLE", "1800")),
+    # pgvector ANN index (manage with `python manage.py pgvector_indexes`)
+    "INDEX_METHOD": os.getenv("VECTOR_DB_INDEX_METHOD", "hnsw"),  # hnsw | ivfflat
+    "DISTANCE": os.getenv("VECTOR_DB_DISTANCE", "cosine"),  # cosine | euclidean | max_inner_product
+    "HNSW_M": int(os.getenv("VECTOR_DB_HNSW_M", "16")),
+    "HNSW_EF_CONSTRUCTION": int(os.getenv("VECTOR_DB_HNSW_EF_CONSTRUCTION", "64")),
+    "HNSW_EF_SEARCH": int(os.getenv("VECTOR_DB_HNSW_EF_SEARCH", "40")),
+    "IVFFLAT_LISTS": int(os.getenv("VECTOR_DB_IVFFLAT_LISTS", "1000")),
+    "IVFFLAT_PROBES": int(os.getenv("VECTOR_DB_IVFFLAT_PROBES", "10")),
+    "INDEX_MAINTENANCE_WORK_MEM": os.getenv("VECTOR_DB_INDEX_MAINTENANCE_WORK_MEM", ""),
+    "METADATA_INDEX_KEYS": ["doc_type", "control_id", "framework", "source_id"],
+}
+
+# ---------------------------------------------------------------------------
+# Indexing pipeline (see agents/rag/indexing.py, agents/rag/embedding_pipeline.py)
+# ---------------------------------------------------------------------------
+INDEXING = {
+    # Chunk in a process pool once an input reaches CHUNK_PARALLEL_MIN_DOCS documents
+    "CHUNK_WORKERS": int(os.getenv("INDEXING_CHUNK_WORKERS", str(os.cpu_count() or 1))),
+    "CHUNK_PARALLEL_MIN_DOCS": int(os.getenv("INDEXING_CHUNK_PARALLEL_MIN_DOCS", "2000")),
+    # Items read, chunked, embedded and written per window when streaming an input
+    "STREAM_WINDOW": int(os.getenv("INDEXING_STREAM_WINDOW", "5000")),
+    # Embedding batches are bounded by chunk count and total characters
+    "EMBED_BATCH_SIZE": int(os.getenv("INDEXING_EMBED_BATCH_SIZE", "256")),
+    "EMBED_BATCH_MAX_CHARS": int(os.getenv("INDEXING_EMBED_BATCH_MAX_CHARS", "400000")),
+    "EMBED_CONCURRENCY": int(os.getenv("INDEXING_EMBED_CONCURRENCY", "4")),
+    "EMBED_MAX_RETRIES": int(os.getenv("INDEXING_EMBED_MAX_RETRIES", "5")),
+    "EMBED_BACKOFF_SECONDS": float(os.getenv("INDEXING_EMBED_BACKOFF_SECONDS", "1.0")),
+    # Resume interrupted ingests from here ("" = no checkpoints); only used by
+    # vector store backends that cannot list indexed chunk IDs
+    "CHECKPOINT_DIR": os.getenv("INDEXING_CHECKPOINT_DIR", "/tmp/ato-index-checkpoints"),
+    # Checkpoints of jobs that never completed are deleted after this long
+    "CHECKPOINT_MAX_AGE_SECONDS": int(os.getenv("INDEXING_CHECKPOINT_MAX_AGE_SECONDS", str(7 * 24 * 3600))),
+}
+
+# ---------------------------------------------------------------------------
+# Cross-encoder reranker (see agents/rag/reranking.py)
+# ---------------------------------------------------------------------------
+RERANKER = {
+    "ENABLED": os.getenv("RERANKER_ENABLED", "true").lower() == "true",
+    "MODEL": os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    # CPU inference: torch (optionally int8-quantized) or onnx
+    "BACKEND": os.getenv("RERANKER_BACKEND", "torch"),
+    "ONNX_FILE": os.getenv("RERANKER_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx"),
+    "QUANTIZE_INT8": os.getenv("RERANKER_QUANTIZE_INT8", "false").lower() == "true",
+    # Max (query, passage) pairs per model batch, and how long to wait to fill one
+    "BATCH_SIZE": int(os.getenv("RERANKER_BATCH_SIZE", "256")),
+    "MAX_WAIT_MS": float(os.getenv("RERANKER_MAX_WAIT_MS", "5")),
+    "SCORE_CACHE_SIZE": int(os.getenv("RERANKER_SCORE_CACHE_SIZE", "50000")),
+}
+
+# ---------------------------------------------------------------------------
+# Control Catalog snapshot (see agents/catalog_snapshot.py)
+# ---------------------------------------------------------------------------
+CONTROL_CATALOG = {
+    # Directory for memory-mapped snapshot files shared by worker processes ("" = in-memory only)
+    "SNAPSHOT_DIR": os.getenv("CONTROL_CATALOG_SNAPSHOT_DIR", ""),
+    # How often other processes re-check the catalog version
+    "VERSION_CHECK_SECONDS": int(os.getenv("CONTROL_CATALOG_VERSION_CHECK_SECONDS", "30")),
+    # Memory-mapped STIG rule -> CCI -> NIST crosswalk from build_cci_crosswalk ("" = build from the database)
+    "CCI_CROSSWALK_PATH": os.getenv("CONTROL_CATALOG_CCI_CROSSWALK_PATH", ""),
 }
 
 # ---------------------------------------------------------------------------
@@ -159,6 +230,19 @@ MCP_ROUTER = {
     "DEFAULT_TIMEOUT_SECONDS": int(os.getenv("MCP_TIMEOUT", "60")),
     "REQUIRE_MTLS": os.getenv("MCP_REQUIRE_MTLS", "false").lower() == "true",
     "AUDIT_ALL_CALLS": True,  # Always audit MCP tool calls
+    # Result cache for read-only tools (per-tool TTLs in mcp_tools.cache.DEFAULT_CACHE_TTLS);
+    # "memory" is shared by all runs in one process, "redis" across workers
+    "CACHE_BACKEND": os.getenv("MCP_CACHE_BACKEND", "none"),  # none | memory | redis
+    "CACHE_MAX_BYTES": int(os.getenv("MCP_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "CACHE_REDIS_URL": os.getenv("MCP_CACHE_REDIS_URL", "redis://localhost:6379/1"),
+    # Token-bucket rate limiting per (tenant, provider, agent)
+    "RATE_LIMIT_BACKEND": os.getenv("MCP_RATE_LIMIT_BACKEND", "memory"),  # memory | redis
+    "RATE_LIMIT_REDIS_URL": os.getenv("MCP_RATE_LIMIT_REDIS_URL", "redis://localhost:6379/1"),
+    # Audit trail sink for MCP call records
+    "AUDIT_SINK": os.getenv("MCP_AUDIT_SINK", "django"),  # memory | jsonl | django
+    "AUDIT_JSONL_PATH": os.getenv("MCP_AUDIT_JSONL_PATH", "mcp_audit.jsonl"),
+    "AUDIT_BATCH_SIZE": int(os.getenv("MCP_AUDIT_BATCH_SIZE", "200")),
+    "AUDIT_MAX_PENDING": int(os.getenv("MCP_AUDIT_MAX_PENDING", "10000")),
 }
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,239 @@
+"""
+Benchmark STIG checklist ingestion: streaming parser vs whole-document parse.
+
+Usage:
+    python manage.py benchmark_ckl                          # synthetic 50MB multi-STIG CKL
+    python manage.py benchmark_ckl --size-mb 200 --stigs 12
+    python manage.py benchmark_ckl --format cklb
+    python manage.py benchmark_ckl /data/checklists/site-a.ckl /data/checklists/site-b.cklb
+
+"tree" is the previous ingest path (ET.fromstring + findall/findtext per
+VULN, CKL only); "stream" is mcp_tools.ckl_parser. Time is the best of
+--repeat runs; peak memory is measured in a separate tracemalloc run.
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+from xml.sax.saxutils import escape
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mcp_tools.ckl_parser import iter_checklist_findings
+
+# Attributes STIG Viewer writes for every VULN, with typical text sizes
+_VULN_ATTRIBUTE_SIZES = [
+    ("Vuln_Num", 0), ("Severity", 0), ("Group_Title", 40), ("Rule_ID", 0), ("Rule_Ver", 0),
+    ("Rule_Title", 160), ("Vuln_Discuss", 900), ("IA_Controls", 0), ("Check_Content", 700),
+    ("Fix_Text", 600), ("False_Positives", 0), ("False_Negatives", 0), ("Documentable", 0),
+    ("Mitigations", 0), ("Potential_Impact", 0), ("Third_Party_Tools", 0), ("Mitigation_Control", 0),
+    ("Responsibility", 0), ("Security_Override_Guidance", 0), ("Check_Content_Ref", 0), ("Weight", 0),
+    ("Class", 0), ("STIGRef", 90), ("TargetKey", 0), ("STIG_UUID", 0), ("LEGACY_ID", 0),
+]
+_WORDS = "the system must be configured to audit account logon events and restrict access".split()
+_STATUSES = ["NotAFinding", "Open", "Not_Applicable", "Not_Reviewed"]
+_CKLB_STATUSES = ["not_a_finding", "open", "not_applicable", "not_reviewed"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark streaming CKL/CKLB ingestion against the whole-document parse."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Checklists to benchmark (default: a synthetic one)")
+        parser.add_argument("--size-mb", type=int, default=50, help="Size of the synthetic checklist")
+        parser.add_argument("--stigs", type=int, default=8, help="STIGs in the synthetic checklist")
+        parser.add_argument("--format", choices=["ckl", "cklb"], default="ckl", help="Synthetic checklist format")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        paths = options["paths"]
+        generated = None
+        if not paths:
+            suffix = f".{options['format']}"
+            fd, generated = tempfile.mkstemp(prefix="benchmark-", suffix=suffix)
+            os.close(fd)
+            started = time.monotonic()
+            write_synthetic_checklist(generated, options["size_mb"], options["stigs"], options["format"])
+            self.stdout.write(
+                f"Generated {generated} ({os.path.getsize(generated) / 2**20:.0f} MB) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+            paths = [generated]
+
+        try:
+            for path in paths:
+                if not os.path.isfile(path):
+                    raise CommandError(f"Not a file: {path}")
+                self._benchmark(path, options["repeat"])
+        finally:
+            if generated:
+                os.remove(generated)
+
+    def _benchmark(self, path: str, repeat: int) -> None:
+        self.stdout.write(f"\n{path} ({os.path.getsize(path) / 2**20:.1f} MB)")
+        parsers: Dict[str, Callable[[str], List[Dict[str, Any]]]] = {
+            "stream": lambda p: list(iter_checklist_findings(p)),
+        }
+        if not path.endswith(".cklb"):
+            parsers["tree"] = _tree_findings
+
+        for name, parse in parsers.items():
+            timings = []
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                findings = parse(path)
+                timings.append(time.perf_counter() - started)
+            tracemalloc.start()
+            parse(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.stdout.write(
+                f"  {name:<7} {min(timings):7.2f}s  peak {peak / 2**20:8.1f} MB  "
+                f"{len(findings)} findings ({len(findings) / min(timings):,.0f}/s)"
+            )
+
+
+def _tree_findings(path: str) -> List[Dict[str, Any]]:
+    """The previous ingest path: parse the whole document, then findall/findtext."""
+    from defusedxml import ElementTree as ET
+
+    with open(path, "rb") as f:
+        root = ET.fromstring(f.read())
+    severity_map = {"high": "CAT_I", "medium": "CAT_II", "low": "CAT_III"}
+    findings = []
+    for vuln in root.findall(".//VULN"):
+        stig_data = {}
+        for sd in vuln.findall("STIG_DATA"):
+            stig_data[sd.findtext("VULN_ATTRIBUTE", "")] = sd.findtext("ATTRIBUTE_DATA", "")
+        findings.append({
+            "vuln_id": stig_data.get("Vuln_Num", ""),
+            "rule_id": stig_data.get("Rule_ID", ""),
+            "stig_id": stig_data.get("STIG_ID", ""),
+            "severity": severity_map.get(stig_data.get("Severity", "medium").lower(), "CAT_II"),
+            "status": vuln.findtext("STATUS", "Not_Reviewed"),
+            "finding_details": vuln.findtext("FINDING_DETAILS", ""),
+            "comments": vuln.findtext("COMMENTS", ""),
+        })
+    return findings
+
+
+# ---------------------------------------------------------------------------
+# Synthetic checklists
+# ---------------------------------------------------------------------------
+
+def write_synthetic_checklist(path: str, size_mb: int, stigs: int, fmt: str = "ckl") -> None:
+    """Write a multi-STIG checklist of roughly `size_mb` with STIG Viewer's structure."""
+    rng = random.Random(0)
+    target = size_mb * 2**20
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "cklb":
+            _write_cklb(f, rng, target, stigs)
+        else:
+            _write_ckl(f, rng, target, stigs)
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _vuln_fields(rng: random.Random, number: int) -> Dict[str, Any]:
+    return {
+        "vuln_id": f"V-{number}",
+        "rule_id": f"SV-{number}r{rng.randint(100000, 999999)}_rule",
+        "stig_id": f"OS-00-{number % 1000000:06d}",
+        "severity": rng.choice(["high", "medium", "medium", "medium", "low"]),
+        "status": rng.randrange(4),
+        "ccis": [f"CCI-{rng.randint(1, 3700):06d}" for _ in range(rng.choice([1, 1, 1, 2]))],
+        "details": _text(rng, rng.choice([0, 200, 1200, 3000])),
+        "comments": _text(rng, rng.choice([0, 0, 120])),
+    }
+
+
+def _write_ckl(f, rng: random.Random, target: int, stigs: int) -> None:
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n<CHECKLIST><ASSET><ROLE>None</ROLE>'
+            "<HOST_NAME>bench-host</HOST_NAME><TARGET_KEY>1</TARGET_KEY></ASSET><STIGS>")
+    per_stig = target // max(1, stigs)
+    number = 200000
+    for s in range(max(1, stigs)):
+        f.write("<iSTIG><STIG_INFO>")
+        for name, value in (("version", "1"), ("title", f"Benchmark STIG {s + 1}"), ("releaseinfo", "Release: 4")):
+            f.write(f"<SI_DATA><SID_NAME>{name}</SID_NAME><SID_DATA>{value}</SID_DATA></SI_DATA>")
+        f.write("</STIG_INFO>")
+        written = 0
+        while written < per_stig:
+            number += 1
+            vuln = _vuln_fields(rng, number)
+            values = {
+                "Vuln_Num": vuln["vuln_id"], "Severity": vuln["severity"], "Rule_ID": vuln["rule_id"],
+                "Rule_Ver": vuln["stig_id"], "Weight": "10.0", "Class": "Unclass",
+            }
+            parts = ["<VULN>"]
+            for attribute, size in _VULN_ATTRIBUTE_SIZES:
+                value = values.get(attribute) or (_text(rng, size) if size else "")
+                parts.append(
+                    f"<STIG_DATA><VULN_ATTRIBUTE>{attribute}</VULN_ATTRIBUTE>"
+                    f"<ATTRIBUTE_DATA>{escape(value)}</ATTRIBUTE_DATA></STIG_DATA>"
+                )
+            for cci in vuln["ccis"]:
+                parts.append(
+                    f"<STIG_DATA><VULN_ATTRIBUTE>CCI_REF</VULN_ATTRIBUTE>"
+                    f"<ATTRIBUTE_DATA>{cci}</ATTRIBUTE_DATA></STIG_DATA>"
+                )
+            parts.append(
+                f"<STATUS>{_STATUSES[vuln['status']]}</STATUS>"
+                f"<FINDING_DETAILS>{escape(vuln['details'])}</FINDING_DETAILS>"
+                f"<COMMENTS>{escape(vuln['comments'])}</COMMENTS>"
+                "<SEVERITY_OVERRIDE></SEVERITY_OVERRIDE><SEVERITY_JUSTIFICATION></SEVERITY_JUSTIFICATION>"
+                "</VULN>"
+            )
+            vuln_xml = "".join(parts)
+            f.write(vuln_xml)
+            written += len(vuln_xml)
+        f.write("</iSTIG>")
+    f.write("</STIGS></CHECKLIST>\n")
+
+
+def _write_cklb(f, rng: random.Random, target: int, stigs: int) -> None:
+    f.write('{"title": "bench-host", "id": "bench", "target_data": {"host_name": "bench-host"}, "stigs": [')
+    per_stig = target // max(1, stigs)
+    number = 200000
+    for s in range(max(1, stigs)):
+        header = {"stig_name": f"Benchmark_STIG_{s + 1}", "display_name": f"Benchmark STIG {s + 1}", "version": "1"}
+        f.write(("," if s else "") + json.dumps(header)[:-1] + ', "rules": [')
+        written = 0
+        first = True
+        while written < per_stig:
+            number += 1
+            vuln = _vuln_fields(rng, number)
+            rule = {
+                "group_id": vuln["vuln_id"],
+                "rule_id_src": vuln["rule_id"],
+                "rule_id": vuln["rule_id"].split("r", 1)[0],
+                "rule_version": vuln["stig_id"],
+                "rule_title": _text(rng, 160),
+                "severity": vuln["severity"],
+                "discussion": _text(rng, 900),
+                "check_content": _text(rng, 700),
+                "fix_text": _text(rng, 600),
+                "ccis": vuln["ccis"],
+                "status": _CKLB_STATUSES[vuln["status"]],
+                "finding_details": vuln["details"],
+                "comments": vuln["comments"],
+                "overrides": {},
+            }
+            rule_json = ("" if first else ",") + json.dumps(rule)
+            f.write(rule_json)
+            written += len(rule_json)
+            first = False
+        f.write("]}")
+    f.write("]}\n")
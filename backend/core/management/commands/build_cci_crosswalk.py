@@ -0,0 +1,56 @@
+"""
+Build the STIG rule -> CCI -> NIST 800-53 crosswalk file that workers memory-map.
+
+Usage:
+    python manage.py build_cci_crosswalk --cci-list U_CCI_List.xml --xccdf /data/stigs/
+    python manage.py build_cci_crosswalk                # from the loaded catalog
+    python manage.py build_cci_crosswalk --output /data/cci_crosswalk.bin
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.catalog_loader import find_catalog_files
+from mcp_tools.cci_crosswalk import build_crosswalk_from_sources, write_crosswalk
+
+
+class Command(BaseCommand):
+    help = "Build the compact CCI crosswalk from the DISA CCI list and XCCDF benchmarks (or the database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cci-list", help="DISA U_CCI_List.xml (default: CCIs recorded on ControlMapping)")
+        parser.add_argument(
+            "--xccdf", nargs="+", default=[],
+            help="XCCDF files or directories for rule -> CCI (default: STIG rows in ControlCatalog)",
+        )
+        parser.add_argument("--output", help="Crosswalk file (default: CONTROL_CATALOG.CCI_CROSSWALK_PATH)")
+
+    def handle(self, *args, **options):
+        output = options["output"] or settings.CONTROL_CATALOG.get("CCI_CROSSWALK_PATH", "")
+        if not output:
+            raise CommandError("No --output given and CONTROL_CATALOG_CCI_CROSSWALK_PATH is not set")
+
+        xccdf_paths = []
+        if options["xccdf"]:
+            xccdf_paths = find_catalog_files(options["xccdf"], (".xml",), name_hint="xccdf")
+            if not xccdf_paths:
+                raise CommandError("No XCCDF files found")
+
+        started = time.monotonic()
+        try:
+            crosswalk = build_crosswalk_from_sources(
+                cci_list_path=options["cci_list"],
+                xccdf_paths=xccdf_paths,
+                version=time.strftime("%Y%m%dT%H%M%S"),
+            )
+            write_crosswalk(crosswalk, output)
+        except (OSError, ValueError, SyntaxError) as e:  # ParseError is a SyntaxError
+            raise CommandError(f"Crosswalk build failed: {e}") from e
+
+        stats = crosswalk.stats()
+        self.stdout.write(
+            f"Wrote {output}: {stats['rules']} rules, {stats['ccis']} CCIs, {stats['controls']} controls "
+            f"({stats['bytes'] / 1024:.0f} KiB of arrays) in {time.monotonic() - started:.1f}s"
+        )
@@ -0,0 +1,90 @@
+"""
+Load control catalogs from their native formats.
+
+Usage:
+    python manage.py load_catalog oscal NIST_SP-800-53_rev5_catalog.json \
+        --baseline low=NIST_SP-800-53_rev5_LOW-baseline_profile.json \
+        --baseline moderate=NIST_SP-800-53_rev5_MODERATE-baseline_profile.json
+    python manage.py load_catalog xccdf /data/stigs/ --cci-list U_CCI_List.xml --prune
+    python manage.py load_catalog xccdf U_RHEL_8_STIG_V1R12_Manual-xccdf.xml --no-index
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.catalog_loader import (
+    DEFAULT_BATCH_SIZE,
+    OSCAL_FRAMEWORK,
+    find_catalog_files,
+    load_cci_list,
+    load_oscal_baseline,
+    load_oscal_catalog,
+    load_xccdf_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream-load an OSCAL catalog or DISA XCCDF benchmarks into the control catalog and RAG index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("format", choices=["oscal", "xccdf"])
+        parser.add_argument("paths", nargs="+", help="Files, or directories searched for *xccdf*.xml")
+        parser.add_argument("--framework", default=OSCAL_FRAMEWORK, help="Framework of an OSCAL catalog")
+        parser.add_argument(
+            "--baseline", action="append", default=[], metavar="NAME=PROFILE",
+            help="OSCAL baseline profile whose controls get NAME in baseline_impact (repeatable)",
+        )
+        parser.add_argument("--cci-list", help="DISA U_CCI_List.xml for the CCI -> NIST 800-53 Rev 5 crosswalk")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--no-index", action="store_true", help="Load the database only; skip the RAG index")
+        parser.add_argument("--prune", action="store_true", help="Remove index entries absent from the loaded files")
+
+    def handle(self, *args, **options):
+        indexer = None
+        if not options["no_index"]:
+            from agents.rag.indexing import ComplianceIndexer
+            from agents.rag.vector_store import get_vector_store_manager
+
+            indexer = ComplianceIndexer(get_vector_store_manager())
+
+        started = time.monotonic()
+        try:
+            if options["format"] == "oscal":
+                if len(options["paths"]) != 1:
+                    raise CommandError("oscal takes exactly one catalog file")
+                baselines = {}
+                for spec in options["baseline"]:
+                    name, sep, path = spec.partition("=")
+                    if not sep:
+                        raise CommandError(f"--baseline expects NAME=PROFILE, got {spec!r}")
+                    baselines[name] = load_oscal_baseline(path)
+                stats = load_oscal_catalog(
+                    options["paths"][0],
+                    framework=options["framework"],
+                    baselines=baselines,
+                    indexer=indexer,
+                    batch_size=options["batch_size"],
+                    prune=options["prune"],
+                )
+            else:
+                paths = find_catalog_files(options["paths"], (".xml",), name_hint="xccdf")
+                if not paths:
+                    raise CommandError("No XCCDF files found")
+                cci_map = load_cci_list(options["cci_list"]) if options["cci_list"] else None
+                stats = load_xccdf_benchmarks(
+                    paths,
+                    cci_map=cci_map,
+                    indexer=indexer,
+                    batch_size=options["batch_size"],
+                    prune=options["prune"],
+                )
+        except (OSError, ValueError, SyntaxError) as e:  # ParseError is a SyntaxError
+            raise CommandError(f"Catalog load failed: {e}") from e
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Loaded {stats['controls']} controls, {stats['mappings']} mappings "
+            f"({stats['mappings_removed']} stale removed), indexed {stats['chunks_indexed']} chunks "
+            f"in {elapsed:.1f}s"
+        )
@@ -0,0 +1,60 @@
+"""
+Manage pgvector ANN and metadata indexes.
+
+Usage:
+    python manage.py pgvector_indexes ensure
+    python manage.py pgvector_indexes rebuild --m 32 --ef-construction 128
+    python manage.py pgvector_indexes rebuild --method ivfflat --lists 2000
+    python manage.py pgvector_indexes status
+    python manage.py pgvector_indexes drop
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from agents.rag.pgvector_index import PgVectorIndexManager
+
+
+class Command(BaseCommand):
+    help = "Create, rebuild, inspect or drop pgvector HNSW/IVFFlat and metadata indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["ensure", "rebuild", "status", "drop"])
+        parser.add_argument("--method", choices=["hnsw", "ivfflat"], help="ANN index type (default: VECTOR_DB.INDEX_METHOD)")
+        parser.add_argument("--m", type=int, help="HNSW max connections per layer")
+        parser.add_argument("--ef-construction", type=int, help="HNSW candidate list size at build time")
+        parser.add_argument("--lists", type=int, help="IVFFlat list count")
+        parser.add_argument("--maintenance-work-mem", help="e.g. 2GB; speeds up index builds")
+        parser.add_argument(
+            "--metadata-key", action="append", dest="metadata_keys",
+            help="Metadata key to index (repeatable; default: VECTOR_DB.METADATA_INDEX_KEYS)",
+        )
+
+    def handle(self, *args, **options):
+        indexes = PgVectorIndexManager()
+        build_params = {
+            "method": options["method"],
+            "m": options["m"],
+            "ef_construction": options["ef_construction"],
+            "lists": options["lists"],
+            "maintenance_work_mem": options["maintenance_work_mem"],
+        }
+
+        try:
+            action = options["action"]
+            if action == "ensure":
+                created = indexes.ensure_vector_index(**build_params)
+                self.stdout.write(f"Vector index: {'created' if created else 'already present'}")
+                for name in indexes.ensure_metadata_indexes(options["metadata_keys"]):
+                    self.stdout.write(f"Metadata index created: {name}")
+            elif action == "rebuild":
+                indexes.rebuild_vector_index(**build_params)
+                self.stdout.write("Vector index rebuilt")
+            elif action == "drop":
+                indexes.drop_vector_index()
+                self.stdout.write("Vector index dropped")
+        except Exception as e:
+            raise CommandError(f"pgvector index {options['action']} failed: {e}") from e
+
+        for index in indexes.index_status():
+            flag = "" if index["valid"] else "  [INVALID]"
+            self.stdout.write(f"{index['name']}  {index['size']}{flag}\n    {index['definition']}")
@@ -393,3 +393,17 @@ class AuditLog(BaseModel):
     class Meta:
         ordering = ["-created_at"]
         # Prevent updates/deletes in application code — enforce via DB triggers or WORM policy
+
+
+# ---------------------------------------------------------------------------
+# RAG Query Embedding Cache
+# ---------------------------------------------------------------------------
+
+class QueryEmbedding(BaseModel):
+    """Cached embedding for a normalized query string (see agents/rag/embedding_cache.py)."""
+    key = models.CharField(max_length=64, unique=True, help_text="SHA-256 of model|dimensions|normalized text")
+    vector = models.BinaryField(help_text="float32 array")
+    last_used_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-last_used_at"]
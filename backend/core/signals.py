@@ -0,0 +1,17 @@
+"""
+Signal handlers for the core app.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import ControlCatalog, ControlMapping
+
+
+@receiver([post_save, post_delete], sender=ControlCatalog)
+@receiver([post_save, post_delete], sender=ControlMapping)
+def invalidate_control_catalog(sender, **kwargs):
+    """A catalog change bumps the catalog version; re-check the snapshot."""
+    from agents.catalog_snapshot import invalidate_catalog_snapshot
+
+    invalidate_catalog_snapshot()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from mcp_tools.cci_crosswalk import CciCrosswalkBuilder, load_crosswalk, write_crosswalk
+
+
+class CciCrosswalkTests(unittest.TestCase):
+    def setUp(self):
+        builder = CciCrosswalkBuilder()
+        builder.add_cci("CCI-000213", ["AC-3"])
+        builder.add_cci("CCI-000366", ["CM-6"])
+        builder.add_rule("SV-23022r1_rule", ["CCI-000213"])
+        builder.add_rule("SV-230221r858734_rule", ["CCI-000366"], "SRG-OS-000480-GPOS-00227")
+        builder.add_rule("xccdf_mil.disa.stig_rule_CUSTOM-1r2_rule", ["CCI-000213"])
+        self.crosswalk = builder.build("test")
+
+    def test_bare_rule_number_matches_full_rule_id(self):
+        mappings, unmapped = self.crosswalk.map_rules(["SV-230221", "SV-230221r999999_rule"])
+        self.assertEqual(unmapped, [])
+        self.assertEqual([m["nist_controls"] for m in mappings], [["CM-6"], ["CM-6"]])
+        self.assertEqual(self.crosswalk.nist_for_rule("SV-230221"), ["CM-6"])
+
+    def test_map_rules_fields_and_unmapped(self):
+        mappings, unmapped = self.crosswalk.map_rules(["SV-230221r1_rule", "SV-1r1_rule", "CUSTOM-1r3_rule"])
+        self.assertEqual(unmapped, ["SV-1r1_rule"])
+        self.assertEqual(mappings[0]["cci_ids"], ["CCI-000366"])
+        self.assertEqual(mappings[0]["srg_id"], "SRG-OS-000480-GPOS-00227")
+        self.assertEqual(mappings[1]["nist_controls"], ["AC-3"])
+
+    def test_memory_mapped_file_matches_built_crosswalk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_crosswalk(self.crosswalk, os.path.join(directory, "crosswalk.bin"))
+            loaded = load_crosswalk(path)
+            rule_ids = ["SV-23022", "SV-230221", "CUSTOM-1r2_rule", "SV-7"]
+            self.assertEqual(loaded.map_rules(rule_ids), self.crosswalk.map_rules(rule_ids))
+            self.assertEqual(loaded.get("CCI-000366"), ["CM-6"])
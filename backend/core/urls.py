@@ -22,4 +22,5 @@ router.register(r"audit-logs", views.AuditLogViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("rag/health/", views.VectorStoreHealthView.as_view(), name="vector-store-health"),
 ]
@@ -6,6 +6,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from .models import (
     ApprovalRequest,
@@ -230,3 +231,14 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ["run", "system", "agent_id", "success"]
     search_fields = ["action", "target"]
     ordering_fields = ["created_at"]
+
+
+class VectorStoreHealthView(APIView):
+    """Health check and connection pool usage for the shared vector store."""
+
+    def get(self, request):
+        from agents.rag.vector_store import get_vector_store_manager
+
+        health = get_vector_store_manager().health_check()
+        code = status.HTTP_200_OK if health["healthy"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(health, status=code)
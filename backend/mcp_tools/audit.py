@@ -0,0 +1,364 @@
+"""
+MCP Audit Sinks — bounded, streaming persistence for MCP call records.
+
+The MCPRouter is shared across runs by the LangGraph nodes, so it must not
+hold every call record (let alone every tool output) for its lifetime.
+Records are reduced to hashes + output summaries and handed to a sink:
+
+  - InMemoryAuditSink: bounded ring buffer (default; dev/tests)
+  - JsonlAuditSink: append-only JSON Lines file
+  - DjangoAuditLogSink: batched bulk_create into core.models.AuditLog
+  - QueueAuditSink: hands records to an external queue (e.g., Celery/Kafka shipper)
+
+Batching sinks write from a background thread. Their intake queue is
+bounded, so a slow sink applies backpressure to callers instead of
+growing memory without limit.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from mcp_tools.router import MCPCallRecord
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_output(output: Any, max_keys: int = 50) -> Dict[str, Any]:
+    """
+    Summarize a tool output for audit without retaining its content.
+
+    Records top-level keys with scalar values kept verbatim (truncated) and
+    collections reduced to their size.
+    """
+    if isinstance(output, (list, tuple)):
+        return {"type": "list", "count": len(output)}
+    if not isinstance(output, dict):
+        return {"type": type(output).__name__}
+
+    summary: Dict[str, Any] = {}
+    for key in list(output.keys())[:max_keys]:
+        value = output[key]
+        if isinstance(value, (list, tuple, set)):
+            summary[key] = {"count": len(value)}
+        elif isinstance(value, dict):
+            summary[key] = {"keys": len(value)}
+        elif isinstance(value, str):
+            summary[key] = value[:200]
+        else:
+            summary[key] = value
+    if len(output) > max_keys:
+        summary["_truncated_keys"] = len(output) - max_keys
+    return summary
+
+
+class AuditSink:
+    """Base interface for MCP audit sinks."""
+
+    def write(self, record: "MCPCallRecord") -> None:
+        raise NotImplementedError
+
+    def query(self, run_id: Optional[str] = None) -> List["MCPCallRecord"]:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Block until all accepted records are persisted."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class InMemoryAuditSink(AuditSink):
+    """Keeps the most recent `max_records` call records in memory."""
+
+    def __init__(self, max_records: int = 10_000):
+        self._records: "deque[MCPCallRecord]" = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def write(self, record: "MCPCallRecord") -> None:
+        with self._lock:
+            self._records.append(record)
+
+    def query(self, run_id: Optional[str] = None) -> List["MCPCallRecord"]:
+        with self._lock:
+            records = list(self._records)
+        if run_id:
+            return [r for r in records if r.run_id == run_id]
+        return records
+
+
+class BatchingAuditSink(AuditSink):
+    """
+    Base for sinks that persist records in batches from a background thread.
+
+    `write` blocks for up to `put_timeout` seconds when the intake queue is
+    full (backpressure); records still not accepted after that are dropped
+    and counted in `dropped`, with an error logged.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10_000,
+        put_timeout: float = 30.0,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._run, name=f"{type(self).__name__}-writer", daemon=True
+        )
+        self._worker.start()
+
+    def write(self, record: "MCPCallRecord") -> None:
+        if self._closed:
+            raise RuntimeError("Audit sink is closed")
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            logger.error(
+                f"Audit sink backlog full for {self.put_timeout}s — dropped record {record.call_id} "
+                f"({record.tool_name}, run {record.run_id}); {self.dropped} records dropped so far"
+            )
+
+    def flush(self) -> None:
+        # Nothing reads the queue once the writer has stopped
+        if self._closed or not self._worker.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def query(self, run_id: Optional[str] = None) -> List["MCPCallRecord"]:
+        self.flush()
+        return self._query(run_id)
+
+    def _run(self) -> None:
+        try:
+            self._write_loop()
+        finally:
+            self._worker_exit()
+
+    def _write_loop(self) -> None:
+        batch: List["MCPCallRecord"] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # Interval elapsed
+
+            if isinstance(item, threading.Event) or item is None or item is False:
+                self._write_safely(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is None:
+                    return
+                continue
+
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write_safely(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write_safely(self, batch: List["MCPCallRecord"]) -> None:
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            logger.error(f"Audit sink write failed for {len(batch)} records: {e}")
+
+    def _write_batch(self, batch: List["MCPCallRecord"]) -> None:
+        raise NotImplementedError
+
+    def _worker_exit(self) -> None:
+        """Runs on the writer thread as it exits; release per-thread resources here."""
+
+    def _query(self, run_id: Optional[str]) -> List["MCPCallRecord"]:
+        raise NotImplementedError
+
+
+class JsonlAuditSink(BatchingAuditSink):
+    """Appends call records to a JSON Lines file."""
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        super().__init__(**kwargs)
+
+    def _write_batch(self, batch: List["MCPCallRecord"]) -> None:
+        lines = [json.dumps(_record_to_dict(r), default=str) for r in batch]
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _query(self, run_id: Optional[str]) -> List["MCPCallRecord"]:
+        records: List["MCPCallRecord"] = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if run_id and data.get("run_id") != run_id:
+                        continue
+                    records.append(_record_from_dict(data))
+        except FileNotFoundError:
+            pass
+        return records
+
+
+class DjangoAuditLogSink(BatchingAuditSink):
+    """
+    Persists call records as core.models.AuditLog rows via bulk_create.
+
+    The run/call identifiers are kept in input_summary because the run FK
+    may not exist yet when the call is made (e.g., ad-hoc runs).
+    """
+
+    def _write_batch(self, batch: List["MCPCallRecord"]) -> None:
+        from django.db import close_old_connections
+
+        from core.models import AuditLog
+
+        close_old_connections()
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                agent_id=r.agent_id,
+                action=f"mcp.call.{r.tool_name}",
+                target=r.tool_name,
+                input_summary={
+                    "run_id": r.run_id,
+                    "call_id": r.call_id,
+                    "mcp_action": r.action.value,
+                    "params": r.input_params,
+                    "started_at": r.started_at,
+                    "completed_at": r.completed_at,
+                    "approval_required": r.approval_required,
+                    "approval_id": r.approval_id,
+                    "cache_hit": r.cache_hit,
+                    "throttle_wait_ms": r.throttle_wait_ms,
+                },
+                output_summary=r.output_summary,
+                output_hash=r.output_hash,
+                duration_ms=r.duration_ms,
+                success=r.success,
+                error_message=r.error,
+                correlation_id=r.correlation_id,
+            )
+            for r in batch
+        ], batch_size=self.batch_size)
+
+    def _worker_exit(self) -> None:
+        # The writer thread has its own DB connection; close it with the thread
+        from django.db import connection
+
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Audit sink could not close its DB connection: {e}")
+
+    def _query(self, run_id: Optional[str]) -> List["MCPCallRecord"]:
+        from core.models import AuditLog
+
+        rows = AuditLog.objects.filter(action__startswith="mcp.call.")
+        if run_id:
+            rows = rows.filter(input_summary__run_id=run_id)
+
+        records = []
+        for row in rows.order_by("created_at").iterator():
+            meta = row.input_summary or {}
+            records.append(_record_from_dict({
+                "call_id": meta.get("call_id", ""),
+                "run_id": meta.get("run_id", ""),
+                "agent_id": row.agent_id,
+                "tool_name": row.target,
+                "action": meta.get("mcp_action", "read"),
+                "input_params": meta.get("params", {}),
+                "output_summary": row.output_summary,
+                "output_hash": row.output_hash,
+                "started_at": meta.get("started_at", ""),
+                "completed_at": meta.get("completed_at", ""),
+                "duration_ms": row.duration_ms or 0,
+                "success": row.success,
+                "error": row.error_message,
+                "approval_required": meta.get("approval_required", False),
+                "approval_id": meta.get("approval_id"),
+                "correlation_id": row.correlation_id,
+                "cache_hit": meta.get("cache_hit", False),
+                "throttle_wait_ms": meta.get("throttle_wait_ms", 0),
+            }))
+        return records
+
+
+class QueueAuditSink(BatchingAuditSink):
+    """
+    Forwards batches of serialized records to a consumer-owned queue.
+
+    `publish` receives a list of record dicts. Records are not retained, so
+    `query` returns an empty list — consumers own the persisted trail.
+    """
+
+    def __init__(self, publish, **kwargs):
+        self._publish = publish
+        super().__init__(**kwargs)
+
+    def _write_batch(self, batch: List["MCPCallRecord"]) -> None:
+        self._publish([_record_to_dict(r) for r in batch])
+
+    def _query(self, run_id: Optional[str]) -> List["MCPCallRecord"]:
+        return []
+
+
+def build_audit_sink(config: Dict[str, Any]) -> AuditSink:
+    """
+    Build an audit sink from MCP_ROUTER settings.
+
+    AUDIT_SINK: memory | jsonl | django
+    """
+    backend = config.get("AUDIT_SINK", "memory")
+    batch_kwargs = {
+        "batch_size": config.get("AUDIT_BATCH_SIZE", 200),
+        "max_pending": config.get("AUDIT_MAX_PENDING", 10_000),
+    }
+    if backend == "django":
+        return DjangoAuditLogSink(**batch_kwargs)
+    if backend == "jsonl":
+        return JsonlAuditSink(config.get("AUDIT_JSONL_PATH", "mcp_audit.jsonl"), **batch_kwargs)
+    return InMemoryAuditSink(max_records=config.get("AUDIT_MEMORY_MAX_RECORDS", 10_000))
+
+
+def _record_to_dict(record: "MCPCallRecord") -> Dict[str, Any]:
+    data = asdict(record)
+    data["action"] = record.action.value
+    return data
+
+
+def _record_from_dict(data: Dict[str, Any]) -> "MCPCallRecord":
+    from mcp_tools.router import MCPAction, MCPCallRecord
+
+    data = dict(data)
+    data["action"] = MCPAction(data.get("action", "read"))
+    return MCPCallRecord(**data)
@@ -0,0 +1,280 @@
+"""
+MCP Result Cache — TTL response cache for read-only MCP tool calls.
+
+Back-to-back runs ("are we still compliant?") re-request config snapshots
+and inventories that are only seconds old. The MCPRouter can consult a
+result cache for READ/EVALUATE tools before hitting provider APIs.
+
+Backends:
+  - InMemoryResultCache: per-process, LRU-evicted by total byte size
+  - RedisResultCache: shared across Celery workers via the Redis in docker-compose
+
+Routers are built per run, so get_result_cache hands every router in a
+process the same cache instance. Time-window params (inventory `as_of`,
+audit log `time_range`) carry the run's timestamp; make_cache_key floors
+them to the tool's TTL so back-to-back runs share an entry.
+
+Entries are stored as serialized JSON so cached outputs can never be
+mutated by callers. Each entry embeds the output's canonical encoding
+verbatim, so a hit returns the same EncodedEvidence (bytes and hash) the
+call produced when it originally executed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from mcp_tools.encoding import EncodedEvidence
+
+logger = logging.getLogger(__name__)
+
+# Default per-tool TTLs (seconds). Tools not listed here are never cached.
+DEFAULT_CACHE_TTLS: Dict[str, int] = {
+    "compliance_core.get_asset_inventory": 300,
+    "compliance_core.get_config_snapshot": 120,
+    "compliance_core.query_audit_logs": 60,
+    "compliance_core.evaluate_control_rule": 120,
+    "stig_scap.map_stig_to_nist_controls": 3600,
+    "stig_scap.get_stig_benchmark_info": 3600,
+    "ticketing.query_tickets": 30,
+}
+
+
+# (param, field) pairs holding ISO timestamps that move with every run
+TIME_PARAM_FIELDS = (("time", "as_of"), ("time_range", "start"), ("time_range", "end"))
+
+
+def make_cache_key(
+    tenant_id: str,
+    tool_name: str,
+    params: Dict[str, Any],
+    time_bucket_seconds: int = 0,
+) -> str:
+    """
+    Derive a cache key from tenant, tool, and canonicalized params.
+
+    With `time_bucket_seconds`, the timestamps in TIME_PARAM_FIELDS are
+    floored to that interval first, so calls whose time windows differ only
+    by the moment they were issued share a key.
+    """
+    if time_bucket_seconds > 0:
+        params = _bucket_time_params(params, time_bucket_seconds)
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(f"{tenant_id}|{tool_name}|{canonical}".encode()).hexdigest()
+    return f"{tool_name}:{digest}"
+
+
+def _bucket_time_params(params: Dict[str, Any], bucket_seconds: int) -> Dict[str, Any]:
+    bucketed = None
+    for param, name in TIME_PARAM_FIELDS:
+        window = params.get(param)
+        if not isinstance(window, dict) or not isinstance(window.get(name), str):
+            continue
+        try:
+            moment = datetime.fromisoformat(window[name])
+        except ValueError:
+            continue
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        floored = int(moment.timestamp()) // bucket_seconds * bucket_seconds
+        if bucketed is None:
+            bucketed = dict(params)
+        bucketed[param] = {**bucketed[param], name: floored}
+    return params if bucketed is None else bucketed
+
+
+class MCPResultCache:
+    """Base interface for MCP result cache backends."""
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], EncodedEvidence]]:
+        """Return (output, encoded output) for a live entry, or None."""
+        raise NotImplementedError
+
+    def set(self, key: str, output: Dict[str, Any], encoded: EncodedEvidence, ttl_seconds: int) -> None:
+        """Store an output (as its canonical encoding) for ttl_seconds."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    _OUTPUT_PREFIX = b'{"output":'
+    _HASH_SEPARATOR = b',"output_hash":'
+
+    @classmethod
+    def _encode(cls, encoded: EncodedEvidence) -> bytes:
+        # Reuses the canonical encoding the router produced for output_hash
+        return (
+            cls._OUTPUT_PREFIX + encoded.canonical
+            + cls._HASH_SEPARATOR + json.dumps(encoded.hash_sha256).encode() + b"}"
+        )
+
+    @classmethod
+    def _decode(cls, payload: bytes) -> Tuple[Dict[str, Any], EncodedEvidence]:
+        entry = json.loads(payload)
+        # The canonical bytes sit verbatim between the prefix and the hash
+        canonical = payload[len(cls._OUTPUT_PREFIX):payload.rindex(cls._HASH_SEPARATOR)]
+        return entry["output"], EncodedEvidence(
+            canonical=canonical, hash_sha256=entry["output_hash"], payload=canonical,
+        )
+
+
+class InMemoryResultCache(MCPResultCache):
+    """
+    Process-local cache with per-entry TTL and LRU eviction by byte size.
+
+    Thread-safe; evidence collection fans calls out across threads.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], EncodedEvidence]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._decode(payload)
+
+    def set(self, key: str, output: Dict[str, Any], encoded: EncodedEvidence, ttl_seconds: int) -> None:
+        payload = self._encode(encoded)
+        if len(payload) > self.max_bytes:
+            logger.debug(f"MCP cache: entry {key} exceeds cache size ({len(payload)} bytes) — not cached")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl_seconds, payload)
+            self._size_bytes += len(payload)
+            while self._size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def _remove(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._size_bytes -= len(payload)
+
+
+class RedisResultCache(MCPResultCache):
+    """
+    Redis-backed cache shared across processes and Celery workers.
+
+    TTL is enforced by Redis key expiry. Byte-size LRU eviction is delegated
+    to the Redis server (maxmemory + allkeys-lru / volatile-lru).
+    """
+
+    KEY_PREFIX = "mcp:cache:"
+
+    def __init__(self, redis_url: str = "redis://localhost:6379/1", client: Any = None):
+        self._client = client
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(redis_url)
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], EncodedEvidence]]:
+        try:
+            payload = self._client.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"MCP cache: Redis get failed: {e}")
+            return None
+        if payload is None:
+            return None
+        return self._decode(payload)
+
+    def set(self, key: str, output: Dict[str, Any], encoded: EncodedEvidence, ttl_seconds: int) -> None:
+        try:
+            self._client.set(self.KEY_PREFIX + key, self._encode(encoded), ex=ttl_seconds)
+        except Exception as e:
+            logger.warning(f"MCP cache: Redis set failed: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"MCP cache: Redis delete failed: {e}")
+
+    def clear(self) -> None:
+        try:
+            for redis_key in self._client.scan_iter(match=self.KEY_PREFIX + "*"):
+                self._client.delete(redis_key)
+        except Exception as e:
+            logger.warning(f"MCP cache: Redis clear failed: {e}")
+
+
+_caches: Dict[Tuple[Any, ...], Optional[MCPResultCache]] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(config: Dict[str, Any]) -> Optional[MCPResultCache]:
+    """
+    Return the process-wide result cache for MCP_ROUTER settings, building
+    it on first use. Keyed by process id as well, so forked workers (Celery
+    prefork) each build their own instead of inheriting the parent's lock.
+    """
+    key = (
+        os.getpid(),
+        config.get("CACHE_BACKEND", "none"),
+        config.get("CACHE_MAX_BYTES"),
+        config.get("CACHE_REDIS_URL"),
+    )
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = build_result_cache(config)
+        return _caches[key]
+
+
+def build_result_cache(config: Dict[str, Any]) -> Optional[MCPResultCache]:
+    """
+    Build a result cache from MCP_ROUTER settings.
+
+    CACHE_BACKEND: none | memory | redis
+    """
+    backend = config.get("CACHE_BACKEND", "none")
+    if backend == "memory":
+        return InMemoryResultCache(max_bytes=config.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    if backend == "redis":
+        try:
+            return RedisResultCache(redis_url=config.get("CACHE_REDIS_URL", "redis://localhost:6379/1"))
+        except ImportError:
+            logger.warning("redis not installed — MCP result cache disabled")
+            return None
+    return None
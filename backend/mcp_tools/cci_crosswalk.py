@@ -0,0 +1,445 @@
+"""
+CCI Crosswalk — compact, pre-indexed STIG rule -> CCI -> NIST 800-53 lookup.
+
+Sources:
+  - the DISA CCI list (U_CCI_List.xml): ~7k CCIs with their NIST 800-53
+    Rev 5 references
+  - STIG rule -> CCI assignments, from XCCDF benchmarks or from the STIG
+    rows that load_catalog stored in ControlCatalog
+
+Layout (no per-rule Python objects):
+  - CCI IDs, NIST control labels and SRG IDs are interned into sorted
+    string tables; everything else refers to them by index
+  - CCI -> controls is a CSR array (offsets + values); each distinct set
+    of CCIs a rule carries is stored once as a "group" with its CCIs and
+    its precomputed, de-duplicated NIST controls, and rules point at a group
+  - "SV-<n>r<rev>_rule" rule IDs are resolved through a direct-address
+    array indexed by <n>, so lookups are O(1) and ignore the revision;
+    other rule IDs go through a small dict
+
+The structure can be written to a single file and memory-mapped
+(CONTROL_CATALOG.CCI_CROSSWALK_PATH), so prefork workers share its pages.
+Without a file, it is built from the database and rebuilt when the catalog
+version changes.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CROSSWALK_MAGIC = b"ATOCCIXW2\n"
+
+# Rule numbers above this go to the fallback dict instead of the slot array
+MAX_RULE_SLOT = 10_000_000
+
+_RULE_REVISION_RE = re.compile(r"r\d+_rule$")
+
+ArrayLike = Union[array, memoryview]
+
+
+def _rule_key(rule_id: str) -> Union[int, str]:
+    """SV-230221r858734_rule -> 230221; other IDs lose any XCCDF prefix / revision suffix."""
+    if rule_id.startswith("xccdf_") and "_rule_" in rule_id:
+        rule_id = rule_id.split("_rule_", 1)[1]
+    if rule_id.startswith("SV-"):
+        end = rule_id.find("r", 3)
+        digits = rule_id[3:end] if end != -1 else rule_id[3:]
+        if digits.isdigit() and int(digits) <= MAX_RULE_SLOT:
+            return int(digits)
+    return _RULE_REVISION_RE.sub("", rule_id)
+
+
+class CciCrosswalk:
+    """Immutable rule -> CCI -> NIST lookup over interned tables and CSR arrays."""
+
+    def __init__(
+        self,
+        ccis: List[str],
+        controls: List[str],
+        srgs: List[str],
+        arrays: Dict[str, ArrayLike],
+        extra_rules: Dict[str, int],
+        version: str = "",
+        buffer: Optional[mmap.mmap] = None,
+    ):
+        self.version = version
+        self.ccis = ccis
+        self.controls = controls
+        self.srgs = srgs
+        self._cci_index = {cci: i for i, cci in enumerate(ccis)}
+        self._arrays = arrays
+        self._cci_ctrl_offsets = arrays["cci_ctrl_offsets"]
+        self._cci_ctrl_values = arrays["cci_ctrl_values"]
+        self._rule_slots = arrays["rule_slots"]
+        self._rule_group = arrays["rule_group"]
+        self._rule_srg = arrays["rule_srg"]
+        self._group_cci_offsets = arrays["group_cci_offsets"]
+        self._group_cci_values = arrays["group_cci_values"]
+        self._group_ctrl_offsets = arrays["group_ctrl_offsets"]
+        self._group_ctrl_values = arrays["group_ctrl_values"]
+        self._extra_rules = extra_rules
+        self._buffer = buffer
+        # Decoded (ccis, controls) per CCI group; bounded by the number of groups
+        self._groups: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        """Number of rules."""
+        return len(self._rule_srg)
+
+    # -- CCI lookups ----------------------------------------------------------
+
+    def nist_for_cci(self, cci: str) -> List[str]:
+        i = self._cci_index.get(cci)
+        if i is None:
+            return []
+        start, end = self._cci_ctrl_offsets[i], self._cci_ctrl_offsets[i + 1]
+        return [self.controls[c] for c in self._cci_ctrl_values[start:end]]
+
+    def get(self, cci: str, default: Optional[List[str]] = None) -> List[str]:
+        """Dict-style CCI -> NIST controls lookup."""
+        return self.nist_for_cci(cci) or (default if default is not None else [])
+
+    # -- Rule lookups ---------------------------------------------------------
+
+    def _row(self, rule_id: str) -> int:
+        key = _rule_key(rule_id)
+        if isinstance(key, int):
+            return self._rule_slots[key] if key < len(self._rule_slots) else -1
+        return self._extra_rules.get(key, -1)
+
+    def _group(self, group: int) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        decoded = self._groups.get(group)
+        if decoded is None:
+            offsets, values = self._group_cci_offsets, self._group_cci_values
+            ccis = tuple(self.ccis[c] for c in values[offsets[group]:offsets[group + 1]])
+            offsets, values = self._group_ctrl_offsets, self._group_ctrl_values
+            controls = tuple(self.controls[c] for c in values[offsets[group]:offsets[group + 1]])
+            decoded = self._groups[group] = (ccis, controls)
+        return decoded
+
+    def ccis_for_rule(self, rule_id: str) -> List[str]:
+        row = self._row(rule_id)
+        return list(self._group(self._rule_group[row])[0]) if row >= 0 else []
+
+    def nist_for_rule(self, rule_id: str) -> List[str]:
+        row = self._row(rule_id)
+        return list(self._group(self._rule_group[row])[1]) if row >= 0 else []
+
+    def map_rules(
+        self,
+        rule_ids: Sequence[str],
+        include_cci: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Bulk rule -> CCI -> NIST resolution. Returns (mappings, unmapped rule
+        IDs) in the shape of stig_scap.map_stig_to_nist_controls.
+        """
+        rule_slots, rule_group, rule_srg = self._rule_slots, self._rule_group, self._rule_srg
+        slot_count = len(rule_slots)
+        groups, srgs, extra_rules = self._groups, self.srgs, self._extra_rules
+
+        mappings: List[Dict[str, Any]] = []
+        unmapped: List[str] = []
+        for rule_id in rule_ids:
+            key = _rule_key(rule_id)
+            if isinstance(key, int):
+                row = rule_slots[key] if key < slot_count else -1
+            else:
+                row = extra_rules.get(key, -1)
+            if row < 0:
+                unmapped.append(rule_id)
+                continue
+            group = rule_group[row]
+            rule_ccis, nist_controls = groups.get(group) or self._group(group)
+            if not nist_controls:
+                unmapped.append(rule_id)
+                continue
+            srg = rule_srg[row]
+            mappings.append({
+                "stig_rule_id": rule_id,
+                "cci_ids": list(rule_ccis) if include_cci else [],
+                "nist_controls": list(nist_controls),
+                "framework_controls": list(nist_controls),  # NIST labels also key FedRAMP / RMF controls
+                "srg_id": srgs[srg] if srg >= 0 else "",
+            })
+        return mappings, unmapped
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "ccis": len(self.ccis),
+            "controls": len(self.controls),
+            "rules": len(self),
+            "cci_groups": len(self._group_cci_offsets) - 1,
+            "bytes": sum(_nbytes(a) for a in self._arrays.values()),
+            "memory_mapped": self._buffer is not None,
+        }
+
+
+class CciCrosswalkBuilder:
+    """Accumulates CCI and rule data, then compiles a CciCrosswalk."""
+
+    def __init__(self):
+        self._cci_controls: Dict[str, List[str]] = {}
+        self._rules: Dict[Union[int, str], Tuple[Tuple[str, ...], str]] = {}
+
+    def add_cci(self, cci: str, controls: Iterable[str]) -> None:
+        existing = self._cci_controls.setdefault(cci, [])
+        for control in controls:
+            if control and control not in existing:
+                existing.append(control)
+
+    def add_rule(self, rule_id: str, ccis: Iterable[str], srg_id: str = "") -> None:
+        """Later additions of the same rule (e.g., a newer revision) replace earlier ones."""
+        if rule_id:
+            self._rules[_rule_key(rule_id)] = (tuple(c for c in ccis if c), srg_id or "")
+
+    def build(self, version: str = "") -> CciCrosswalk:
+        rule_ccis = {cci for ccis, _ in self._rules.values() for cci in ccis}
+        ccis = sorted(set(self._cci_controls) | rule_ccis)
+        cci_index = {cci: i for i, cci in enumerate(ccis)}
+        controls = sorted({c for cs in self._cci_controls.values() for c in cs})
+        control_index = {c: i for i, c in enumerate(controls)}
+        srgs = sorted({srg for _, srg in self._rules.values() if srg})
+        srg_index = {srg: i for i, srg in enumerate(srgs)}
+
+        cci_ctrl_offsets, cci_ctrl_values = array("I", [0]), array("I")
+        for cci in ccis:
+            cci_ctrl_values.extend(control_index[c] for c in self._cci_controls.get(cci, []))
+            cci_ctrl_offsets.append(len(cci_ctrl_values))
+
+        # Rules share a few thousand distinct CCI sets; each set is stored once
+        group_index: Dict[Tuple[str, ...], int] = {}
+        group_cci_offsets, group_cci_values = array("I", [0]), array("I")
+        group_ctrl_offsets, group_ctrl_values = array("I", [0]), array("I")
+
+        numeric = [key for key in self._rules if isinstance(key, int)]
+        rule_slots = array("i", [-1]) * ((max(numeric) + 1) if numeric else 0)
+        extra_rules: Dict[str, int] = {}
+        rule_group, rule_srg = array("I"), array("i")
+
+        for row, (key, (rule_cci_ids, srg)) in enumerate(self._rules.items()):
+            if isinstance(key, int):
+                rule_slots[key] = row
+            else:
+                extra_rules[key] = row
+            group = group_index.get(rule_cci_ids)
+            if group is None:
+                group = group_index[rule_cci_ids] = len(group_index)
+                group_cci_values.extend(cci_index[c] for c in rule_cci_ids)
+                group_cci_offsets.append(len(group_cci_values))
+                seen: List[str] = []
+                for cci in rule_cci_ids:
+                    for control in self._cci_controls.get(cci, []):
+                        if control not in seen:
+                            seen.append(control)
+                group_ctrl_values.extend(control_index[c] for c in seen)
+                group_ctrl_offsets.append(len(group_ctrl_values))
+            rule_group.append(group)
+            rule_srg.append(srg_index[srg] if srg else -1)
+
+        arrays = {
+            "cci_ctrl_offsets": cci_ctrl_offsets,
+            "cci_ctrl_values": cci_ctrl_values,
+            "rule_slots": rule_slots,
+            "rule_group": rule_group,
+            "rule_srg": rule_srg,
+            "group_cci_offsets": group_cci_offsets,
+            "group_cci_values": group_cci_values,
+            "group_ctrl_offsets": group_ctrl_offsets,
+            "group_ctrl_values": group_ctrl_values,
+        }
+        return CciCrosswalk(ccis, controls, srgs, arrays, extra_rules, version=version)
+
+
+# ---------------------------------------------------------------------------
+# Build / persist / load
+# ---------------------------------------------------------------------------
+
+def build_crosswalk_from_sources(
+    cci_list_path: Optional[str] = None,
+    xccdf_paths: Optional[Iterable[str]] = None,
+    version: str = "",
+) -> CciCrosswalk:
+    """
+    Build from the DISA CCI list and XCCDF benchmarks. Without a CCI list,
+    CCI -> NIST comes from the database; without XCCDF paths, rule -> CCI
+    comes from the STIG rows in ControlCatalog.
+    """
+    from agents.catalog_loader import iter_cci_list, iter_xccdf_rules
+
+    builder = CciCrosswalkBuilder()
+    if cci_list_path:
+        for cci, controls in iter_cci_list(cci_list_path):
+            builder.add_cci(cci, controls)
+    else:
+        _add_db_cci_mappings(builder)
+
+    if xccdf_paths:
+        cci_map: Dict[str, List[str]] = {}
+        for path in xccdf_paths:
+            for rule in iter_xccdf_rules(path, cci_map):
+                builder.add_rule(rule["rule_id"], rule["cci_ids"], rule["srg_id"])
+    else:
+        _add_db_rules(builder)
+    return builder.build(version)
+
+
+def build_crosswalk_from_db(version: str = "") -> CciCrosswalk:
+    """Build from ControlCatalog STIG rows and the CCIs recorded on ControlMapping."""
+    builder = CciCrosswalkBuilder()
+    _add_db_cci_mappings(builder)
+    _add_db_rules(builder)
+    return builder.build(version)
+
+
+def _add_db_cci_mappings(builder: CciCrosswalkBuilder) -> None:
+    from core.models import ControlMapping
+
+    rows = (
+        ControlMapping.objects.exclude(cci_id="")
+        .filter(target_framework="nist_800_53_r5")
+        .values_list("cci_id", "target_control_id")
+        .distinct()
+    )
+    for cci, control in rows.iterator(chunk_size=10_000):
+        builder.add_cci(cci, [control])
+
+
+def _add_db_rules(builder: CciCrosswalkBuilder) -> None:
+    from core.models import ControlCatalog
+
+    rows = ControlCatalog.objects.filter(framework="stig").values_list("parameters", flat=True)
+    for params in rows.iterator(chunk_size=10_000):
+        params = params or {}
+        builder.add_rule(params.get("rule_id", ""), params.get("cci_ids", []), params.get("srg_id", ""))
+
+
+def write_crosswalk(crosswalk: CciCrosswalk, path: str) -> str:
+    """Persist a crosswalk as one file (JSON header + 8-byte aligned arrays); atomic rename."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    layout, offset = [], 0
+    for name, values in crosswalk._arrays.items():
+        layout.append([name, values.format if isinstance(values, memoryview) else values.typecode, offset, len(values)])
+        offset += _aligned(_nbytes(values))
+    header = json.dumps(
+        {
+            "version": crosswalk.version,
+            "ccis": crosswalk.ccis,
+            "controls": crosswalk.controls,
+            "srgs": crosswalk.srgs,
+            "extra_rules": crosswalk._extra_rules,
+            "arrays": layout,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    prefix = len(CROSSWALK_MAGIC) + len(header) + 1
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CROSSWALK_MAGIC)
+        f.write(header + b"\n")
+        f.write(b"\0" * (_aligned(prefix) - prefix))
+        for values in crosswalk._arrays.values():
+            data = values.tobytes()
+            f.write(data)
+            f.write(b"\0" * (_aligned(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_crosswalk(path: str) -> CciCrosswalk:
+    """Memory-map a persisted crosswalk; arrays are zero-copy views into the file."""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(CROSSWALK_MAGIC)] != CROSSWALK_MAGIC:
+        buffer.close()
+        raise ValueError(f"Not a CCI crosswalk file: {path}")
+
+    header_end = buffer.find(b"\n", len(CROSSWALK_MAGIC))
+    header = json.loads(buffer[len(CROSSWALK_MAGIC):header_end])
+    base = _aligned(header_end + 1)
+    view = memoryview(buffer)
+    arrays = {}
+    for name, typecode, offset, length in header["arrays"]:
+        itemsize = array(typecode).itemsize
+        start = base + offset
+        arrays[name] = view[start:start + length * itemsize].cast(typecode)
+    return CciCrosswalk(
+        header["ccis"], header["controls"], header["srgs"], arrays,
+        header["extra_rules"], version=header["version"], buffer=buffer,
+    )
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _nbytes(values: ArrayLike) -> int:
+    return len(values) * values.itemsize
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry
+# ---------------------------------------------------------------------------
+
+_crosswalk: Optional[CciCrosswalk] = None
+_source: Optional[str] = None
+_checked_at = 0.0
+_registry_lock = threading.Lock()
+
+
+def get_cci_crosswalk() -> CciCrosswalk:
+    """
+    Return the shared crosswalk: the memory-mapped file when
+    CONTROL_CATALOG.CCI_CROSSWALK_PATH exists, else one built from the
+    database. Re-checked at most every VERSION_CHECK_SECONDS.
+    """
+    global _crosswalk, _source, _checked_at
+
+    config = _get_catalog_config()
+    with _registry_lock:
+        now = time.monotonic()
+        if _crosswalk is not None and now - _checked_at < config.get("VERSION_CHECK_SECONDS", 30):
+            return _crosswalk
+        _checked_at = now
+
+        path = config.get("CCI_CROSSWALK_PATH", "")
+        try:
+            if path and os.path.exists(path):
+                source = f"file:{path}:{os.stat(path).st_mtime_ns}"
+                if source != _source:
+                    _crosswalk, _source = load_crosswalk(path), source
+            else:
+                from agents.catalog_snapshot import catalog_version
+
+                version = catalog_version()
+                source = f"db:{version}"
+                if source != _source:
+                    _crosswalk, _source = build_crosswalk_from_db(version), source
+        except Exception as e:
+            logger.warning(f"CCI crosswalk unavailable: {e}")
+            if _crosswalk is None:
+                _crosswalk = CciCrosswalkBuilder().build()
+
+        return _crosswalk
+
+
+def _get_catalog_config() -> Dict[str, Any]:
+    """Read CONTROL_CATALOG settings, tolerating use outside Django."""
+    try:
+        from django.conf import settings
+        return dict(getattr(settings, "CONTROL_CATALOG", {}))
+    except Exception:
+        return {}
@@ -0,0 +1,239 @@
+"""
+STIG Checklist Parsing — streaming CKL / CKLB readers.
+
+Checklists are read incrementally and findings are yielded as they are
+parsed, so memory stays bounded by one VULN (or rule) instead of the file:
+
+  - CKL (STIG Viewer 2, XML) is read with defusedxml iterparse; each VULN
+    is converted when it ends, then cleared and detached from its parent
+    (as in agents.catalog_loader._iterparse)
+  - a VULN's STIG_DATA attributes are collected in a single pass over its
+    children (no findall/findtext per attribute)
+  - CKLB (STIG Viewer 3, JSON) is read rule by rule with ijson (falls back
+    to json.load if ijson is not installed)
+
+Multi-STIG checklists (several iSTIG elements / "stigs" entries) tag each
+finding with the STIG it belongs to. Statuses and severities are normalized
+to the stig_scap.ingest_ckl schema (Not_A_Finding, CAT_I, ...).
+"""
+
+import json
+import logging
+from itertools import chain
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+ChecklistSource = Union[str, BinaryIO, Iterable[bytes]]
+
+SEVERITY_MAP = {"high": "CAT_I", "medium": "CAT_II", "low": "CAT_III"}
+
+# CKL writes NotAFinding; CKLB uses lowercase snake case
+STATUS_MAP = {
+    "notafinding": "Not_A_Finding",
+    "not_a_finding": "Not_A_Finding",
+    "open": "Open",
+    "not_applicable": "Not_Applicable",
+    "not_reviewed": "Not_Reviewed",
+}
+
+# STIG_DATA attributes kept per VULN (CCI_REF repeats and is collected separately)
+_VULN_ATTRIBUTES = {"Vuln_Num", "Rule_ID", "Rule_Ver", "STIG_ID", "Severity"}
+
+_READ_SIZE = 1024 * 1024
+
+
+def normalize_status(status: Optional[str]) -> str:
+    return STATUS_MAP.get((status or "").strip().lower(), "Not_Reviewed")
+
+
+def normalize_severity(severity: Optional[str]) -> str:
+    return SEVERITY_MAP.get((severity or "").strip().lower(), "CAT_II")
+
+
+def iter_checklist_findings(source: ChecklistSource, fmt: str = "") -> Iterator[Dict[str, Any]]:
+    """
+    Stream normalized findings from a CKL or CKLB checklist: a path, a
+    binary stream or an iterable of byte chunks (e.g., iter_artifact).
+    `fmt` is "ckl" or "cklb"; detected from the content if empty.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield from iter_checklist_findings(f, fmt or ("cklb" if source.endswith(".cklb") else ""))
+        return
+
+    chunks = iter(lambda: source.read(_READ_SIZE), b"") if hasattr(source, "read") else iter(source)
+    head = b""
+    for chunk in chunks:
+        head = chunk
+        if chunk.strip():
+            break
+    if not fmt:
+        fmt = "cklb" if head.lstrip()[:1] == b"{" else "ckl"
+    reader = _ChunkReader(chain([head], chunks))
+    if fmt == "cklb":
+        yield from iter_cklb_findings(reader)
+    else:
+        yield from iter_ckl_findings(reader)
+
+
+# ---------------------------------------------------------------------------
+# CKL (XML)
+# ---------------------------------------------------------------------------
+
+def iter_ckl_findings(source: Union[str, BinaryIO]) -> Iterator[Dict[str, Any]]:
+    """Stream findings from a CKL file. STIG_INFO precedes the VULNs of its iSTIG."""
+    from defusedxml.ElementTree import iterparse
+
+    stig = {"stig_name": "", "stig_version": ""}
+    stack: List[Any] = []
+    for event, elem in iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        tag = elem.tag
+        if tag == "VULN":
+            yield _ckl_vuln_record(elem, stig)
+        elif tag == "STIG_INFO":
+            stig = _ckl_stig_info(elem)
+        elif tag != "iSTIG":
+            continue
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+
+def _ckl_stig_info(stig_info) -> Dict[str, str]:
+    info: Dict[str, str] = {}
+    for si_data in stig_info:
+        name = value = ""
+        for part in si_data:
+            if part.tag == "SID_NAME":
+                name = part.text or ""
+            elif part.tag == "SID_DATA":
+                value = part.text or ""
+        info[name] = value
+    return {"stig_name": info.get("title", ""), "stig_version": info.get("version", "")}
+
+
+def _ckl_vuln_record(vuln, stig: Dict[str, str]) -> Dict[str, Any]:
+    """Single pass over a VULN's children: STIG_DATA pairs, CCI refs, status and notes."""
+    attributes: Dict[str, str] = {}
+    cci_ids: List[str] = []
+    status = ""
+    finding_details = comments = ""
+    for child in vuln:
+        tag = child.tag
+        if tag == "STIG_DATA":
+            name = value = ""
+            for part in child:
+                if part.tag == "VULN_ATTRIBUTE":
+                    name = part.text or ""
+                elif part.tag == "ATTRIBUTE_DATA":
+                    value = part.text or ""
+            if name == "CCI_REF":
+                if value:
+                    cci_ids.append(value.strip())
+            elif name in _VULN_ATTRIBUTES:
+                attributes[name] = value
+        elif tag == "STATUS":
+            status = child.text or ""
+        elif tag == "FINDING_DETAILS":
+            finding_details = child.text or ""
+        elif tag == "COMMENTS":
+            comments = child.text or ""
+
+    return {
+        "vuln_id": attributes.get("Vuln_Num", ""),
+        "rule_id": attributes.get("Rule_ID", ""),
+        "stig_id": attributes.get("Rule_Ver") or attributes.get("STIG_ID", ""),
+        "severity": normalize_severity(attributes.get("Severity", "medium")),
+        "status": normalize_status(status),
+        "finding_details": finding_details,
+        "comments": comments,
+        "cci_ids": cci_ids,
+        "stig_name": stig["stig_name"],
+        "stig_version": stig["stig_version"],
+    }
+
+
+# ---------------------------------------------------------------------------
+# CKLB (JSON)
+# ---------------------------------------------------------------------------
+
+_CKLB_STIG_PREFIX = "stigs.item"
+_CKLB_RULE_PREFIX = "stigs.item.rules.item"
+_CKLB_STIG_FIELDS = {f"{_CKLB_STIG_PREFIX}.{key}": key for key in ("stig_name", "display_name", "version")}
+
+
+def iter_cklb_findings(source: Union[str, BinaryIO]) -> Iterator[Dict[str, Any]]:
+    """Stream findings from a CKLB file. STIG fields precede their rules in CKLB output."""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            yield from iter_cklb_findings(f)
+        return
+
+    try:
+        import ijson
+    except ImportError:
+        logger.info("ijson not installed — loading the CKLB checklist in one piece")
+        for stig in json.load(source).get("stigs", []):
+            for rule in stig.get("rules", []):
+                yield _cklb_rule_record(rule, stig)
+        return
+
+    stig: Dict[str, Any] = {}
+    builder = None
+    for prefix, event, value in ijson.parse(source):
+        if builder is not None:
+            if prefix == _CKLB_RULE_PREFIX and event == "end_map":
+                yield _cklb_rule_record(builder.value, stig)
+                builder = None
+            else:
+                builder.event(event, value)
+        elif prefix == _CKLB_RULE_PREFIX and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == _CKLB_STIG_PREFIX and event == "start_map":
+            stig = {}
+        elif prefix in _CKLB_STIG_FIELDS and event in ("string", "number"):
+            stig[_CKLB_STIG_FIELDS[prefix]] = str(value)
+
+
+def _cklb_rule_record(rule: Dict[str, Any], stig: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "vuln_id": rule.get("group_id_src") or rule.get("group_id") or "",
+        "rule_id": rule.get("rule_id_src") or rule.get("rule_id") or "",
+        "stig_id": rule.get("rule_version") or "",
+        "severity": normalize_severity(rule.get("severity")),
+        "status": normalize_status(rule.get("status")),
+        "finding_details": rule.get("finding_details") or "",
+        "comments": rule.get("comments") or "",
+        "cci_ids": [str(cci) for cci in rule.get("ccis") or []],
+        "stig_name": stig.get("display_name") or stig.get("stig_name") or "",
+        "stig_version": str(stig.get("version") or ""),
+    }
+
+
+class _ChunkReader:
+    """Minimal file-like reader over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            data = self._buffer[self._pos:] + b"".join(self._chunks)
+            self._buffer, self._pos = b"", 0
+            return data
+        while len(self._buffer) - self._pos < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer, self._pos = self._buffer[self._pos:] + chunk, 0
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
@@ -0,0 +1,144 @@
+"""
+Evidence Encoding — canonical, optionally compressed JSON for evidence.
+
+Tool outputs are hashed by the MCPRouter (audit output_hash, result cache)
+and again by the EvidenceVault when stored. Both use the same canonical
+form so the same logical snapshot always yields the same hash:
+
+  - keys sorted, compact separators, UTF-8, non-JSON types via str()
+  - SHA-256 taken over the canonical *uncompressed* bytes
+  - payload optionally compressed (gzip, or zstd when `zstandard` is installed)
+
+The router encodes each tool output once and hands the EncodedEvidence to
+its caller alongside the output (MCPRouter.call_encoded), so the result
+cache and the vault reuse those bytes instead of re-serializing. Nothing
+is memoized here; an encoding lives only as long as the caller holds it.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import zlib
+from dataclasses import dataclass, replace
+from typing import Any, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Content encodings (also used as blob key suffixes by the evidence vault)
+IDENTITY = "identity"
+GZIP = "gzip"
+ZSTD = "zstd"
+
+CONTENT_ENCODING_SUFFIXES = {IDENTITY: "", GZIP: ".gz", ZSTD: ".zst"}
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+@dataclass(frozen=True)
+class EncodedEvidence:
+    """Canonical bytes of a JSON value, their SHA-256, and the stored payload."""
+    canonical: bytes
+    hash_sha256: str
+    content_encoding: str = IDENTITY
+    payload: bytes = b""
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.canonical)
+
+    def compressed(self, content_encoding: str, level: Optional[int] = None) -> "EncodedEvidence":
+        """The same canonical bytes with the payload in `content_encoding`."""
+        if content_encoding == self.content_encoding and self.payload:
+            return self
+        return replace(
+            self,
+            content_encoding=content_encoding,
+            payload=compress(self.canonical, content_encoding, level),
+        )
+
+
+def canonical_json(data: Any) -> bytes:
+    """Serialize a JSON value to its canonical byte form."""
+    return json.dumps(
+        data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def resolve_content_encoding(compression: Optional[str]) -> str:
+    """Map a compression setting (none/gzip/zstd) to a supported content encoding."""
+    compression = (compression or "none").lower()
+    if compression in ("none", IDENTITY):
+        return IDENTITY
+    if compression == ZSTD:
+        if zstandard is None:
+            logger.warning("zstandard not installed — evidence will be gzip-compressed")
+            return GZIP
+        return ZSTD
+    if compression == GZIP:
+        return GZIP
+    raise ValueError(f"Unsupported evidence compression: {compression}")
+
+
+def compress(data: bytes, content_encoding: str, level: Optional[int] = None) -> bytes:
+    if content_encoding == IDENTITY:
+        return data
+    if content_encoding == GZIP:
+        # mtime=0 keeps the compressed payload deterministic
+        return gzip.compress(data, compresslevel=level or 6, mtime=0)
+    if content_encoding == ZSTD:
+        return zstandard.ZstdCompressor(level=level or 3).compress(data)
+    raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+
+def iter_decompress(chunks: Iterable[bytes], content_encoding: str) -> Iterator[bytes]:
+    """Decompress a stream of payload chunks without buffering the whole object."""
+    if content_encoding == IDENTITY:
+        yield from chunks
+        return
+    if content_encoding == GZIP:
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+        return
+    if content_encoding == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed evidence")
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        return
+    raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+
+def canonical_evidence(data: Any) -> EncodedEvidence:
+    """Canonical bytes and SHA-256 of a JSON value (uncompressed payload)."""
+    canonical = canonical_json(data)
+    return EncodedEvidence(
+        canonical=canonical,
+        hash_sha256=hashlib.sha256(canonical).hexdigest(),
+        payload=canonical,
+    )
+
+
+def encode_evidence(
+    data: Any,
+    content_encoding: str = IDENTITY,
+    level: Optional[int] = None,
+) -> EncodedEvidence:
+    """Canonicalize, hash and (optionally) compress a JSON value."""
+    return canonical_evidence(data).compressed(content_encoding, level)
+
+
+def hash_evidence(data: Any) -> str:
+    return canonical_evidence(data).hash_sha256
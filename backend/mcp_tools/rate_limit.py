@@ -0,0 +1,244 @@
+"""
+MCP Rate Limiting — token-bucket limiter with blocking backpressure.
+
+The MCPRouter acquires one token per tool call from a bucket scoped to
+(tenant, provider, agent). When a bucket is empty the caller waits for
+the next refill instead of failing, so concurrent evidence collection
+slows down rather than dropping evidence. Only waits longer than the
+configured ceiling are treated as a policy violation.
+
+Backends:
+  - InMemoryTokenBucketLimiter: per-process, LRU-bounded number of buckets
+  - RedisTokenBucketLimiter: buckets shared across Celery workers (atomic Lua)
+
+Routers are built per run, so get_rate_limiter hands every router in a
+process the same limiter; concurrent runs draw from the same buckets.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketRateLimiter:
+    """
+    Base token-bucket limiter.
+
+    Buckets hold up to `burst` tokens and refill at `calls_per_minute / 60`
+    tokens per second. Subclasses implement `_try_acquire`, which either
+    takes a token (returning 0.0) or reports how long until one is available.
+    """
+
+    def __init__(self, calls_per_minute: int = 60, burst: Optional[int] = None):
+        self.calls_per_minute = calls_per_minute
+        self.refill_per_second = calls_per_minute / 60.0
+        self.burst = burst or calls_per_minute
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "acquired": 0,
+            "throttled": 0,
+            "timeouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def acquire(self, scope: str, timeout: float = 60.0) -> Optional[float]:
+        """
+        Take one token from the bucket for `scope`, blocking until available.
+
+        Returns:
+            Seconds spent waiting, or None if a token could not be obtained
+            within `timeout` seconds.
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        throttled = False
+
+        while True:
+            wait = self._try_acquire(scope)
+            if wait <= 0:
+                waited = time.monotonic() - started
+                self._record(waited, throttled)
+                return waited
+
+            throttled = True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                with self._stats_lock:
+                    self._stats["timeouts"] += 1
+                return None
+            time.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for throttling and wait time since process start."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _try_acquire(self, scope: str) -> float:
+        raise NotImplementedError
+
+    def _record(self, waited: float, throttled: bool) -> None:
+        with self._stats_lock:
+            self._stats["acquired"] += 1
+            if throttled:
+                self._stats["throttled"] += 1
+                self._stats["total_wait_seconds"] += waited
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+
+class InMemoryTokenBucketLimiter(TokenBucketRateLimiter):
+    """
+    Process-local token buckets.
+
+    At most `max_buckets` scopes are tracked; the least recently used bucket
+    is dropped first. Dropping a bucket only ever grants a fresh (full) one,
+    and idle buckets refill to full within a minute anyway.
+    """
+
+    def __init__(
+        self,
+        calls_per_minute: int = 60,
+        burst: Optional[int] = None,
+        max_buckets: int = 10_000,
+    ):
+        super().__init__(calls_per_minute=calls_per_minute, burst=burst)
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, scope: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(scope, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated_at) * self.refill_per_second)
+
+            if tokens >= 1.0:
+                self._buckets[scope] = (tokens - 1.0, now)
+                wait = 0.0
+            else:
+                self._buckets[scope] = (tokens, now)
+                wait = (1.0 - tokens) / self.refill_per_second
+
+            self._buckets.move_to_end(scope)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Atomic refill-and-take. Returns 0 when a token was taken, otherwise the
+# number of milliseconds until one will be available. Keys expire once the
+# bucket would have refilled completely, which keeps Redis memory bounded.
+_REDIS_TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local burst = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = burst
+  ts = now
+end
+tokens = math.min(burst, tokens + (now - ts) * refill_per_ms)
+
+local wait_ms = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait_ms = math.ceil((1 - tokens) / refill_per_ms)
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(burst / refill_per_ms) + 1000)
+return wait_ms
+"""
+
+
+class RedisTokenBucketLimiter(TokenBucketRateLimiter):
+    """Token buckets stored in Redis so limits hold across Celery workers."""
+
+    KEY_PREFIX = "mcp:ratelimit:"
+
+    def __init__(
+        self,
+        calls_per_minute: int = 60,
+        burst: Optional[int] = None,
+        redis_url: str = "redis://localhost:6379/1",
+        client: Any = None,
+    ):
+        super().__init__(calls_per_minute=calls_per_minute, burst=burst)
+        self._client = client
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(redis_url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET_LUA)
+
+    def _try_acquire(self, scope: str) -> float:
+        try:
+            wait_ms = self._script(
+                keys=[self.KEY_PREFIX + scope],
+                args=[self.burst, self.refill_per_second / 1000.0],
+            )
+        except Exception as e:
+            # Fail open: Redis outages must not block evidence collection
+            logger.warning(f"MCP rate limiter: Redis unavailable ({e}) — allowing call")
+            return 0.0
+        return int(wait_ms) / 1000.0
+
+
+_limiters: Dict[Tuple[Any, ...], TokenBucketRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    config: Dict[str, Any],
+    calls_per_minute: int,
+    burst: Optional[int] = None,
+) -> TokenBucketRateLimiter:
+    """
+    Return the process-wide rate limiter for MCP_ROUTER settings and rate,
+    building it on first use. Keyed by process id as well, so forked workers
+    (Celery prefork) each build their own instead of inheriting the parent's.
+    """
+    key = (
+        os.getpid(),
+        config.get("RATE_LIMIT_BACKEND", "memory"),
+        config.get("RATE_LIMIT_REDIS_URL"),
+        calls_per_minute,
+        burst,
+    )
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = build_rate_limiter(config, calls_per_minute, burst)
+        return _limiters[key]
+
+
+def build_rate_limiter(
+    config: Dict[str, Any],
+    calls_per_minute: int,
+    burst: Optional[int] = None,
+) -> TokenBucketRateLimiter:
+    """
+    Build a rate limiter from MCP_ROUTER settings.
+
+    RATE_LIMIT_BACKEND: memory | redis
+    """
+    if config.get("RATE_LIMIT_BACKEND", "memory") == "redis":
+        try:
+            return RedisTokenBucketLimiter(
+                calls_per_minute=calls_per_minute,
+                burst=burst,
+                redis_url=config.get("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/1"),
+            )
+        except ImportError:
+            logger.warning("redis not installed — falling back to in-memory rate limiter")
+    return InMemoryTokenBucketLimiter(calls_per_minute=calls_per_minute, burst=burst)
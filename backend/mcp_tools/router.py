@@ -4,15 +4,14 @@ MCP Router / Proxy
 Centralized router for all MCP tool calls. Enforces:
   - Allowlisted API operations per provider
   - Least-privilege credential selection
-  - Per-tenant policy and rate limits
+  - Per-tenant policy and token-bucket rate limits (blocking backpressure)
   - Approval gates for destructive operations
-  - Full audit logging of every tool call + output hash
+  - Full audit logging of every tool call + output hash (streamed to an audit sink)
+  - Optional TTL result cache for read-only tools (see mcp_tools.cache)
 
 All agent nodes call MCP tools through this router — never directly.
 """
 
-import hashlib
-import json
 import logging
 import time
 import uuid
@@ -21,6 +20,11 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
+from mcp_tools.audit import AuditSink, InMemoryAuditSink, summarize_output
+from mcp_tools.cache import MCPResultCache, make_cache_key
+from mcp_tools.encoding import EncodedEvidence, canonical_evidence
+from mcp_tools.rate_limit import InMemoryTokenBucketLimiter, TokenBucketRateLimiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +41,9 @@ class MCPAction(str, Enum):
 # Actions that require human approval before execution
 APPROVAL_REQUIRED_ACTIONS = {MCPAction.MODIFY}
 
+# Actions whose results are side-effect free and may be served from cache
+CACHEABLE_ACTIONS = {MCPAction.READ, MCPAction.EVALUATE}
+
 # Tool -> action classification
 TOOL_ACTION_MAP: Dict[str, MCPAction] = {
     "compliance_core.get_asset_inventory": MCPAction.READ,
@@ -44,6 +51,7 @@ TOOL_ACTION_MAP: Dict[str, MCPAction] = {
     "compliance_core.query_audit_logs": MCPAction.READ,
     "compliance_core.evaluate_control_rule": MCPAction.EVALUATE,
     "compliance_core.store_evidence_artifact": MCPAction.STORE,
+    "compliance_core.store_evidence_artifacts_batch": MCPAction.STORE,
     "compliance_core.detect_drift": MCPAction.READ,
     "compliance_core.create_poam_item": MCPAction.CREATE,
     "compliance_core.create_ticket": MCPAction.CREATE,
@@ -69,21 +77,30 @@ class MCPPolicy:
         default_factory=lambda: ["aws", "aws_gov", "azure", "azure_gov", "gcp", "gcp_gov"]
     )
     max_calls_per_minute: int = 60
+    rate_limit_burst: Optional[int] = None           # Defaults to max_calls_per_minute
+    rate_limit_max_wait_seconds: float = 60.0        # Block at most this long for a token
     require_approval_for: List[MCPAction] = field(default_factory=lambda: list(APPROVAL_REQUIRED_ACTIONS))
     require_mtls: bool = False
     audit_all_calls: bool = True
+    # Per-tool result cache TTLs in seconds; tools not listed are never cached
+    cache_ttls: Dict[str, int] = field(default_factory=dict)
 
 
 @dataclass
 class MCPCallRecord:
-    """Immutable record of an MCP tool call for audit trail."""
+    """
+    Immutable record of an MCP tool call for audit trail.
+
+    Only the output hash and a summary are kept; full outputs are returned
+    to the caller and never retained by the router.
+    """
     call_id: str
     run_id: str
     agent_id: str
     tool_name: str
     action: MCPAction
     input_params: Dict[str, Any]
-    output: Optional[Dict[str, Any]] = None
+    output_summary: Dict[str, Any] = field(default_factory=dict)
     output_hash: str = ""
     started_at: str = ""
     completed_at: str = ""
@@ -93,6 +110,24 @@ class MCPCallRecord:
     approval_required: bool = False
     approval_id: Optional[str] = None
     correlation_id: str = ""
+    cache_hit: bool = False
+    throttle_wait_ms: int = 0
+
+
+@dataclass(frozen=True)
+class MCPCallResult:
+    """
+    A tool output together with its canonical encoding.
+
+    `encoded.hash_sha256` is the audit output_hash; callers that persist the
+    output (e.g., as vault evidence) reuse `encoded` instead of re-serializing.
+    """
+    output: Dict[str, Any]
+    encoded: EncodedEvidence
+
+    @property
+    def output_hash(self) -> str:
+        return self.encoded.hash_sha256
 
 
 class MCPRouter:
@@ -102,16 +137,27 @@ class MCPRouter:
     Responsibilities:
     1. Validate tool name is allowlisted
     2. Validate provider is permitted
-    3. Check rate limits
+    3. Apply rate limits (waits for a token rather than failing)
     4. Route to correct provider implementation
     5. Hash and audit all outputs
     6. Enforce approval gates for destructive operations
+    7. Serve read-only calls from the result cache when one is configured
     """
 
-    def __init__(self, policy: Optional[MCPPolicy] = None):
+    def __init__(
+        self,
+        policy: Optional[MCPPolicy] = None,
+        result_cache: Optional[MCPResultCache] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        audit_sink: Optional[AuditSink] = None,
+    ):
         self.policy = policy or MCPPolicy(tenant_id="default")
-        self._call_log: List[MCPCallRecord] = []
-        self._call_counts: Dict[str, int] = {}
+        self.result_cache = result_cache
+        self.rate_limiter = rate_limiter or InMemoryTokenBucketLimiter(
+            calls_per_minute=self.policy.max_calls_per_minute,
+            burst=self.policy.rate_limit_burst,
+        )
+        self.audit_sink = audit_sink or InMemoryAuditSink()
         self._providers: Dict[str, Any] = {}
 
     def register_provider(self, provider_name: str, provider_impl: Any) -> None:
@@ -119,6 +165,10 @@ class MCPRouter:
         self._providers[provider_name] = provider_impl
         logger.info(f"MCP Router: registered provider '{provider_name}'")
 
+    def get_provider(self, provider_name: str) -> Optional[Any]:
+        """Return a registered provider implementation, if any."""
+        return self._providers.get(provider_name)
+
     def call(
         self,
         tool_name: str,
@@ -127,6 +177,19 @@ class MCPRouter:
         agent_id: str = "",
         correlation_id: str = "",
     ) -> Dict[str, Any]:
+        """
+        Execute an MCP tool call and return its output (see call_encoded).
+        """
+        return self.call_encoded(tool_name, params, run_id, agent_id, correlation_id).output
+
+    def call_encoded(
+        self,
+        tool_name: str,
+        params: Dict[str, Any],
+        run_id: str = "",
+        agent_id: str = "",
+        correlation_id: str = "",
+    ) -> MCPCallResult:
         """
         Execute an MCP tool call with full policy enforcement and audit logging.
 
@@ -138,10 +201,11 @@ class MCPRouter:
             correlation_id: Cross-agent correlation ID
 
         Returns:
-            Tool output as dict
+            MCPCallResult: the tool output and its canonical encoding
 
         Raises:
-            MCPPolicyViolation: If tool/provider not allowed or rate limited
+            MCPPolicyViolation: If tool/provider not allowed, or no rate-limit
+                token became available within rate_limit_max_wait_seconds
             MCPApprovalRequired: If action requires human approval
             MCPToolError: If tool execution fails
         """
@@ -152,10 +216,31 @@ class MCPRouter:
         # --- Policy checks ---
         self._validate_tool_allowed(tool_name)
         self._validate_provider_allowed(params.get("provider", ""))
-        self._check_rate_limit(agent_id)
 
         action = TOOL_ACTION_MAP.get(tool_name, MCPAction.READ)
 
+        # --- Result cache (read-only tools, opt-in per tool) ---
+        cache_key = self._cache_key(tool_name, action, params)
+        if cache_key:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                output, encoded = cached
+                return self._record_cache_hit(
+                    call_id=call_id,
+                    run_id=run_id,
+                    agent_id=agent_id,
+                    tool_name=tool_name,
+                    action=action,
+                    params=params,
+                    output=output,
+                    encoded=encoded,
+                    started_at=started_at,
+                    start_time=start_time,
+                    correlation_id=correlation_id,
+                )
+
+        throttle_wait_ms = self._check_rate_limit(tool_name, params, agent_id)
+
         # --- Approval gate ---
         if action in self.policy.require_approval_for:
             record = MCPCallRecord(
@@ -168,8 +253,9 @@ class MCPRouter:
                 started_at=started_at,
                 approval_required=True,
                 correlation_id=correlation_id,
+                throttle_wait_ms=throttle_wait_ms,
             )
-            self._call_log.append(record)
+            self.audit_sink.write(record)
             raise MCPApprovalRequired(
                 f"Tool '{tool_name}' requires human approval (action: {action.value})",
                 call_id=call_id,
@@ -186,14 +272,16 @@ class MCPRouter:
             input_params=self._sanitize_params(params),
             started_at=started_at,
             correlation_id=correlation_id,
+            throttle_wait_ms=throttle_wait_ms,
         )
 
         try:
             result = self._route_and_execute(tool_name, params)
             elapsed_ms = int((time.time() - start_time) * 1000)
 
-            record.output = result
-            record.output_hash = self._hash_output(result)
+            encoded = canonical_evidence(result)
+            record.output_summary = summarize_output(result)
+            record.output_hash = encoded.hash_sha256
             record.completed_at = datetime.now(timezone.utc).isoformat()
             record.duration_ms = elapsed_ms
             record.success = True
@@ -204,10 +292,15 @@ class MCPRouter:
             record.duration_ms = elapsed_ms
             record.success = False
             record.error = str(e)
-            self._call_log.append(record)
+            self.audit_sink.write(record)
             raise MCPToolError(f"Tool '{tool_name}' failed: {e}") from e
 
-        self._call_log.append(record)
+        self.audit_sink.write(record)
+
+        if cache_key:
+            self.result_cache.set(
+                cache_key, result, encoded, self.policy.cache_ttls[tool_name]
+            )
 
         if self.policy.audit_all_calls:
             logger.info(
@@ -215,7 +308,58 @@ class MCPRouter:
                 f"duration={elapsed_ms}ms | hash={record.output_hash[:16]}"
             )
 
-        return result
+        return MCPCallResult(output=result, encoded=encoded)
+
+    def _cache_key(self, tool_name: str, action: MCPAction, params: Dict[str, Any]) -> str:
+        """Return the result cache key for a cacheable call, or '' if not cacheable."""
+        if self.result_cache is None or action not in CACHEABLE_ACTIONS:
+            return ""
+        ttl = self.policy.cache_ttls.get(tool_name, 0)
+        if ttl <= 0:
+            return ""
+        return make_cache_key(self.policy.tenant_id, tool_name, params, time_bucket_seconds=ttl)
+
+    def _record_cache_hit(
+        self,
+        call_id: str,
+        run_id: str,
+        agent_id: str,
+        tool_name: str,
+        action: MCPAction,
+        params: Dict[str, Any],
+        output: Dict[str, Any],
+        encoded: EncodedEvidence,
+        started_at: str,
+        start_time: float,
+        correlation_id: str,
+    ) -> MCPCallResult:
+        """Audit a cache hit with the hash of the original tool output."""
+        elapsed_ms = int((time.time() - start_time) * 1000)
+        record = MCPCallRecord(
+            call_id=call_id,
+            run_id=run_id,
+            agent_id=agent_id,
+            tool_name=tool_name,
+            action=action,
+            input_params=self._sanitize_params(params),
+            output_summary=summarize_output(output),
+            output_hash=encoded.hash_sha256,
+            started_at=started_at,
+            completed_at=datetime.now(timezone.utc).isoformat(),
+            duration_ms=elapsed_ms,
+            success=True,
+            correlation_id=correlation_id,
+            cache_hit=True,
+        )
+        self.audit_sink.write(record)
+
+        if self.policy.audit_all_calls:
+            logger.info(
+                f"MCP call (cache hit): {tool_name} | agent={agent_id} | run={run_id} | "
+                f"duration={elapsed_ms}ms | hash={encoded.hash_sha256[:16]}"
+            )
+
+        return MCPCallResult(output=output, encoded=encoded)
 
     def _validate_tool_allowed(self, tool_name: str) -> None:
         if tool_name not in self.policy.allowed_tools:
@@ -225,14 +369,21 @@ class MCPRouter:
         if provider and provider not in self.policy.allowed_providers:
             raise MCPPolicyViolation(f"Provider '{provider}' is not permitted by policy")
 
-    def _check_rate_limit(self, agent_id: str) -> None:
-        now_minute = int(time.time() / 60)
-        key = f"{agent_id}:{now_minute}"
-        self._call_counts[key] = self._call_counts.get(key, 0) + 1
-        if self._call_counts[key] > self.policy.max_calls_per_minute:
+    def _check_rate_limit(self, tool_name: str, params: Dict[str, Any], agent_id: str) -> int:
+        """Block until the (tenant, provider, agent) bucket has a token; return wait in ms."""
+        provider = params.get("provider") or tool_name.split(".", 1)[0]
+        scope = f"{self.policy.tenant_id}:{provider}:{agent_id}"
+        waited = self.rate_limiter.acquire(scope, timeout=self.policy.rate_limit_max_wait_seconds)
+        if waited is None:
             raise MCPPolicyViolation(
-                f"Rate limit exceeded: {self.policy.max_calls_per_minute} calls/min"
+                f"Rate limit exceeded: {self.policy.max_calls_per_minute} calls/min "
+                f"for '{scope}' (waited > {self.policy.rate_limit_max_wait_seconds}s)"
             )
+        return int(waited * 1000)
+
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Throttling counters (acquired, throttled, timeouts, wait seconds)."""
+        return self.rate_limiter.stats()
 
     def _route_and_execute(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Route to the correct provider implementation and execute."""
@@ -259,24 +410,26 @@ class MCPRouter:
 
     @staticmethod
     def _sanitize_params(params: Dict[str, Any]) -> Dict[str, Any]:
-        """Remove sensitive fields before logging (credentials, tokens)."""
+        """Remove sensitive fields and summarize bulk payloads before logging."""
         sensitive_keys = {"credential_ref", "token", "secret", "password", "api_key"}
-        return {
-            k: "***REDACTED***" if k in sensitive_keys else v
-            for k, v in params.items()
-        }
-
-    @staticmethod
-    def _hash_output(output: Dict[str, Any]) -> str:
-        """SHA-256 hash of the JSON-serialized output for integrity."""
-        serialized = json.dumps(output, sort_keys=True, default=str)
-        return hashlib.sha256(serialized.encode()).hexdigest()
+        payload_keys = {"content", "items"}
+        sanitized = {}
+        for k, v in params.items():
+            if k in sensitive_keys:
+                sanitized[k] = "***REDACTED***"
+            elif k in payload_keys:
+                sanitized[k] = summarize_output(v)
+            else:
+                sanitized[k] = v
+        return sanitized
 
     def get_audit_trail(self, run_id: Optional[str] = None) -> List[MCPCallRecord]:
-        """Get audit trail, optionally filtered by run."""
-        if run_id:
-            return [r for r in self._call_log if r.run_id == run_id]
-        return list(self._call_log)
+        """Get audit trail from the audit sink, optionally filtered by run."""
+        return self.audit_sink.query(run_id)
+
+    def close(self) -> None:
+        """Flush and close the audit sink."""
+        self.audit_sink.close()
 
 
 # ---------------------------------------------------------------------------
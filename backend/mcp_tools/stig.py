@@ -8,30 +8,12 @@ runs OpenSCAP scans, and maps STIG findings to NIST 800-53 controls via CCI.
 import logging
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
-logger = logging.getLogger(__name__)
+from mcp_tools.cci_crosswalk import get_cci_crosswalk
+from mcp_tools.ckl_parser import iter_checklist_findings
 
-# CCI to NIST 800-53 Rev 5 control mapping (subset — full mapping loaded from data files)
-CCI_TO_NIST_MAP = {
-    "CCI-000068": ["SC-8"],
-    "CCI-000172": ["AU-12"],
-    "CCI-000197": ["IA-5(1)"],
-    "CCI-000213": ["AC-3"],
-    "CCI-000366": ["CM-6"],
-    "CCI-000381": ["CM-7"],
-    "CCI-000770": ["IA-2(5)"],
-    "CCI-000803": ["IA-7"],
-    "CCI-001199": ["SC-28"],
-    "CCI-001312": ["SI-11"],
-    "CCI-001314": ["SI-11"],
-    "CCI-001453": ["AC-17(2)"],
-    "CCI-001941": ["IA-2(8)"],
-    "CCI-001942": ["IA-2(9)"],
-    "CCI-002235": ["AC-6(10)"],
-    "CCI-002421": ["SC-8"],
-    "CCI-002890": ["MA-4(6)"],
-}
+logger = logging.getLogger(__name__)
 
 
 class StigScapTools:
@@ -42,11 +24,13 @@ class StigScapTools:
 
     def ingest_ckl(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Ingest a STIG Checklist (CKL) file and normalize findings.
+        Ingest a STIG Checklist (CKL or CKLB) file and normalize findings.
 
-        Parses the CKL XML format used by DISA STIG Viewer and extracts:
-        - STIG metadata (name, version, release)
-        - Per-check: vuln_id, rule_id, severity, status, finding_details, comments
+        Streams the checklist from the evidence vault (see mcp_tools.ckl_parser)
+        and extracts:
+        - STIG metadata (name, version)
+        - Per-check: vuln_id, rule_id, severity, status, finding_details,
+          comments, cci_ids and the STIG the check belongs to
         """
         system_id = params.get("system_id", "")
         asset_id = params.get("asset_id", "")
@@ -57,32 +41,17 @@ class StigScapTools:
         stig_name = params.get("stig_name", "Unknown STIG")
         stig_version = params.get("stig_version", "")
 
-        try:
-            from defusedxml import ElementTree as ET
-
-            # In production: retrieve CKL from evidence vault or upload path
-            # For now, demonstrate the parsing structure
-            ckl_content = self._load_ckl_content(ckl_uri)
-
-            if ckl_content:
-                root = ET.fromstring(ckl_content)
-
-                # Extract STIG info
-                stig_info = root.find(".//STIG_INFO")
-                if stig_info is not None:
-                    for si_data in stig_info.findall("SI_DATA"):
-                        name = si_data.findtext("SID_NAME", "")
-                        value = si_data.findtext("SID_DATA", "")
-                        if name == "title":
-                            stig_name = value
-                        elif name == "version":
-                            stig_version = value
+        summary = {"not_a_finding": 0, "open": 0, "not_applicable": 0, "not_reviewed": 0}
 
-                # Extract findings
-                for vuln in root.findall(".//VULN"):
-                    finding = self._parse_vuln_element(vuln)
-                    if finding:
-                        findings.append(finding)
+        try:
+            chunks = self._open_ckl(ckl_uri)
+
+            if chunks is not None:
+                for finding in iter_checklist_findings(chunks):
+                    if not findings and finding["stig_name"]:
+                        stig_name = finding["stig_name"]
+                        stig_version = finding["stig_version"]
+                    findings.append(finding)
             else:
                 # Stub findings for demo/testing
                 findings = self._generate_stub_findings()
@@ -94,29 +63,29 @@ class StigScapTools:
             logger.error(f"CKL ingestion failed: {e}")
             findings = self._generate_stub_findings()
 
-        # Compute summary
-        summary = {
-            "not_a_finding": sum(1 for f in findings if f["status"] == "Not_A_Finding"),
-            "open": sum(1 for f in findings if f["status"] == "Open"),
-            "not_applicable": sum(1 for f in findings if f["status"] == "Not_Applicable"),
-            "not_reviewed": sum(1 for f in findings if f["status"] == "Not_Reviewed"),
-        }
+        for finding in findings:
+            key = finding["status"].lower()
+            if key in summary:
+                summary[key] += 1
 
         # Store as evidence artifact if vault available
         evidence_artifact_id = ""
         if self.evidence_vault:
             import json
-            artifact = self.evidence_vault.store_json_artifact(
-                system_id=system_id,
-                artifact_type="ckl",
-                data={"stig_name": stig_name, "findings": findings, "summary": summary},
-                tags={
-                    "asset_id": asset_id,
-                    "environment": environment,
-                    "stig_name": stig_name,
-                },
-            )
-            evidence_artifact_id = artifact.get("artifact_id", "")
+            try:
+                artifact = self.evidence_vault.store_json_artifact(
+                    system_id=system_id,
+                    artifact_type="ckl",
+                    data={"stig_name": stig_name, "findings": findings, "summary": summary},
+                    tags={
+                        "asset_id": asset_id,
+                        "environment": environment,
+                        "stig_name": stig_name,
+                    },
+                )
+                evidence_artifact_id = artifact.get("artifact_id", "")
+            except Exception as e:
+                logger.error(f"CKL evidence storage failed for {stig_name}: {e}")
 
         return {
             "ingest_id": str(uuid.uuid4()),
@@ -173,32 +142,14 @@ class StigScapTools:
 
         Uses the CCI (Control Correlation Identifier) mapping chain:
         STIG Rule -> CCI -> NIST 800-53 Control
+
+        Resolved in bulk against the shared CCI crosswalk (see
+        mcp_tools.cci_crosswalk); rule revisions are ignored.
         """
         stig_rule_ids = params.get("stig_rule_ids", [])
-        framework = params.get("framework", "nist_800_53_r5")
         include_cci = params.get("include_cci", True)
 
-        mappings: List[Dict[str, Any]] = []
-        unmapped: List[str] = []
-
-        for rule_id in stig_rule_ids:
-            # In production: lookup from STIG-CCI database
-            # Demo: generate plausible mappings
-            cci_ids = self._lookup_ccis_for_rule(rule_id)
-            nist_controls = []
-            for cci in cci_ids:
-                nist_controls.extend(CCI_TO_NIST_MAP.get(cci, []))
-
-            if nist_controls:
-                mappings.append({
-                    "stig_rule_id": rule_id,
-                    "cci_ids": cci_ids if include_cci else [],
-                    "nist_controls": list(set(nist_controls)),
-                    "framework_controls": list(set(nist_controls)),  # Same for NIST
-                    "srg_id": "",
-                })
-            else:
-                unmapped.append(rule_id)
+        mappings, unmapped = get_cci_crosswalk().map_rules(stig_rule_ids, include_cci=include_cci)
 
         return {
             "mappings": mappings,
@@ -222,38 +173,12 @@ class StigScapTools:
 
     # --- Private helpers ---
 
-    def _load_ckl_content(self, ckl_uri: str) -> Optional[bytes]:
-        """Load CKL content from evidence vault or filesystem."""
+    def _open_ckl(self, ckl_uri: str) -> Optional[Iterator[bytes]]:
+        """Stream CKL content from the evidence vault in chunks (not buffered whole)."""
         if self.evidence_vault and ckl_uri.startswith("s3://"):
-            return self.evidence_vault.retrieve_artifact(ckl_uri)
-        # Could also load from local filesystem for testing
+            return self.evidence_vault.iter_artifact(ckl_uri)
         return None
 
-    def _parse_vuln_element(self, vuln_elem) -> Optional[Dict[str, Any]]:
-        """Parse a single VULN element from a CKL file."""
-        stig_data = {}
-        for sd in vuln_elem.findall("STIG_DATA"):
-            attr = sd.findtext("VULN_ATTRIBUTE", "")
-            data = sd.findtext("ATTRIBUTE_DATA", "")
-            stig_data[attr] = data
-
-        status = vuln_elem.findtext("STATUS", "Not_Reviewed")
-        finding_details = vuln_elem.findtext("FINDING_DETAILS", "")
-        comments = vuln_elem.findtext("COMMENTS", "")
-
-        severity_map = {"high": "CAT_I", "medium": "CAT_II", "low": "CAT_III"}
-        raw_severity = stig_data.get("Severity", "medium").lower()
-
-        return {
-            "vuln_id": stig_data.get("Vuln_Num", ""),
-            "rule_id": stig_data.get("Rule_ID", ""),
-            "stig_id": stig_data.get("STIG_ID", ""),
-            "severity": severity_map.get(raw_severity, "CAT_II"),
-            "status": status,
-            "finding_details": finding_details,
-            "comments": comments,
-        }
-
     def _generate_stub_findings(self) -> List[Dict[str, Any]]:
         """Generate stub STIG findings for demo/testing."""
         return [
@@ -276,12 +201,3 @@ class StigScapTools:
                 "comments": "Verified via Group Policy",
             },
         ]
-
-    def _lookup_ccis_for_rule(self, rule_id: str) -> List[str]:
-        """Lookup CCI IDs for a STIG rule. In production: database lookup."""
-        # Stub: return a plausible CCI for demo
-        stub_map = {
-            "SV-254239r848544_rule": ["CCI-000366"],
-            "SV-254240r848547_rule": ["CCI-000213", "CCI-000803"],
-        }
-        return stub_map.get(rule_id, ["CCI-000366"])